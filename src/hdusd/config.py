@@ -21,6 +21,31 @@ logging_backups = 5
 matlib_enabled = True
 engine_use_preview = True
 usd_mesh_assign_material_enabled = False
+# MaterialX node classes are registered on demand using manifest of generated classes
+mx_nodes_lazy_registration = True
+# dir of images converted for render delegates, empty means system temp dir
+image_cache_dir = ""
+# number of threads for background conversion of images, 0 means number of CPU cores
+image_conversion_threads = 0
+# textures are converted to tiled mipmapped .tx files for render delegates,
+# it requires OpenImageIO python module or maketx tool
+image_tiled_textures = False
+# MaterialX documents of materials are optimized before they are passed to render delegate
+mx_optimize_documents = True
+
+# USD nodes results memoization: max number of memoized stages and memory budget in MB
+usd_nodes_memo_size = 64
+usd_nodes_memo_memory = 2048
+# number of threads for parallel evaluation of USD nodes, 0 means number of CPU cores
+usd_nodes_threads = 0
+# interval in seconds of checking files watched by USD File nodes
+usd_file_watch_interval = 1.0
+# delay in seconds before Write USD File node writes file in background after last change
+usd_write_file_delay = 0.5
+# max number of prims found by search in USD list browser
+usd_list_search_limit = 10000
+# enables per-node profiler of USD nodetrees on startup, it can be also switched in USD Tools panel
+usd_nodes_profiling = False
 
 # dev settings
 show_dev_settings = False
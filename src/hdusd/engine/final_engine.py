@@ -27,6 +27,7 @@ import bgl
 from .engine import Engine
 from ..utils import gl, time_str, get_temp_file
 from ..utils import usd as usd_utils
+from ..utils import image as image_utils
 from ..export import object, world
 
 from ..utils import logging
@@ -154,6 +155,10 @@ class FinalEngine(Engine):
         renderer.GetRendererAov('color', render_images['Combined'].ctypes.data)
         self.update_render_result(render_images)
 
+        memory_stats = usd_utils.get_renderer_memory_stats(renderer)
+        if memory_stats:
+            log.info("Render memory stats:", memory_stats)
+
         # explicit renderer deletion
         renderer = None
 
@@ -205,6 +210,7 @@ class FinalEngine(Engine):
         self.height = int(screen_height * border[1][1])
 
         self._sync(depsgraph)
+        image_utils.wait_conversions()
 
         usd_utils.set_delegate_variant_stage(self.stage, settings.delegate_name)
 
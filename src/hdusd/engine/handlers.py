@@ -16,6 +16,7 @@ import bpy
 
 from ..properties.scene import DEFAULT_DELEGATE
 from .. import utils
+from ..utils import stage_cache, image, mx as mx_utils
 from .engine import log
 
 
@@ -23,6 +24,9 @@ from .engine import log
 def on_load_pre(*args):
     """Handler on loading a blend file (before)"""
     log("on_load_pre", args)
+    stage_cache.memo.clear()
+    image.clear_image_files()
+    mx_utils.reload_libraries()
     utils.clear_temp_dir()
 
 
@@ -31,7 +35,9 @@ def on_load_post(*args):
     """Handler on loading a blend file (after)"""
     log("on_load_post", args)
     from ..usd_nodes import node_tree
+    from ..mx_nodes import nodes as mx_nodes
     node_tree.reset()
+    mx_nodes.register_used_mx_node_classes()
 
     for scene in bpy.data.scenes:
         if not scene.hdusd.final.delegate:
@@ -58,6 +64,7 @@ def on_depsgraph_update_post(scene, depsgraph):
     material.depsgraph_update(depsgraph)
     node_tree.depsgraph_update(depsgraph)
     material_ui.depsgraph_update(depsgraph)
+    image.depsgraph_update(depsgraph)
 
 
 def no_depsgraph_update_call(op, *args, **kwargs):
@@ -86,7 +93,9 @@ def on_frame_change_post(scene, depsgraph):
 def on_save_pre(*args):
     log("on_save_pre", args)
     from ..viewport import usd_collection
+    from ..mx_nodes import nodes as mx_nodes
     usd_collection.scene_save_pre()
+    mx_nodes.store_used_mx_node_idnames()
 
 
 @bpy.app.handlers.persistent
@@ -20,6 +20,7 @@ from pxr import UsdImagingLite
 
 from .engine import Engine
 from ..utils.stage_cache import CachedStage
+from ..utils import image as image_utils
 from ..export import object, world
 
 from ..utils import logging
@@ -98,6 +99,7 @@ class PreviewEngine(Engine):
 
         object.sync(stage.GetPseudoRoot(), object.ObjectData.from_object(depsgraph.scene.camera),
                     scene=depsgraph.scene)
+        image_utils.wait_conversions()
 
         self.is_synced = True
         log(f"Sync finished")
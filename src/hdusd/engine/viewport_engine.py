@@ -27,6 +27,7 @@ from pxr import UsdImagingGL
 from .engine import Engine
 from ..export import camera, material, object, world
 from ..utils import usd as usd_utils
+from ..utils import image as image_utils
 from ..utils import time_str
 from ..utils import logging
 log = logging.Log('viewport_engine')
@@ -198,6 +199,7 @@ class ViewportEngine(Engine):
         self.renderer = UsdImagingGL.Engine()
 
         self._sync(context, depsgraph)
+        image_utils.wait_conversions()
 
         usd_utils.set_delegate_variant_stage(self.stage, settings.delegate_name)
 
@@ -223,6 +225,7 @@ class ViewportEngine(Engine):
         gl_delegate_changed = self.is_gl_delegate != settings.is_gl_delegate
 
         self._sync_update(context, depsgraph)
+        image_utils.wait_conversions()
 
         if gl_delegate_changed:
             usd_utils.set_delegate_variant_stage(self.cached_stage(), settings.delegate_name)
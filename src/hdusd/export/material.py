@@ -17,7 +17,9 @@ import bpy
 from pxr import Sdf, UsdShade, Tf
 import MaterialX as mx
 
-from .. import utils
+from .. import utils, config
+from ..utils import mx_optimize
+from ..utils import mx as mx_utils
 from ..utils import logging
 log = logging.Log('export.material')
 
@@ -43,6 +45,12 @@ def sync(materials_prim, mat: bpy.types.Material, obj: bpy.types.Object):
         log.warn("MX export failed", mat)
         return None
 
+    if config.mx_optimize_documents:
+        mx_optimize.optimize(doc)
+
+    if config.image_tiled_textures:
+        mx_utils.set_tiled_textures(doc)
+
     mx_file = utils.get_temp_file(".mtlx", f'{mat.name}{mat.hdusd.mx_node_tree.name if mat.hdusd.mx_node_tree else ""}')
     mx.writeToXmlFile(doc, str(mx_file))
     surfacematerial = next(node for node in doc.getNodes()
@@ -89,6 +97,12 @@ def sync_update_all(root_prim, mat: bpy.types.Material):
         # removing rpr_materialx_node in all material_prims
         return None
 
+    if config.mx_optimize_documents:
+        mx_optimize.optimize(doc)
+
+    if config.image_tiled_textures:
+        mx_utils.set_tiled_textures(doc)
+
     mx_file = utils.get_temp_file(".mtlx", f'{mat.name}{mat.hdusd.mx_node_tree.name if mat.hdusd.mx_node_tree else ""}',
                                   is_rand=True)
     mx.writeToXmlFile(doc, str(mx_file))
@@ -20,7 +20,7 @@ import bpy
 
 from pxr import Sdf, UsdLux, Tf
 
-from ...utils.image import cache_image_file, cache_image_file_path
+from ...utils.image import cache_image_file, cache_image_file_path, get_tiled_texture
 from ...utils import BLENDER_DATA_DIR
 from ...utils import usd as usd_utils
 
@@ -193,11 +193,12 @@ def sync(root_prim, world: bpy.types.World, shading: ShadingData = None):
     usd_light.OrientToStageUpAxis()
 
     if data.image:
+        image_path = get_tiled_texture(data.image)
         tex_attr = usd_light.CreateTextureFileAttr()
         tex_attr.ClearDefault()
         usd_utils.add_delegate_variants(obj_prim, {
             'GL': lambda: tex_attr.Set(""),
-            'RPR': lambda: tex_attr.Set(str(data.image))
+            'RPR': lambda: tex_attr.Set(str(image_path))
         })
 
     usd_light.CreateColorAttr(data.color)
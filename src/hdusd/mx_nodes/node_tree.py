@@ -12,13 +12,15 @@
 # See the License for the specific language governing permissions and
 # limitations under the License.
 #********************************************************************
+import time
 from collections import defaultdict
+from dataclasses import dataclass, field
 
 import MaterialX as mx
 
 import bpy
 
-from .nodes import get_mx_node_cls
+from .nodes import get_mx_node_cls, register_mx_node_cls
 from ..utils import mx as mx_utils
 from . import log
 
@@ -30,6 +32,27 @@ AREA_TO_UPDATE = 'PROPERTIES'
 REGION_TO_UPDATE = 'WINDOW'
 
 
+@dataclass
+class ImportNodePlan:
+    """Node of MxNodeTree which is created by MxNodeTree.import_()"""
+    path: str
+    MxNode_cls: type
+    data_type: str
+    file_prefix: object
+    params: list = field(default_factory=list)  # [(input name, mx value, mx type)] of uniform inputs
+    values: list = field(default_factory=list)  # [(input name, mx value, mx type)]
+    links: list = field(default_factory=list)   # [(from node path, from output name, input name)]
+    location: tuple = (0, 0)
+
+    @property
+    def nodedef(self):
+        return self.MxNode_cls.get_nodedef(self.data_type)
+
+    def get_output_name(self, out_name):
+        nd_outputs = self.nodedef.getOutputs()
+        return out_name if len(nd_outputs) > 1 and out_name else nd_outputs[0].getName()
+
+
 class MxNodeTree(bpy.types.ShaderNodeTree):
     """
     MaterialX NodeTree
@@ -108,16 +131,16 @@ class MxNodeTree(bpy.types.ShaderNodeTree):
             input = surfacematerial.addInput('surfaceshader', node.getType())
             input.setNodeName(node.getName())
 
-        def do_import():
-            self.nodes.clear()
+        def plan_import():
+            """Builds plan of nodes, values, links and locations without touching nodetree"""
+            plan = {}           # {node path: ImportNodePlan} in order of nodes creation
+            post_order = []     # plans in order of finishing, inputs are before consumers
 
-            def import_node(mx_node, mx_output_name=None, look_nodedef=True):
-                mx_nodegraph = mx_node.getParent()
+            def plan_node(mx_node, mx_output_name=None, look_nodedef=True):
                 node_path = mx_node.getNamePath()
-                file_prefix = mx_utils.get_file_prefix(mx_node, file_path)
-
-                if node_path in self.nodes:
-                    return self.nodes[node_path]
+                node_plan = plan.get(node_path)
+                if node_plan:
+                    return node_plan
 
                 try:
                     MxNode_cls, data_type = get_mx_node_cls(mx_node)
@@ -138,111 +161,129 @@ class MxNodeTree(bpy.types.ShaderNodeTree):
                     node_name = mx_output.getNodeName()
                     new_mx_node = new_mx_nodegraph.getNode(node_name)
 
-                    return import_node(new_mx_node, None, False)
+                    return plan_node(new_mx_node, None, False)
 
-                node = self.nodes.new(MxNode_cls.bl_idname)
-                node.name = node_path
-                node.data_type = data_type
-                nodedef = node.nodedef
+                node_plan = plan[node_path] = ImportNodePlan(
+                    node_path, MxNode_cls, data_type, mx_utils.get_file_prefix(mx_node, file_path))
+                nodedef = node_plan.nodedef
+                mx_nodegraph = mx_node.getParent()
 
                 for mx_input in mx_node.getInputs():
                     input_name = mx_input.getName()
                     nd_input = nodedef.getInput(input_name)
-                    if nd_input.getAttribute('uniform') == 'true':
-                        node.set_param_value(input_name,mx_utils.parse_value(
-                            node, mx_input.getValue(), mx_input.getType(), file_prefix))
+                    if not nd_input:
+                        log.error(f"Incorrect input name '{input_name}' for node {node_path}")
                         continue
 
-                    if input_name not in node.inputs:
-                        log.error(f"Incorrect input name '{input_name}' for node {node}")
+                    if nd_input.getAttribute('uniform') == 'true':
+                        node_plan.params.append((input_name, mx_input.getValue(), mx_input.getType()))
                         continue
 
                     val = mx_input.getValue()
                     if val is not None:
-                        node.set_input_value(
-                            input_name,
-                            mx_utils.parse_value(node, val, mx_input.getType(), file_prefix))
+                        node_plan.values.append((input_name, val, mx_input.getType()))
                         continue
 
                     node_name = mx_input.getNodeName()
-
                     if node_name:
                         new_mx_node = mx_nodegraph.getNode(node_name)
                         if not new_mx_node:
                             log.error(f"Couldn't find node '{node_name}' in nodegraph '{mx_nodegraph.getNamePath()}'")
                             continue
 
-                        new_node = import_node(new_mx_node)
-
+                        from_plan = plan_node(new_mx_node)
                         out_name = mx_input.getAttribute('output')
-                        if len(new_node.nodedef.getOutputs()) > 1 and out_name:
-                            new_node_output = new_node.outputs[out_name]
-                        else:
-                            new_node_output = new_node.outputs[0]
 
-                        self.links.new(new_node_output, node.inputs[input_name])
-                        continue
+                    else:
+                        new_nodegraph_name = mx_input.getAttribute('nodegraph')
+                        if not new_nodegraph_name:
+                            continue
 
-                    new_nodegraph_name = mx_input.getAttribute('nodegraph')
-                    if new_nodegraph_name:
                         mx_output_name = mx_input.getAttribute('output')
                         new_mx_nodegraph = mx_nodegraph.getNodeGraph(new_nodegraph_name)
                         mx_output = new_mx_nodegraph.getOutput(mx_output_name)
-                        node_name = mx_output.getNodeName()
-                        new_mx_node = new_mx_nodegraph.getNode(node_name)
-                        new_node = import_node(new_mx_node, mx_output_name)
-                        if not new_node:
-                            continue
-
+                        new_mx_node = new_mx_nodegraph.getNode(mx_output.getNodeName())
+                        from_plan = plan_node(new_mx_node, mx_output_name)
                         out_name = mx_output.getAttribute('output')
-                        if len(new_node.nodedef.getOutputs()) > 1 and out_name:
-                            new_node_output = new_node.outputs[out_name]
-                        else:
-                            new_node_output = new_node.outputs[0]
 
-                        self.links.new(new_node_output, node.inputs[input_name])
-                        continue
+                    if from_plan:
+                        node_plan.links.append(
+                            (from_plan.path, from_plan.get_output_name(out_name), input_name))
 
-                node.check_ui_folders()
-                return node
+                post_order.append(node_plan)
+                return node_plan
 
             mx_node = next(n for n in doc.getNodes() if n.getCategory() == 'surfacematerial')
-            output_node = import_node(mx_node, 0)
-
-            if not output_node:
-                return
-
-            # arranging nodes by layers
-            layer = {output_node}
-            layer_index = 0
-            layers = {}
-            while layer:
-                new_layer = set()
-                for node in layer:
-                    layers[node] = layer_index
-                    for inp in node.inputs:
-                        for link in inp.links:
-                            new_layer.add(link.from_node)
-                layer = new_layer
-                layer_index += 1
+            output_plan = plan_node(mx_node, 0)
+            if not output_plan:
+                return {}
+
+            # arranging nodes by layers, layer of node is the longest path to output node,
+            # reversed post order is topological order from output node to inputs
+            layers = {output_plan.path: 0}
+            for node_plan in reversed(post_order):
+                layer = layers.get(node_plan.path, 0)
+                for from_path, _, _ in node_plan.links:
+                    layers[from_path] = max(layers.get(from_path, 0), layer + 1)
 
             node_layers = [[] for _ in range(max(layers.values()) + 1)]
-            for node in self.nodes:
-                node_layers[layers[node]].append(node)
+            for node_plan in plan.values():
+                node_layers[layers.get(node_plan.path, 0)].append(node_plan)
 
             # placing nodes by layers
             loc_x = 0
-            for i, nodes in enumerate(node_layers):
+            for node_plans in node_layers:
                 loc_y = 0
-                for node in nodes:
-                    node.location = (loc_x, loc_y)
+                for node_plan in node_plans:
+                    node_plan.location = (loc_x, loc_y)
                     loc_y -= NODE_LAYER_SHIFT_Y
                     loc_x -= NODE_LAYER_SHIFT_X
 
                 loc_x -= NODE_LAYER_SEPARATION_WIDTH
 
+            return plan
+
+        def do_import(plan):
+            self.nodes.clear()
+
+            for node_plan in plan.values():
+                register_mx_node_cls(node_plan.MxNode_cls.bl_idname)
+
+            # creating all nodes, then all links in one pass
+            nodes = {}
+            for node_plan in plan.values():
+                node = self.nodes.new(node_plan.MxNode_cls.bl_idname)
+                node.name = node_plan.path
+                node.data_type = node_plan.data_type
+                node.location = node_plan.location
+
+                for input_name, val, mx_type in node_plan.params:
+                    node.set_param_value(input_name, mx_utils.parse_value(
+                        node, val, mx_type, node_plan.file_prefix))
+
+                for input_name, val, mx_type in node_plan.values:
+                    node.set_input_value(input_name, mx_utils.parse_value(
+                        node, val, mx_type, node_plan.file_prefix))
+
+                nodes[node_plan.path] = node
+
+            for node_plan in plan.values():
+                node = nodes[node_plan.path]
+                for from_path, out_name, input_name in node_plan.links:
+                    self.links.new(nodes[from_path].outputs[out_name], node.inputs[input_name])
+
+            for node in nodes.values():
+                node.check_ui_folders()
+
         prepare_for_import()
-        self.no_update_call(do_import)
+
+        start_time = time.perf_counter()
+        plan = plan_import()
+        plan_time = time.perf_counter() - start_time
+
+        self.no_update_call(do_import, plan)
+        log(f"Imported {len(plan)} nodes: plan {plan_time:.3f}s, "
+            f"nodes creation {time.perf_counter() - start_time - plan_time:.3f}s")
         self.update_()
 
     def create_basic_nodes(self, node_name='PBR_standard_surface'):
@@ -250,6 +291,9 @@ class MxNodeTree(bpy.types.ShaderNodeTree):
         def create_nodes():
             self.nodes.clear()
 
+            register_mx_node_cls('hdusd.MxNode_STD_surfacematerial')
+            register_mx_node_cls(f'hdusd.MxNode_{node_name}')
+
             mat_node = self.nodes.new('hdusd.MxNode_STD_surfacematerial')
             node = self.nodes.new(f'hdusd.MxNode_{node_name}')
             node.location = (mat_node.location[0] - NODE_LAYER_SEPARATION_WIDTH,
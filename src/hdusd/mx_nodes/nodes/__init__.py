@@ -13,66 +13,299 @@
 # limitations under the License.
 # ********************************************************************
 import importlib
+import json
+import time
+from dataclasses import dataclass
 from pathlib import Path
 
 import bpy
 import nodeitems_utils
 
+from ... import config
 from .. import log
 from . import base_node, categories
 
-gen_modules = [importlib.import_module(f"hdusd.mx_nodes.nodes.{f.name[:-len(f.suffix)]}")
-               for f in Path(__file__).parent.glob("gen_*.py")]
 
-mx_node_classes = []
-for mod in gen_modules:
-    mx_node_classes.extend(mod.mx_node_classes)
+# Compact manifest of generated MxNode classes, it is generated by tools/generate_mx_classes.py
+# together with gen_*.py modules. It allows to register node classes on demand.
+MANIFEST_FILE = Path(__file__).parent / "gen_manifest.json"
+
+
+@dataclass
+class MxNodeInfo:
+    """Description of generated MxNode class, which is available before class is loaded"""
+    module: str
+    class_name: str
+    bl_idname: str
+    bl_label: str
+    category: str
+    nodedefs: list = None   # manifest nodedefs, None if class is loaded without manifest
+
+    @property
+    def is_registered(self):
+        return self.bl_idname in _registered_classes
+
+    def load_class(self):
+        cls = _loaded_classes.get(self.bl_idname)
+        if cls is None:
+            mod = importlib.import_module(f"hdusd.mx_nodes.nodes.{self.module}")
+            cls = _loaded_classes[self.bl_idname] = getattr(mod, self.class_name)
+
+        return cls
+
+    def get_nodedefs(self):
+        """Yields (nodedef name, node string, data_type, output type, inputs) of the class"""
+        if self.nodedefs is not None:
+            for nd in self.nodedefs:
+                yield nd['name'], nd['node'], nd['data_type'], nd['output_type'], nd['inputs']
+            return
+
+        for nodedef, data_type in self.load_class().get_nodedefs():
+            nd_outputs = nodedef.getOutputs()
+            yield nodedef.getName(), nodedef.getNodeString(), data_type, \
+                'multioutput' if len(nd_outputs) > 1 else nd_outputs[0].getType(), \
+                [f"in_{p.getName()}:{p.getType()}" for p in nodedef.getInputs()]
+
+
+# {bl_idname: MxNode class}
+_loaded_classes = {}
+# {bl_idname: MxNode class} in order of registration
+_registered_classes = {}
+# bl_idnames of classes which are waiting for registration by timer
+_pending_idnames = set()
+
+
+def _load_manifest():
+    if not config.mx_nodes_lazy_registration or not MANIFEST_FILE.is_file():
+        return None
+
+    with open(MANIFEST_FILE) as f:
+        return [MxNodeInfo(e['module'], e['class'], e['bl_idname'], e['bl_label'], e['category'],
+                           e['nodedefs']) for e in json.load(f)]
+
+
+def _load_all_classes():
+    infos = []
+    for f in Path(__file__).parent.glob("gen_*.py"):
+        mod = importlib.import_module(f"hdusd.mx_nodes.nodes.{f.name[:-len(f.suffix)]}")
+        for cls in mod.mx_node_classes:
+            _loaded_classes[cls.bl_idname] = cls
+            infos.append(MxNodeInfo(mod.__name__.split('.')[-1], cls.__name__, cls.bl_idname,
+                                    cls.bl_label, cls.category))
+
+    return infos
+
+
+_manifest = _load_manifest()
+is_lazy = _manifest is not None
+
+mx_node_infos = _manifest if is_lazy else _load_all_classes()
 
 # sorting by category and label
-mx_node_classes = sorted(mx_node_classes, key=lambda cls: (cls.category.lower(), cls.bl_label.lower()))
+mx_node_infos = sorted(mx_node_infos, key=lambda info: (info.category.lower(), info.bl_label.lower()))
+_infos_by_idname = {info.bl_idname: info for info in mx_node_infos}
+
+
+def get_mx_node_info(bl_idname):
+    return _infos_by_idname.get(bl_idname)
+
+
+def register_mx_node_cls(bl_idname):
+    """Registers generated MxNode class if it isn't registered yet, returns the class"""
+    cls = _registered_classes.get(bl_idname)
+    if cls:
+        return cls
+
+    cls = _infos_by_idname[bl_idname].load_class()
+    bpy.utils.register_class(cls)
+    _registered_classes[bl_idname] = cls
+    _pending_idnames.discard(bl_idname)
+    return cls
+
+
+def register_mx_node_classes(infos):
+    for info in infos:
+        register_mx_node_cls(info.bl_idname)
+
+
+def register_mx_node_classes_deferred(infos):
+    """
+    Schedules registration of classes. It is used from UI drawing code,
+    where classes can't be registered directly.
+    """
+    infos = [info for info in infos
+             if not info.is_registered and info.bl_idname not in _pending_idnames]
+    if not infos:
+        return
+
+    def register_():
+        start_time = time.perf_counter()
+        register_mx_node_classes(info for info in infos if info.bl_idname in _pending_idnames)
+        log(f"Registered {len(infos)} MxNode classes in {time.perf_counter() - start_time:.3f}s")
+
+    _pending_idnames.update(info.bl_idname for info in infos)
+    bpy.app.timers.register(register_, first_interval=0.0)
+
+
+# custom property of MxNodeTree with bl_idnames of its nodes separated by ';'. It is stored on
+# file save and allows to register only classes which are used by nodetrees on file load.
+USED_IDNAMES_PROP = 'hdusd_mx_node_idnames'
+
+
+def _get_mx_node_trees():
+    return (node_tree for node_tree in bpy.data.node_groups
+            if node_tree.bl_idname == 'hdusd.MxNodeTree')
+
+
+def _has_undefined_nodes(node_tree):
+    return any(node.bl_idname == 'NodeUndefined' for node in node_tree.nodes)
+
+
+def store_used_mx_node_idnames():
+    """Stores bl_idnames of nodes in MxNodeTrees, it is called before blend file is saved"""
+    for node_tree in _get_mx_node_trees():
+        if node_tree.library:
+            continue
+
+        idnames = {node.bl_idname for node in node_tree.nodes}
+        if 'NodeUndefined' in idnames:
+            # types of undefined nodes are unknown, previously stored idnames are kept
+            stored = node_tree.get(USED_IDNAMES_PROP)
+            if stored is None:
+                continue
+
+            idnames.update(stored.split(';'))
+
+        node_tree[USED_IDNAMES_PROP] = ';'.join(sorted(idnames & _infos_by_idname.keys()))
+
+
+def register_used_mx_node_classes():
+    """
+    Registers classes needed by MxNodeTrees of current blend file. Blender doesn't keep idname
+    of nodes with unregistered type available in Python, so idnames stored on file save are used.
+    All classes are registered if nodetree was saved without them or nodes are still undefined.
+    """
+    if len(_registered_classes) == len(mx_node_infos):
+        return
+
+    start_time = time.perf_counter()
+
+    idnames = set()
+    for node_tree in _get_mx_node_trees():
+        if not _has_undefined_nodes(node_tree):
+            continue
+
+        stored = node_tree.get(USED_IDNAMES_PROP)
+        if stored is None:
+            idnames = None
+            break
+
+        idnames.update(idname for idname in stored.split(';') if idname in _infos_by_idname)
+
+    if idnames:
+        register_mx_node_classes(_infos_by_idname[idname] for idname in idnames)
+
+    if idnames is None or any(_has_undefined_nodes(node_tree) for node_tree in _get_mx_node_trees()):
+        register_mx_node_classes(mx_node_infos)
+        log(f"Registered all MxNode classes in {time.perf_counter() - start_time:.3f}s")
+
+    elif idnames:
+        log(f"Registered {len(idnames)} used MxNode classes "
+            f"in {time.perf_counter() - start_time:.3f}s")
 
 
 register_sockets, unregister_sockets = bpy.utils.register_classes_factory([
     base_node.MxNodeInputSocket,
     base_node.MxNodeOutputSocket,
 ])
-register_nodes, unregister_nodes = bpy.utils.register_classes_factory(mx_node_classes)
 
 
 def register():
+    start_time = time.perf_counter()
+
     register_sockets()
-    register_nodes()
+    if is_lazy:
+        # checking nodetrees which could exist if addon is enabled in opened blend file
+        bpy.app.timers.register(register_used_mx_node_classes, first_interval=0.0)
+    else:
+        register_mx_node_classes(mx_node_infos)
 
     nodeitems_utils.register_node_categories("'HdUSD_MX_NODES", categories.get_node_categories())
 
+    log(f"MxNode classes {'manifest loaded' if is_lazy else 'registered'} "
+        f"in {time.perf_counter() - start_time:.3f}s")
+
 
 def unregister():
     nodeitems_utils.unregister_node_categories("'HdUSD_MX_NODES")
 
-    unregister_nodes()
+    for cls in reversed(tuple(_registered_classes.values())):
+        bpy.utils.unregister_class(cls)
+    _registered_classes.clear()
+    _pending_idnames.clear()
+
     unregister_sockets()
 
+    _mx_node_cls_index.clear()
+    _mx_node_cls_by_nodedef.clear()
+    _mx_node_categories.clear()
+
+
+# {(node category, output type): [(MxNodeInfo, data_type, nodedef params set)]}
+_mx_node_cls_index = {}
+# {(node category, nodedef name, output type): (MxNodeInfo, data_type)}
+_mx_node_cls_by_nodedef = {}
+_mx_node_categories = set()
+
+
+def _params_set(node, out_type):
+    return {f"in_{p.getName()}:{p.getType()}" for p in node.getInputs()} | {out_type}
+
+
+def _build_mx_node_cls_index():
+    """Indexes nodedefs of all MxNode classes, it is done once on first lookup"""
+    start_time = time.perf_counter()
+
+    for info in mx_node_infos:
+        for nd_name, category, data_type, out_type, inputs in info.get_nodedefs():
+            _mx_node_categories.add(category)
+
+            _mx_node_cls_index.setdefault((category, out_type), []).append(
+                (info, data_type, {*inputs, out_type}))
+            _mx_node_cls_by_nodedef.setdefault((category, nd_name, out_type), (info, data_type))
+
+    log(f"MxNode classes index of {len(_mx_node_cls_by_nodedef)} nodedefs built "
+        f"in {time.perf_counter() - start_time:.3f}s")
+
 
 def get_mx_node_cls(mx_node):
-    node_name = mx_node.getCategory()
+    """
+    Returns MxNode class and data type suitable for mx_node. Class is loaded if needed,
+    but not registered, register_mx_node_cls() has to be used before creating a node.
+    """
+    if not _mx_node_cls_by_nodedef:
+        _build_mx_node_cls_index()
 
-    suffix = f'_{node_name}'
-    classes = tuple(cls for cls in mx_node_classes if cls.__name__.endswith(suffix))
-    if not classes:
-        raise KeyError(f"Unable to find MxNode class for {mx_node}")
+    category = mx_node.getCategory()
+    out_type = mx_node.getType()
 
-    def params_set(node, out_type):
-        return {f"in_{p.getName()}:{p.getType()}" for p in node.getInputs()} | \
-               {out_type}
+    nodedef_name = mx_node.getNodeDefString()
+    if nodedef_name:
+        res = _mx_node_cls_by_nodedef.get((category, nodedef_name, out_type))
+        if res:
+            info, data_type = res
+            return info.load_class(), data_type
 
-    node_params_set = params_set(mx_node, mx_node.getType())
+    candidates = _mx_node_cls_index.get((category, out_type))
+    if not candidates:
+        if category not in _mx_node_categories:
+            raise KeyError(f"Unable to find MxNode class for {mx_node}")
 
-    for cls in classes:
-        for nodedef, data_type in cls.get_nodedefs():
-            nd_outputs = nodedef.getOutputs()
-            nd_params_set = params_set(nodedef, 'multioutput' if len(nd_outputs) > 1 else
-                                       nd_outputs[0].getType())
-            if node_params_set.issubset(nd_params_set):
-                return cls, data_type
+        raise TypeError(f"Unable to find suitable nodedef for {mx_node}")
+
+    node_params_set = _params_set(mx_node, out_type)
+    for info, data_type, nd_params_set in candidates:
+        if node_params_set.issubset(nd_params_set):
+            return info.load_class(), data_type
 
     raise TypeError(f"Unable to find suitable nodedef for {mx_node}")
@@ -89,15 +89,14 @@ class MxNode(bpy.types.ShaderNode):
 
     @classmethod
     def get_nodedef(cls, data_type):
-        if not cls._data_types[data_type]['nd']:
-            # loading nodedefs
-            doc = mx.createDocument()
-            search_path = mx.FileSearchPath(str(mx_utils.MX_LIBS_DIR))
-            mx.readFromXmlFile(doc, str(LIBS_DIR / cls._file_path), searchPath=search_path)
-            for val in cls._data_types.values():
-                val['nd'] = doc.getNodeDef(val['nd_name'])
+        # nodedefs of all classes are resolved through shared cache of parsed library files
+        # and cached by class until libraries are reloaded
+        data = cls._data_types[data_type]
+        if data.get('nd_generation') != mx_utils.library_generation:
+            data['nd'] = mx_utils.get_library_nodedef(LIBS_DIR / cls._file_path, data['nd_name'])
+            data['nd_generation'] = mx_utils.library_generation
 
-        return cls._data_types[data_type]['nd']
+        return data['nd']
 
     @classmethod
     def get_nodedefs(cls):
@@ -124,7 +123,7 @@ class MxNode(bpy.types.ShaderNode):
 
     def update_prop(self, context):
         nodetree = self.id_data
-        nodetree.update_()
+        nodetree.update()
 
     def update_data_type(self, context):
         # updating names for inputs and outputs
@@ -413,7 +412,7 @@ class MxNode(bpy.types.ShaderNode):
                 self.inputs[i].hide = not getattr(self, self._folder_prop_name(f))
 
         nodetree = self.id_data
-        nodetree.update_()
+        nodetree.update()
 
     def check_ui_folders(self):
         if not self._ui_folders:
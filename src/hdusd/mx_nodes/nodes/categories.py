@@ -26,18 +26,29 @@ class MxNodeCategory(NodeCategory):
 
 
 def get_node_categories():
-    from . import mx_node_classes
+    from . import mx_node_infos, is_lazy, register_mx_node_classes_deferred
 
     d = defaultdict(list)
-    for MxNode_cls in mx_node_classes:
-        d[MxNode_cls.category].append(MxNode_cls)
+    for info in mx_node_infos:
+        d[info.category].append(info)
+
+    def category_items(infos):
+        items = [NodeItem(info.bl_idname, label=info.bl_label) for info in infos]
+        if not is_lazy:
+            return items
+
+        def get_items(context):
+            # classes are registered when category menu is opened
+            register_mx_node_classes_deferred(infos)
+            return items
+
+        return get_items
 
     categories = []
-    for category, category_classes in d.items():
+    for category, infos in d.items():
         categories.append(
             MxNodeCategory('HdUSD_MX_NG_' + code_str(category), title_str(category),
-                           items=[NodeItem(MxNode_cls.bl_idname)
-                                  for MxNode_cls in category_classes]))
+                           items=category_items(infos)))
 
     categories.append(
         MxNodeCategory('HdUSD_MX_NG_LAYOUT', 'Layout',
@@ -100,7 +100,6 @@ register, unregister = bpy.utils.register_classes_factory((
     GatlingRenderSettings,
 
     usd_list.PrimPropertyItem,
-    usd_list.UsdListItem,
     usd_list.UsdList,
 
     node.NodeProperties,
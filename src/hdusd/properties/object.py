@@ -28,6 +28,8 @@ class ObjectProperties(HdUSDProperties):
     bl_type = bpy.types.Object
 
     sdf_path: bpy.props.StringProperty(default="")
+    # object represents whole subtree of prim, which isn't mirrored by objects
+    is_proxy: bpy.props.BoolProperty(default=False)
     cached_stage: bpy.props.PointerProperty(type=CachedStageProp)
 
     def update_material(self, context):
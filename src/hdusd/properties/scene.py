@@ -150,6 +150,26 @@ class ViewportRenderSettings(RenderSettings):
         default="",
         update=nodetree_camera_update
     )
+    hierarchy_depth: bpy.props.IntProperty(
+        name="Hierarchy Depth",
+        description="Depth of USD hierarchy mirrored by objects of USD NodeTree collection, "
+                    "deeper prims are represented by proxy object of their subtree until it is expanded. "
+                    "0 - mirror whole hierarchy",
+        min=0, soft_max=10, default=0,
+        update=data_source_update
+    )
+    expanded_paths: bpy.props.StringProperty(
+        name="Expanded Paths",
+        description="Paths of explicitly expanded prims separated by ';'",
+        default="",
+        options={'HIDDEN'}
+    )
+
+    def get_expanded_paths(self):
+        return set(path for path in self.expanded_paths.split(';') if path)
+
+    def set_expanded_paths(self, paths):
+        self.expanded_paths = ';'.join(sorted(paths))
 
 
 class SceneProperties(HdUSDProperties):
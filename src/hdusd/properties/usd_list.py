@@ -56,22 +56,56 @@ class PrimPropertyItem(PropertyGroup):
         self.name = name
 
 
-class UsdListItem(PropertyGroup):
-    sdf_path: StringProperty(name='USD Path', default="")
+class UsdList(PropertyGroup):
+    """
+    State of USD list browser of node. Tree view and search results are drawn as windows
+    of prims index rows, so items of prims aren't stored in properties.
+    """
+    def search_update(self, context):
+        self.search_offset = 0
+
+    selected_path: StringProperty(name="Selected Path", default="")
+    # paths of expanded prims separated by '\n'
+    expanded_paths: StringProperty(name="Expanded Paths", default="")
+    tree_offset: IntProperty(name="Offset", default=0, min=0)
+
+    search_text: StringProperty(
+        name="Search",
+        description="Search prims by name, or by path if text contains '/'",
+        default="",
+        options={'TEXTEDIT_UPDATE'},
+        update=search_update
+    )
+    search_type: StringProperty(
+        name="Type",
+        description="Search prims by type name or kind",
+        default="",
+        options={'TEXTEDIT_UPDATE'},
+        update=search_update
+    )
+    search_offset: IntProperty(name="Offset", default=0, min=0)
+
+    prim_properties: CollectionProperty(type=PrimPropertyItem)
+    cached_stage: PointerProperty(type=CachedStageProp)
 
     @property
-    def indent(self):
-        return self.sdf_path.count('/') - 1
+    def is_search(self):
+        return bool(self.search_text or self.search_type)
 
+    @property
+    def expanded(self):
+        return frozenset(self.expanded_paths.split('\n')) - {""}
 
-class UsdList(PropertyGroup):
-    def item_index_update(self, context):
+    def toggle_expanded(self, sdf_path):
+        self.expanded_paths = '\n'.join(sorted(self.expanded ^ {sdf_path}))
+
+    def select_path(self, sdf_path):
+        self.selected_path = sdf_path
         self.prim_properties.clear()
-        if self.item_index == -1:
-            return
 
-        item = self.items[self.item_index]
-        prim = self.get_prim(item)
+        prim = self.selected_prim
+        if not prim:
+            return
 
         def add_prop(name, value):
             prop = self.prim_properties.add()
@@ -81,27 +115,18 @@ class UsdList(PropertyGroup):
         add_prop("Path", str(prim.GetPath()))
         add_prop("Type", str(prim.GetTypeName()))
 
-    items: CollectionProperty(type=UsdListItem)
-    item_index: IntProperty(name="USD Item", default=-1, update=item_index_update)
-
-    prim_properties: CollectionProperty(type=PrimPropertyItem)
-    cached_stage: PointerProperty(type=CachedStageProp)
-
-    def update_items(self):
-        self.items.clear()
-        self.item_index = -1
+    def update_view(self):
+        """Is called when output stage is changed, selection is kept if selected prim still exists"""
+        self.select_path(self.selected_path if self.selected_prim else "")
 
+    def get_prim(self, sdf_path):
         stage = self.cached_stage()
-        if stage:
-            for prim in stage.GetPseudoRoot().GetChildren():
-                item = self.items.add()
-                item.sdf_path = str(prim.GetPath())
-
-    def get_prim(self, item):
-        stage = self.cached_stage()
-        return stage.GetPrimAtPath(item.sdf_path) if stage else None
+        return stage.GetPrimAtPath(sdf_path) if stage else None
 
     @property
     def selected_prim(self):
-        item = self.items[self.item_index]
-        return self.get_prim(item)
+        stage = self.cached_stage()
+        if not stage or not self.selected_path:
+            return None
+
+        return stage.GetPrimAtPath(self.selected_path)
@@ -124,11 +124,16 @@ register_classes, unregister_classes = bpy.utils.register_classes_factory([
     usd_list.HDUSD_OP_usd_list_item_show_hide,
     usd_list.HDUSD_OP_usd_tree_node_print_stage,
     usd_list.HDUSD_OP_usd_tree_node_print_root_layer,
-    usd_list.HDUSD_UL_usd_list_item,
+    usd_list.HDUSD_OP_usd_list_item_select,
+    usd_list.HDUSD_OP_usd_list_scroll,
     usd_list.HDUSD_NODE_PT_usd_list,
     usd_list.HDUSD_OP_usd_nodetree_add_basic_nodes,
     usd_list.HDUSD_NODE_PT_usd_nodetree_tools,
     usd_list.HDUSD_NODE_PT_usd_nodetree_dev,
+    usd_list.HDUSD_NODE_OP_usd_nodetree_profiling,
+    usd_list.HDUSD_NODE_OP_usd_nodetree_profiling_clear,
+    usd_list.HDUSD_NODE_OP_usd_nodetree_profiling_export,
+    usd_list.HDUSD_NODE_PT_usd_nodetree_profiler,
     usd_list.HDUSD_NODE_OP_export_usd_file,
     usd_list.HDUSD_NODE_MT_material_select,
     usd_list.HDUSD_NODE_OP_material_select,
@@ -142,6 +147,8 @@ register_classes, unregister_classes = bpy.utils.register_classes_factory([
 
     object.HDUSD_OBJECT_PT_usd_settings,
     object.HDUSD_OP_usd_object_show_hide,
+    object.HDUSD_OP_usd_object_expand,
+    object.HDUSD_OP_usd_object_collapse,
 ])
 
 
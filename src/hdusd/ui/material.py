@@ -21,6 +21,7 @@ from bpy_extras.io_utils import ExportHelper
 from pathlib import Path
 from . import HdUSD_Panel, HdUSD_ChildPanel, HdUSD_Operator
 from ..mx_nodes.node_tree import MxNodeTree, NODE_LAYER_SEPARATION_WIDTH
+from ..mx_nodes.nodes import register_mx_node_cls
 from ..mx_nodes.nodes.base_node import is_mx_node_valid
 from ..utils import pass_node_reroute, title_str, BLENDER_VERSION
 from ..utils import mx as mx_utils
@@ -260,6 +261,7 @@ class HDUSD_MATERIAL_OP_link_mx_node(bpy.types.Operator):
             else:
                 return {"FINISHED"}
 
+        register_mx_node_cls(self.new_node_name)
         new_node = node_tree.nodes.new(self.new_node_name)
         new_node.location = (current_node.location[0] - NODE_LAYER_SEPARATION_WIDTH,
                             current_node.location[1])
@@ -283,7 +285,7 @@ class HDUSD_MATERIAL_OP_invoke_popup_input_nodes(bpy.types.Operator):
         return context.window_manager.invoke_popup(self, width=600)
 
     def draw(self, context):
-        from ..mx_nodes.nodes import mx_node_classes
+        from ..mx_nodes.nodes import mx_node_infos
 
         MAX_COLUMN_ITEMS = 34
 
@@ -291,8 +293,8 @@ class HDUSD_MATERIAL_OP_invoke_popup_input_nodes(bpy.types.Operator):
         cat = ""
         i = 0
         col = None
-        for cls in mx_node_classes:
-            if cls.category in ("PBR", "material"):
+        for info in mx_node_infos:
+            if info.category in ("PBR", "material"):
                 continue
 
             if not col or i >= MAX_COLUMN_ITEMS:
@@ -300,15 +302,15 @@ class HDUSD_MATERIAL_OP_invoke_popup_input_nodes(bpy.types.Operator):
                 col = split.column()
                 col.emboss = 'PULLDOWN_MENU'
 
-            if cat != cls.category:
-                cat = cls.category
+            if cat != info.category:
+                cat = info.category
                 col.label(text=title_str(cat), icon='NODE')
                 i += 1
 
             row = col.row()
             row.alignment = 'LEFT'
-            op = row.operator(HDUSD_MATERIAL_OP_link_mx_node.bl_idname, text=cls.bl_label)
-            op.new_node_name = cls.bl_idname
+            op = row.operator(HDUSD_MATERIAL_OP_link_mx_node.bl_idname, text=info.bl_label)
+            op.new_node_name = info.bl_idname
             op.input_num = self.input_num
             op.current_node_name = self.current_node_name
             i += 1
@@ -348,7 +350,7 @@ class HDUSD_MATERIAL_OP_invoke_popup_shader_nodes(bpy.types.Operator):
         return context.window_manager.invoke_popup(self, width=300)
 
     def draw(self, context):
-        from ..mx_nodes.nodes import mx_node_classes
+        from ..mx_nodes.nodes import mx_node_infos
 
         split = self.layout.split()
         col = split.column()
@@ -356,14 +358,14 @@ class HDUSD_MATERIAL_OP_invoke_popup_shader_nodes(bpy.types.Operator):
         col.label(text="PBR", icon='NODE')
 
         output_node = context.material.hdusd.mx_node_tree.output_node
-        for cls in mx_node_classes:
-            if cls.category != "PBR":
+        for info in mx_node_infos:
+            if info.category != "PBR":
                 continue
 
             row = col.row()
             row.alignment = 'LEFT'
-            op = row.operator(HDUSD_MATERIAL_OP_link_mx_node.bl_idname, text=cls.bl_label)
-            op.new_node_name = cls.bl_idname
+            op = row.operator(HDUSD_MATERIAL_OP_link_mx_node.bl_idname, text=info.bl_label)
+            op.new_node_name = info.bl_idname
             op.input_num = self.input_num
             op.current_node_name = output_node.name
 
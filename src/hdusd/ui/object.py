@@ -18,6 +18,7 @@ from pxr import UsdGeom
 
 from . import HdUSD_Panel
 from ..properties.object import GEOM_TYPES
+from ..viewport import usd_collection
 from .. import config
 
 
@@ -38,6 +39,26 @@ class HDUSD_OP_usd_object_show_hide(bpy.types.Operator):
         return {'FINISHED'}
 
 
+class HDUSD_OP_usd_object_expand(bpy.types.Operator):
+    """Create objects for children of USD prim"""
+    bl_idname = "hdusd.usd_object_expand"
+    bl_label = "Expand"
+
+    def execute(self, context):
+        usd_collection.expand(context, context.object.hdusd.sdf_path)
+        return {'FINISHED'}
+
+
+class HDUSD_OP_usd_object_collapse(bpy.types.Operator):
+    """Remove objects of USD prim subtree, prim object becomes its proxy"""
+    bl_idname = "hdusd.usd_object_collapse"
+    bl_label = "Collapse"
+
+    def execute(self, context):
+        usd_collection.collapse(context, context.object.hdusd.sdf_path)
+        return {'FINISHED'}
+
+
 class HDUSD_OBJECT_PT_usd_settings(HdUSD_Panel):
     bl_label = "USD Settings"
     bl_context = 'object'
@@ -70,6 +91,14 @@ class HDUSD_OBJECT_PT_usd_settings(HdUSD_Panel):
         col1.label(text="Type")
         col2.label(text=prim.GetTypeName())
 
+        if obj.hdusd.is_proxy:
+            col1.label(text="Hierarchy")
+            col2.operator(HDUSD_OP_usd_object_expand.bl_idname, icon='DISCLOSURE_TRI_RIGHT')
+
+        elif obj.hdusd.sdf_path in context.scene.hdusd.viewport.get_expanded_paths():
+            col1.label(text="Hierarchy")
+            col2.operator(HDUSD_OP_usd_object_collapse.bl_idname, icon='DISCLOSURE_TRI_DOWN')
+
         if prim.GetTypeName() in GEOM_TYPES:
             visible = UsdGeom.Imageable(prim).ComputeVisibility() != 'invisible'
             icon = 'HIDE_OFF' if visible else 'HIDE_ON'
@@ -169,6 +169,9 @@ class RenderSettingsPanel(HdUSD_Panel):
                      text=settings.nodetree_camera if settings.nodetree_camera else '',
                      icon='CAMERA_DATA')
 
+            if self.engine_type == 'VIEWPORT':
+                layout.prop(settings, 'hierarchy_depth')
+
 
 class HDUSD_RENDER_PT_render_settings_final(RenderSettingsPanel):
     """Final render delegate and settings"""
@@ -24,6 +24,7 @@ from bpy_extras.io_utils import ExportHelper
 
 from . import HdUSD_Panel, HdUSD_ChildPanel, HdUSD_Operator
 from ..usd_nodes.nodes.base_node import USDNode
+from ..usd_nodes import profiler
 from ..mx_nodes.node_tree import MxNodeTree
 from ..engine.viewport_engine import ViewportEngineNodetree
 
@@ -31,6 +32,7 @@ from .. import config
 from ..utils import get_temp_file, temp_pid_dir
 from ..utils import mx as mx_utils
 from ..utils import usd as usd_utils
+from ..utils import prim_index
 from ..export import material
 
 
@@ -43,45 +45,13 @@ class HDUSD_OP_usd_list_item_expand(bpy.types.Operator):
     bl_idname = "hdusd.usd_list_item_expand"
     bl_label = "Expand"
 
-    index: bpy.props.IntProperty(default=-1)
+    sdf_path: bpy.props.StringProperty(default="")
 
     def execute(self, context):
-        if self.index == -1:
+        if not self.sdf_path:
             return {'CANCELLED'}
 
-        node = context.active_node
-        usd_list = node.hdusd.usd_list
-        items = usd_list.items
-        item = items[self.index]
-
-        if len(items) > self.index + 1 and items[self.index + 1].indent > item.indent:
-            next_index = self.index + 1
-            item_indent = item.indent
-            removed_items = 0
-            while True:
-                if next_index >= len(items):
-                    break
-                if items[next_index].indent <= item_indent:
-                    break
-                items.remove(next_index)
-                removed_items += 1
-
-            if usd_list.item_index > self.index:
-                usd_list.item_index = max(self.index, usd_list.item_index - removed_items)
-
-        else:
-            prim = usd_list.get_prim(item)
-
-            added_items = 0
-            for child_index, child_prim in enumerate(prim.GetChildren(), self.index + 1):
-                child_item = items.add()
-                child_item.sdf_path = str(child_prim.GetPath())
-                items.move(len(items) - 1, child_index)
-                added_items += 1
-
-            if usd_list.item_index > self.index:
-                usd_list.item_index += added_items
-
+        context.active_node.hdusd.usd_list.toggle_expanded(self.sdf_path)
         return {'FINISHED'}
 
 
@@ -90,18 +60,13 @@ class HDUSD_OP_usd_list_item_show_hide(bpy.types.Operator):
     bl_idname = "hdusd.usd_list_item_show_hide"
     bl_label = "Show/Hide"
 
-    index: bpy.props.IntProperty(default=-1)
+    sdf_path: bpy.props.StringProperty(default="")
 
     def execute(self, context):
-        if self.index == -1:
+        prim = context.active_node.hdusd.usd_list.get_prim(self.sdf_path)
+        if not prim:
             return {'CANCELLED'}
 
-        node = context.active_node
-        usd_list = node.hdusd.usd_list
-        items = usd_list.items
-        item = items[self.index]
-
-        prim = usd_list.get_prim(item)
         im = UsdGeom.Imageable(prim)
         if im.ComputeVisibility() == 'invisible':
             im.MakeVisible()
@@ -111,54 +76,123 @@ class HDUSD_OP_usd_list_item_show_hide(bpy.types.Operator):
         return {'FINISHED'}
 
 
-class HDUSD_UL_usd_list_item(bpy.types.UIList):
-    def draw_item(self, context, layout, data, item, icon, active_data, active_propname, index):
-        if self.layout_type not in {'DEFAULT', 'COMPACT'}:
-            return
+class HDUSD_OP_usd_list_item_select(bpy.types.Operator):
+    """Select USD item"""
+    bl_idname = "hdusd.usd_list_item_select"
+    bl_label = "Select"
+
+    sdf_path: bpy.props.StringProperty(default="")
+
+    def execute(self, context):
+        context.active_node.hdusd.usd_list.select_path(self.sdf_path)
+        return {'FINISHED'}
+
+
+class HDUSD_OP_usd_list_scroll(bpy.types.Operator):
+    """Scroll USD items"""
+    bl_idname = "hdusd.usd_list_scroll"
+    bl_label = "Scroll"
+
+    delta: bpy.props.IntProperty(default=0)
+    is_search: bpy.props.BoolProperty(default=False)
+
+    def execute(self, context):
+        usd_list = context.active_node.hdusd.usd_list
+        prop = 'search_offset' if self.is_search else 'tree_offset'
+        setattr(usd_list, prop, max(0, getattr(usd_list, prop) + self.delta))
+        return {'FINISHED'}
+
+
+# number of USD items shown in USD list browser at once
+LIST_ROWS = 15
+
+
+def draw_scroll(layout, offset, window_size, rows_count, is_search, text=""):
+    row = layout.row(align=True)
+    op = row.operator(HDUSD_OP_usd_list_scroll.bl_idname, text="", icon='TRIA_UP')
+    op.delta = -LIST_ROWS
+    op.is_search = is_search
+    op = row.operator(HDUSD_OP_usd_list_scroll.bl_idname, text="", icon='TRIA_DOWN')
+    op.delta = LIST_ROWS
+    op.is_search = is_search
+
+    row.label(text=f"{offset + 1 if window_size else 0}-{offset + window_size} of {rows_count}{text}")
 
-        for i in range(item.indent):
-            layout.split(factor=0.1)
 
-        items = data.items
-        prim = data.get_prim(item)
+def draw_search_results(layout, usd_list, index, rows):
+    """Draws only visible window of found prims"""
+    offset = min(usd_list.search_offset, max(0, len(rows) - LIST_ROWS))
+    window = rows[offset:offset + LIST_ROWS]
+
+    box = layout.box()
+    col = box.column(align=True)
+    for row in window:
+        path = index.paths[row]
+        split = col.row().split(factor=0.7)
+        op = split.operator(HDUSD_OP_usd_list_item_select.bl_idname, text=path,
+                            emboss=False, depress=path == usd_list.selected_path)
+        op.sdf_path = path
+        split.label(text=index.type_name(row) or index.kind(row))
+
+    limit_str = "+" if len(rows) >= config.usd_list_search_limit else ""
+    draw_scroll(layout, offset, len(window), len(rows), True,
+                f"{limit_str} found, {len(index)} prims")
+
+
+def draw_tree(layout, usd_list, stage, index):
+    """Draws only visible window of rows of tree view"""
+    expanded = usd_list.expanded
+    rows = index.get_visible_rows(expanded)
+    offset = min(usd_list.tree_offset, max(0, len(rows) - LIST_ROWS))
+    window = rows[offset:offset + LIST_ROWS]
+
+    box = layout.box()
+    col = box.column(align=True)
+    for row in window:
+        path = index.paths[row]
+        prim = stage.GetPrimAtPath(path)
         if not prim:
-            return
+            continue
 
         visible = UsdGeom.Imageable(prim).ComputeVisibility() != 'invisible'
 
-        col = layout.column()
-        if not prim.GetChildren():
+        layout_row = col.row(align=True)
+        for _ in range(index.depth(row) - 1):
+            layout_row.label(text="", icon='BLANK1')
+
+        sub = layout_row.row()
+        if not index.has_children(row):
             icon = 'DOT'
-            col.enabled = False
-        elif len(items) > index + 1 and items[index + 1].indent > item.indent:
+            sub.enabled = False
+        elif path in expanded:
             icon = 'TRIA_DOWN'
         else:
             icon = 'TRIA_RIGHT'
 
-        expand_op = col.operator(HDUSD_OP_usd_list_item_expand.bl_idname, text="", icon=icon,
-                                 emboss=False, depress=False)
-        expand_op.index = index
+        sub.operator(HDUSD_OP_usd_list_item_expand.bl_idname, text="", icon=icon,
+                     emboss=False, depress=False).sdf_path = path
 
-        col = layout.column()
-        col.label(text=prim.GetName())
-        col.enabled = visible
+        sub = layout_row.row()
+        sub.operator(HDUSD_OP_usd_list_item_select.bl_idname, text=prim.GetName(),
+                     emboss=False, depress=path == usd_list.selected_path).sdf_path = path
+        sub.enabled = visible
 
-        col = layout.column()
-        col.alignment = 'RIGHT'
-        col.label(text=prim.GetTypeName())
-        col.enabled = visible
+        sub = layout_row.row()
+        sub.alignment = 'RIGHT'
+        sub.label(text=prim.GetTypeName())
+        sub.enabled = visible
 
-        col = layout.column()
-        col.alignment = 'RIGHT'
+        sub = layout_row.row()
         if prim.GetTypeName() == 'Xform':
             icon = 'HIDE_OFF' if visible else 'HIDE_ON'
         else:
-            col.enabled = False
+            sub.enabled = False
             icon = 'NONE'
 
-        visible_op = col.operator(HDUSD_OP_usd_list_item_show_hide.bl_idname, text="", icon=icon,
-                                  emboss=False, depress=False)
-        visible_op.index = index
+        sub.operator(HDUSD_OP_usd_list_item_show_hide.bl_idname, text="", icon=icon,
+                     emboss=False, depress=False).sdf_path = path
+
+    draw_scroll(layout, offset, len(window), len(rows), False, f", {len(index)} prims")
 
 
 class HDUSD_NODE_PT_usd_list(HdUSD_Panel):
@@ -176,14 +210,27 @@ class HDUSD_NODE_PT_usd_list(HdUSD_Panel):
         usd_list = context.active_node.hdusd.usd_list
         layout = self.layout
 
-        layout.template_list(
-            "HDUSD_UL_usd_list_item", "",
-            usd_list, "items",
-            usd_list, "item_index",
-            sort_lock=True
-        )
-
-        if usd_list.item_index < 0:
+        row = layout.row(align=True)
+        row.prop(usd_list, 'search_text', text="", icon='VIEWZOOM')
+        row.prop(usd_list, 'search_type', text="", icon='FILTER')
+
+        stage = usd_list.cached_stage()
+        if stage:
+            # index of big stage is built by timer, panel is redrawn when it's ready
+            if usd_list.is_search:
+                index, rows = prim_index.search(stage, usd_list.search_text, usd_list.search_type)
+            else:
+                index = prim_index.get_index(stage)
+
+            if not index:
+                layout.label(text=f"Building index: {prim_index.get_build_progress()} prims",
+                             icon='SORTTIME')
+            elif usd_list.is_search:
+                draw_search_results(layout, usd_list, index, rows)
+            else:
+                draw_tree(layout, usd_list, stage, index)
+
+        if not usd_list.selected_path:
             return
 
         prop_layout = layout.column()
@@ -202,7 +249,7 @@ class HDUSD_NODE_PT_usd_list(HdUSD_Panel):
             return
 
         prim = usd_list.selected_prim
-        if prim.GetTypeName() == 'Mesh':
+        if prim and prim.GetTypeName() == 'Mesh':
             bindings = UsdShade.MaterialBindingAPI(prim)
             bind_paths = bindings.GetDirectBindingRel().GetTargets()
             bind_path = str(bind_paths[0]) if bind_paths else ""
@@ -708,3 +755,83 @@ class HDUSD_NODE_PT_usd_nodetree_dev(HdUSD_ChildPanel):
 
         layout.operator(HDUSD_OP_usd_tree_node_print_stage.bl_idname)
         layout.operator(HDUSD_OP_usd_tree_node_print_root_layer.bl_idname)
+
+
+class HDUSD_NODE_OP_usd_nodetree_profiling(HdUSD_Operator):
+    """Enable/disable per-node profiling of USD nodetrees"""
+    bl_idname = "hdusd.usd_nodetree_profiling"
+    bl_label = "Profiling"
+
+    is_enabled: bpy.props.BoolProperty(default=True)
+
+    def execute(self, context):
+        profiler.enable(self.is_enabled)
+        if self.is_enabled:
+            # recomputing nodetree to get stats of all nodes
+            context.space_data.edit_tree.reset()
+
+        return {'FINISHED'}
+
+
+class HDUSD_NODE_OP_usd_nodetree_profiling_clear(HdUSD_Operator):
+    """Clear profiling results of current USD nodetree"""
+    bl_idname = "hdusd.usd_nodetree_profiling_clear"
+    bl_label = "Clear"
+
+    def execute(self, context):
+        profiler.clear(context.space_data.edit_tree.name)
+        return {'FINISHED'}
+
+
+class HDUSD_NODE_OP_usd_nodetree_profiling_export(HdUSD_Operator, ExportHelper):
+    """Export profiling results of current USD nodetree to .json file"""
+    bl_idname = "hdusd.usd_nodetree_profiling_export"
+    bl_label = "Export JSON"
+
+    filename_ext = ".json"
+    filter_glob: bpy.props.StringProperty(default="*.json", options={'HIDDEN'}, )
+
+    def execute(self, context):
+        profiler.export_json(self.filepath, context.space_data.edit_tree.name)
+        return {'FINISHED'}
+
+
+class HDUSD_NODE_PT_usd_nodetree_profiler(HdUSD_ChildPanel):
+    bl_label = "Profiler"
+    bl_parent_id = 'HDUSD_NODE_PT_usd_nodetree_tools'
+    bl_space_type = "NODE_EDITOR"
+    bl_region_type = "UI"
+    bl_options = {'DEFAULT_CLOSED'}
+
+    def draw_header(self, context):
+        self.layout.operator(HDUSD_NODE_OP_usd_nodetree_profiling.bl_idname, text="", emboss=False,
+                             icon='CHECKBOX_HLT' if profiler.is_enabled else 'CHECKBOX_DEHLT'
+                             ).is_enabled = not profiler.is_enabled
+
+    def draw(self, context):
+        layout = self.layout
+        tree = context.space_data.edit_tree
+
+        row = layout.row(align=True)
+        row.operator(HDUSD_NODE_OP_usd_nodetree_profiling_clear.bl_idname, icon='X')
+        row.operator(HDUSD_NODE_OP_usd_nodetree_profiling_export.bl_idname, icon='EXPORT')
+
+        stats = profiler.tree_stats(tree.name)
+        if not stats:
+            layout.label(text="No results" if profiler.is_enabled else "Profiling is disabled")
+            return
+
+        col = layout.column(align=True)
+        row = col.row()
+        for text in ("Node", "Time, ms", "Calls", "Prims", "Layers", "Size, KB"):
+            row.label(text=text)
+
+        for s in stats:
+            row = col.row()
+            row.alert = tree.nodes.active is not None and tree.nodes.active.name == s.node
+            row.label(text=s.node)
+            row.label(text=f"{s.time * 1000:.1f}")
+            row.label(text=f"{s.calls}+{s.memo_hits}" if s.memo_hits else str(s.calls))
+            row.label(text=str(s.prims))
+            row.label(text=str(s.layers))
+            row.label(text=f"{s.layer_size / 1024:.1f}")
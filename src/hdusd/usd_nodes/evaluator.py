@@ -0,0 +1,98 @@
+# **********************************************************************
+# Copyright 2020 Advanced Micro Devices, Inc
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+# ********************************************************************
+"""
+Parallel evaluation of independent branches of USD nodetree.
+
+Node compute() functions read Blender data and have to be called from main thread,
+but heavy part of some nodes (opening and flattening of USD files, layers I/O) doesn't touch bpy
+and releases GIL. Such nodes provide prefetch task via USDNode.get_prefetch_task(), these tasks
+are run in thread pool before serial evaluation of nodetree, their results are picked up
+by corresponded nodes in compute() via pop_prefetched().
+"""
+import os
+import time
+from concurrent import futures
+
+from .. import config
+from . import log
+
+
+_prefetched = {}
+
+
+def _node_key(node):
+    return node.id_data.name, node.name
+
+
+def pop_prefetched(node):
+    """Returns result of prefetch task of the node or None if it wasn't prefetched"""
+    return _prefetched.pop(_node_key(node), None)
+
+
+def clear():
+    _prefetched.clear()
+
+
+def prefetch(nodes):
+    """Runs prefetch tasks of nodes in thread pool, returns number of completed tasks"""
+    tasks = {}
+    for node in nodes:
+        if node.cached_stage():
+            continue
+
+        task = node.get_prefetch_task()
+        if task:
+            tasks[_node_key(node)] = task
+
+    if not tasks:
+        return 0
+
+    max_workers = config.usd_nodes_threads or os.cpu_count()
+    with futures.ThreadPoolExecutor(max_workers=max_workers) as executor:
+        future_keys = {executor.submit(task): key for key, task in tasks.items()}
+        for future in futures.as_completed(future_keys):
+            key = future_keys[future]
+            try:
+                _prefetched[key] = future.result()
+            except Exception as e:
+                # node will do its usual compute in main thread
+                log.warn("Prefetch failed", key, e)
+
+    return len(tasks)
+
+
+class EvaluationStats:
+    """Context manager which reports wall-clock time and CPU utilisation of nodetree evaluation"""
+
+    def __init__(self, nodetree):
+        self.nodetree = nodetree
+        self.prefetched = 0
+
+    def __enter__(self):
+        self.wall_time = time.perf_counter()
+        self.cpu_time = time.process_time()
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        wall_time = time.perf_counter() - self.wall_time
+        cpu_time = time.process_time() - self.cpu_time
+        utilisation = cpu_time / (wall_time * os.cpu_count()) * 100 if wall_time > 0.0 else 0.0
+
+        log.info(f"Evaluated {self.nodetree.name}: wall {wall_time:.3f}s, cpu {cpu_time:.3f}s, "
+                 f"utilisation {utilisation:.0f}% of {os.cpu_count()} cores, "
+                 f"prefetched {self.prefetched} nodes")
+
+        # results which weren't picked up by nodes are not needed anymore
+        clear()
@@ -17,6 +17,8 @@ import bpy
 from .nodes.hydra_render import HydraRenderNode
 from .nodes.print_file import PrintFileNode
 from .nodes.write_file import WriteFileNode
+from .nodes.freeze import get_frozen_upstream_nodes
+from . import evaluator
 from ..viewport import usd_collection
 from ..engine.viewport_engine import ViewportEngineNodetree
 
@@ -66,8 +68,15 @@ class USDTree(bpy.types.ShaderNodeTree):
             for node in nodes:
                 node.free()
 
-            for node in nodes:
-                node.final_compute()
+            # nodes which are used only by frozen Freeze nodes aren't evaluated
+            frozen_nodes = get_frozen_upstream_nodes(self)
+            nodes = tuple(node for node in nodes if node.as_pointer() not in frozen_nodes)
+
+            with evaluator.EvaluationStats(self) as stats:
+                stats.prefetched = evaluator.prefetch(nodes)
+
+                for node in nodes:
+                    node.final_compute()
 
         finally:
             self._is_resetting = False
@@ -82,29 +91,33 @@ class USDTree(bpy.types.ShaderNodeTree):
     def reset(self):
         self._reset_nodes(self.nodes, True)
 
+    def _get_evaluated_nodes(self):
+        """Returns nodes of the tree except nodes which are used only by frozen Freeze nodes"""
+        frozen_nodes = get_frozen_upstream_nodes(self)
+        return tuple(node for node in self.nodes
+                     if not isinstance(node, (bpy.types.NodeReroute, bpy.types.NodeFrame)) and
+                     node.as_pointer() not in frozen_nodes)
+
     def depsgraph_update(self, depsgraph):
         if self._is_resetting:
             return
 
-        for node in self.nodes:
-            if not isinstance(node, (bpy.types.NodeReroute, bpy.types.NodeFrame)):
-                node.depsgraph_update(depsgraph)
+        for node in self._get_evaluated_nodes():
+            node.depsgraph_update(depsgraph)
 
     def frame_change(self, depsgraph):
         if self._is_resetting:
             return
 
-        for node in self.nodes:
-            if not isinstance(node, (bpy.types.NodeReroute, bpy.types.NodeFrame)):
-                node.frame_change(depsgraph)
+        for node in self._get_evaluated_nodes():
+            node.frame_change(depsgraph)
 
     def material_update(self, depsgraph):
         if self._is_resetting:
             return
 
-        for node in self.nodes:
-            if not isinstance(node, (bpy.types.NodeReroute, bpy.types.NodeFrame)):
-                node.material_update(depsgraph)
+        for node in self._get_evaluated_nodes():
+            node.material_update(depsgraph)
 
     def no_update_call(self, op, *args, **kwargs):
         """This function prevents call of self.update() during calling our function"""
@@ -137,6 +150,14 @@ class USDTree(bpy.types.ShaderNodeTree):
         self.no_update_call(create_nodes)
         self.reset()
 
+    def output_stage_changed(self):
+        """Notifies that stages were changed in place without recompute of output node"""
+        context = bpy.context
+        if context.scene.hdusd.viewport.data_source == self.name:
+            usd_collection.update(context)
+
+        ViewportEngineNodetree.tag_redraw()
+
     def output_node_computed(self):
         context = bpy.context
         if context.scene.hdusd.viewport.data_source == self.name:
@@ -20,7 +20,7 @@ from .. import log
 # classes to register
 from . import (
     usd_file, blender_data, write_file, merge, print_file, filter, root, instancing, usd_to_blender,
-    hydra_render, rpr_render_settings, transformations
+    hydra_render, rpr_render_settings, transformations, freeze, switch
 )
 
 
@@ -38,14 +38,17 @@ node_categories = [
     USDNodeCategory('HdUSD_USD_OUTPUT', 'Output', items=[
         NodeItem('usd.HydraRenderNode'),
         NodeItem('usd.WriteFileNode'),
+        NodeItem('usd.USDToBlenderNode'),
         # NodeItem('usd.PrintFileNode'),
     ]),
     USDNodeCategory('HdUSD_USD_CONVERTER', 'Converter', items=[
         NodeItem('usd.MergeNode'),
+        NodeItem('usd.SwitchNode'),
         NodeItem('usd.FilterNode'),
         NodeItem('usd.IgnoreNode'),
         NodeItem('usd.RootNode'),
         NodeItem('usd.InstancingNode'),
+        NodeItem('usd.FreezeNode'),
     ]),
     USDNodeCategory('HdUSD_USD_TRANSFORMATIONS', 'Transformations', items=[
         NodeItem('usd.TransformNode'),
@@ -69,20 +72,25 @@ register_classes, unregister_classes = bpy.utils.register_classes_factory([
     blender_data.BlenderDataNode,
     instancing.HDUSD_USD_NODETREE_MT_instancing_object,
 
+    usd_file.HDUSD_USD_NODETREE_OP_usd_file_info,
     usd_file.UsdFileNode,
     write_file.WriteFileNode,
     merge.MergeNode,
+    switch.SwitchNode,
     # print_file.PrintFileNode,
     filter.FilterNode,
     filter.IgnoreNode,
     root.RootNode,
     instancing.InstancingNode,
+    usd_to_blender.HDUSD_USD_NODETREE_OP_usd_to_blender_import,
     usd_to_blender.USDToBlenderNode,
     hydra_render.HydraRenderNode,
     rpr_render_settings.RprRenderSettingsNode,
     transformations.HDUSD_USD_NODETREE_OP_transform_add_empty,
     transformations.TransformNode,
     transformations.TransformByEmptyNode,
+    freeze.HDUSD_USD_NODETREE_OP_freeze_refresh,
+    freeze.FreezeNode,
 ])
 
 
@@ -94,3 +102,4 @@ def register():
 def unregister():
     nodeitems_utils.unregister_node_categories("USD_NODES")
     unregister_classes()
+    write_file.unregister()
@@ -15,7 +15,8 @@
 import bpy
 from pxr import Usd
 
-from ...utils import pass_node_reroute
+from ...utils import pass_node_reroute, stage_cache
+from .. import profiler
 
 from . import log
 
@@ -29,6 +30,13 @@ class USDNode(bpy.types.Node):
     output_name = "Output"
     use_hard_reset = True
 
+    # nodes which depend on Blender data or have side effects shouldn't be memoized
+    is_memoizable = True
+
+    # output stage of the node is input stage itself or composes root prims of input stages
+    # by references or sublayers, so it follows in place edits of input stages without reset
+    follows_input_edits = False
+
     @classmethod
     def poll(cls, tree):
         return tree.bl_idname == 'hdusd.USDTree'
@@ -58,15 +66,73 @@ class USDNode(bpy.types.Node):
         This function does some useful preparation before and after calling compute() function.
         """
         stage = self.cached_stage()
-        if not stage:
+        if stage:
+            return stage
+
+        key = self.get_memo_key(group_nodes, **kwargs)
+        stage = stage_cache.memo.get(key) if key else None
+        if stage:
+            log("memo", self, group_nodes)
+            self.cached_stage.restore(stage)
+            profiler.memo_hit(self)
+
+        else:
             log("compute", self, group_nodes)
-            stage = self.compute(group_nodes=group_nodes, **kwargs)
-            self.cached_stage.assign(stage)
-            self.hdusd.usd_list.update_items()
-            self.node_computed()
+            with profiler.measure(self):
+                stage = self.compute(group_nodes=group_nodes, **kwargs)
+                self.cached_stage.assign(stage)
+
+            if stage and self.cached_stage.is_owner:
+                if key:
+                    stage_cache.set_stage_version(stage, key)
+                else:
+                    stage_cache.touch_stage(stage)
+
+            if key:
+                stage_cache.memo.put(key, stage)
+
+            profiler.collect_stage_stats(self, stage)
+
+        self.hdusd.usd_list.update_view()
+        self.node_computed()
 
         return stage
 
+    def get_memo_props(self):
+        """Returns hashable values of node properties, which are used in memoization key"""
+        props = []
+        for cls in type(self).__mro__:
+            if not issubclass(cls, USDNode):
+                continue
+
+            for name in cls.__dict__.get('__annotations__', {}):
+                value = getattr(self, name)
+                if isinstance(value, bpy.types.ID):
+                    value = value.name_full
+                elif isinstance(value, set):
+                    value = frozenset(value)
+                elif hasattr(value, '__len__') and not isinstance(value, str):
+                    value = tuple(value)
+
+                props.append((name, value))
+
+        return tuple(props)
+
+    def get_memo_key(self, group_nodes=(), **kwargs):
+        """
+        Returns memoization key built from node properties and versions of input stages.
+        None means that result of the node can't be memoized.
+        """
+        if not self.is_memoizable:
+            return None
+
+        input_versions = tuple(
+            stage_cache.get_stage_version(self.get_input_link(i, group_nodes=group_nodes, **kwargs))
+            for i in range(len(self.inputs)))
+
+        # some nodes define own 'name' property, which shadows unique name of the node
+        return (self.id_data.name, self.path_from_id(), self.get_memo_props(), input_versions)
+
     def _compute_node(self, node, group_node=None, **kwargs):
         """
         Exports node with output socket.
@@ -89,6 +155,48 @@ class USDNode(bpy.types.Node):
         # getting corresponded NodeParser class
         return node.final_compute(group_nodes, **kwargs)
 
+    def get_prefetch_task(self):
+        """
+        Returns function which does heavy part of compute() in a worker thread or None.
+        Function must not access bpy data, all required node properties should be read
+        before returning it. Its result is got in compute() via evaluator.pop_prefetched().
+        """
+        return None
+
+    def stage_edited(self, stage, is_prims_changed=False):
+        """
+        Notifier that own output stage of the node was edited in place instead of recompute,
+        so Hydra gets plain edit without recompute of the node and next nodes which follow it.
+        is_prims_changed means that prims were added or removed by the edit.
+        """
+        # memoized entries of this stage don't correspond to its content anymore,
+        # size of the stage is kept, in place edits don't change it noticeably
+        size = stage_cache.memo.discard_stage(stage)
+        key = self.get_memo_key()
+        if key:
+            stage_cache.memo.put(key, stage, size)
+            stage_cache.set_stage_version(stage, key)
+        else:
+            stage_cache.touch_stage(stage)
+
+        self._edit_next(is_prims_changed)
+        self.id_data.output_stage_changed()
+
+    def input_stage_edited(self, is_prims_changed):
+        """
+        Notifier that input stage of the node was edited in place.
+        Node is reset if its output stage doesn't follow the edit.
+        """
+        if not self.follows_input_edits:
+            self.reset()
+            return
+
+        self._edit_next(is_prims_changed)
+
+    def get_input_files(self):
+        """Returns paths of files which are read by compute()"""
+        return ()
+
     def node_computed(self):
         """Notifier that stage for this node has been already computed"""
         pass
@@ -129,25 +237,32 @@ class USDNode(bpy.types.Node):
 
             self.free()
             self.final_compute()
-            self.hdusd.usd_list.update_items()
+            self.hdusd.usd_list.update_view()
 
         self._reset_next(is_hard)
 
-    def _reset_next(self, is_hard):
-        nodes_to_reset = []
+    def _get_next_nodes(self):
+        next_nodes = []
 
         def get_nodes(node):
             if not isinstance(node, bpy.types.NodeReroute) and node is not self:
-                nodes_to_reset.append(node)
+                next_nodes.append(node)
                 return
             for output in node.outputs:
                 for link in output.links:
                     if link.is_valid:
                         get_nodes(link.to_node)
         get_nodes(self)
-        for node in nodes_to_reset:
+        return next_nodes
+
+    def _reset_next(self, is_hard):
+        for node in self._get_next_nodes():
             node.reset(is_hard)
 
+    def _edit_next(self, is_prims_changed):
+        for node in self._get_next_nodes():
+            node.input_stage_edited(is_prims_changed)
+
     def depsgraph_update(self, depsgraph):
         pass
 
@@ -156,3 +271,34 @@ class USDNode(bpy.types.Node):
 
     def material_update(self, material):
         pass
+
+
+class InputsNumberMixin:
+    """Mixin of USD nodes with changeable number of inputs, it should precede USDNode in bases"""
+
+    def update_inputs_number(self, context):
+        def add_inputs():
+            for i in range(len(self.inputs), self.inputs_number):
+                self.inputs.new(name=f"Input {i + 1}", type="NodeSocketShader")
+
+        self.id_data.no_update_call(add_inputs)
+
+        for i, input in enumerate(self.inputs):
+            input.hide = i >= self.inputs_number
+
+    def set_inputs_number(self, value):
+        max_i = max((i if input.is_linked else 0) for i, input in enumerate(self.inputs)) + 1
+        self["inputs_number"] = value if value > max_i else max_i
+
+    def get_inputs_number(self):
+        return self.get("inputs_number", 2)
+
+    inputs_number: bpy.props.IntProperty(
+        name="Inputs",
+        min=2, soft_max=32, default=2,
+        update=update_inputs_number, set=set_inputs_number, get=get_inputs_number
+    )
+
+    def init(self, context):
+        super().init(context)
+        self.update_inputs_number(context)
@@ -18,13 +18,29 @@ import bpy
 from pxr import UsdGeom, Tf
 
 from .base_node import USDNode
-from ...utils import usd as usd_utils
+from . import log
+from ...utils import usd as usd_utils, stage_cache
 from ...export import object, material, world
 from ...export.object import ObjectData, SUPPORTED_TYPES, sdf_name
 from ...export.camera import CameraData
+from ...engine import handlers
 from ...viewport.usd_collection import USD_CAMERA
 
 
+# Index of exported objects of nodes:
+#   {(nodetree name, node name): {object session_uid: (object sdf name, set of exported prims names)}}
+_exported_objects = {}
+
+# last frames seen by nodes with animation: {(nodetree name, node name): frame}
+_last_frames = {}
+
+# numbers of depsgraph objects seen by nodes: {(nodetree name, node name): number}
+_object_counts = {}
+
+# it is set during sampling animation, because changing frame calls depsgraph and frame change handlers
+_is_sampling = False
+
+
 #
 # COLLECTION MENU and OPERATORS
 #
@@ -144,6 +160,7 @@ class BlenderDataNode(USDNode):
 
     input_names = ()
     use_hard_reset = False
+    is_memoizable = False
 
     def update_data(self, context):
         self.reset(True)
@@ -253,62 +270,193 @@ class BlenderDataNode(USDNode):
         if self.is_use_animation:
             layout.operator(HDUSD_USD_NODETREE_OP_blender_data_update_animation.bl_idname, icon='FILE_REFRESH')
 
-    def compute(self, **kwargs):
-        depsgraph = bpy.context.evaluated_depsgraph_get()
-
-        stage = self.cached_stage.create()
-        UsdGeom.SetStageMetersPerUnit(stage, 1)
-        UsdGeom.SetStageUpAxis(stage, UsdGeom.Tokens.z)
-
-        root_prim = stage.GetPseudoRoot()
+    @property
+    def index_key(self):
+        return self.id_data.name, self.name
 
-        kwargs = {'scene': depsgraph.scene,
-                  'is_use_animation': self.is_use_animation,
-                  'is_restrict_frames': self.is_restrict_frames,
-                  'frame_start': self.frame_start,
-                  'frame_end': self.frame_end}
+    def _get_sync_kwargs(self, depsgraph):
+        return {'scene': depsgraph.scene,
+                'is_use_animation': self.is_use_animation,
+                'is_restrict_frames': self.is_restrict_frames,
+                'frame_start': self.frame_start,
+                'frame_end': self.frame_end}
 
+    def _get_objects_data(self, depsgraph):
+        """Yields data of all objects which have to be exported by this node"""
         if self.data == 'SCENE':
-            for obj_data in ObjectData.depsgraph_objects(depsgraph):
-                object.sync(root_prim, obj_data, **kwargs)
-
-            if depsgraph.scene.world is not None:
-                world.sync(root_prim, depsgraph.scene.world)
+            yield from ObjectData.depsgraph_objects(depsgraph)
 
         elif self.data == 'COLLECTION':
             if not self.collection:
                 return
 
             for obj_col in self.collection.objects:
-                if obj_col.hdusd.is_usd or (obj_col.type == 'CAMERA' and obj_col.name == USD_CAMERA ):
+                if obj_col.hdusd.is_usd or (obj_col.type == 'CAMERA' and obj_col.name == USD_CAMERA):
                     continue
 
-                object.sync(root_prim, ObjectData.from_object(
-                    obj_col.evaluated_get(depsgraph)), **kwargs)
+                yield ObjectData.from_object(obj_col.evaluated_get(depsgraph))
 
         elif self.data == 'OBJECT':
             if not self.object or self.object.hdusd.is_usd:
                 return
 
-            object.sync(root_prim, ObjectData.from_object(self.object.evaluated_get(depsgraph)),
-                        **kwargs)
+            yield ObjectData.from_object(self.object.evaluated_get(depsgraph))
+
+    def _sync_objects(self, root_prim, objects_data, index, kwargs):
+        """Exports objects and adds them to index"""
+        global _is_sampling
+
+        _is_sampling = True
+        try:
+            for obj_data in objects_data:
+                handlers.no_depsgraph_update_call(object.sync, root_prim, obj_data, **kwargs)
+
+                obj = obj_data.object.original
+                names = index.setdefault(obj.session_uid, (sdf_name(obj), set()))[1]
+                names.add(obj_data.sdf_name)
+
+        finally:
+            _is_sampling = False
+
+    def _sync_objects_set(self, root_prim, depsgraph, index, kwargs):
+        """
+        Applies additions, deletions, renames and collection membership changes
+        as targeted prims edits. Returns True if something was changed.
+        """
+        required = {obj_data.sdf_name: obj_data for obj_data in self._get_objects_data(depsgraph)}
+
+        is_updated = False
+        for uid, (name, prim_names) in tuple(index.items()):
+            names_to_remove = prim_names - required.keys()
+            for prim_name in names_to_remove:
+                root_prim.GetStage().RemovePrim(root_prim.GetPath().AppendChild(prim_name))
+
+            prim_names -= names_to_remove
+            if not prim_names:
+                del index[uid]
+
+            is_updated = is_updated or bool(names_to_remove)
+
+        current = set().union(*(prim_names for _, prim_names in index.values()))
+        objects_to_add = tuple(obj_data for prim_name, obj_data in required.items()
+                               if prim_name not in current)
+        if objects_to_add:
+            log("Adding objects", len(objects_to_add), self)
+            self._sync_objects(root_prim, objects_to_add, index, kwargs)
+            is_updated = True
+
+        return is_updated
+
+    def _get_updated_objects_data(self, depsgraph, index, updates):
+        """
+        Yields data of updated objects and their instances, objects are resolved through index,
+        depsgraph instances are walked only if some of updated objects are instanced
+        """
+        instanced = set()
+        for uid, update in updates.items():
+            entry = index.get(uid)
+            if not entry:
+                continue
+
+            name, prim_names = entry
+            if name in prim_names:
+                yield ObjectData.from_object(update.id)
+
+            if prim_names - {name}:
+                instanced.add(uid)
+
+        if not instanced:
+            return
+
+        for instance in depsgraph.object_instances:
+            if instance.is_instance and instance.object.original.session_uid in instanced:
+                yield ObjectData.from_instance(instance)
+
+    def _sync_updated_objects(self, root_prim, depsgraph, index, updates, kwargs):
+        """Updates objects and their instances reported by depsgraph. Returns True if something was changed"""
+        is_updated = False
+        objects_to_resample = []
+
+        for obj_data in self._get_updated_objects_data(depsgraph, index, updates):
+            uid = obj_data.object.original.session_uid
+            if obj_data.sdf_name not in index[uid][1]:
+                continue
+
+            # we need this "if" to prevent emergence of instancer object when we edit parent object
+            if obj_data.instance_id == 0 and obj_data.object.parent:
+                continue
+
+            if self.is_use_animation:
+                # animated data are sampled again only for updated objects
+                root_prim.GetStage().RemovePrim(root_prim.GetPath().AppendChild(obj_data.sdf_name))
+                objects_to_resample.append(obj_data)
+            else:
+                object.sync_update(root_prim, obj_data, updates[uid].is_updated_geometry,
+                                   updates[uid].is_updated_transform, **kwargs)
+
+            is_updated = True
+
+        if objects_to_resample:
+            self._sync_objects(root_prim, objects_to_resample, index, kwargs)
+
+        return is_updated
+
+    def _is_objects_set_changed(self, depsgraph):
+        """
+        Checks if objects were added, removed, shown or hidden after Scene or Collection update.
+        In scene mode it's checked by number of depsgraph objects without walking of instances.
+        """
+        if self.data != 'SCENE':
+            # objects of collection or single object are synced cheaply
+            return True
+
+        return _object_counts.get(self.index_key) != len(depsgraph.objects)
+
+    def compute(self, **kwargs):
+        depsgraph = bpy.context.evaluated_depsgraph_get()
+
+        stage = self.cached_stage.create()
+        UsdGeom.SetStageMetersPerUnit(stage, 1)
+        UsdGeom.SetStageUpAxis(stage, UsdGeom.Tokens.z)
+
+        root_prim = stage.GetPseudoRoot()
+
+        index = _exported_objects[self.index_key] = {}
+        _last_frames[self.index_key] = depsgraph.scene.frame_current
+        _object_counts[self.index_key] = len(depsgraph.objects)
+
+        self._sync_objects(root_prim, self._get_objects_data(depsgraph), index,
+                           self._get_sync_kwargs(depsgraph))
+
+        if self.data == 'SCENE' and depsgraph.scene.world is not None:
+            world.sync(root_prim, depsgraph.scene.world)
 
         return stage
 
     def depsgraph_update(self, depsgraph):
-        # to prevent recursion we need to don't update node if we changed smth in Blender's animation
-        if self.is_use_animation:
+        if _is_sampling:
             return
 
         stage = self.cached_stage()
-        if not stage:
-            self.final_compute()
+        index = _exported_objects.get(self.index_key)
+        if not stage or index is None:
+            self.reset(True)
             return
 
+        if self.is_use_animation:
+            # depsgraph updates caused by frame change don't change animation
+            frame = depsgraph.scene.frame_current
+            if _last_frames.get(self.index_key) != frame:
+                _last_frames[self.index_key] = frame
+                return
+
         is_updated = False
+        is_objects_set_changed = False
+        is_collections_changed = False
+        updates = {}
 
         root_prim = stage.GetPseudoRoot()
-        kwargs = {'scene': depsgraph.scene}
+        kwargs = self._get_sync_kwargs(depsgraph)
 
         for update in depsgraph.updates:
             if isinstance(update.id, bpy.types.Scene):
@@ -316,7 +464,8 @@ class BlenderDataNode(USDNode):
                 world.sync_update(root_prim, scene.world)
                 usd_utils.set_delegate_variant(root_prim.GetAllChildren(),
                                                scene.hdusd.viewport.delegate_name)
-
+                # visibility of objects is changed by Scene update
+                is_collections_changed = True
                 continue
 
             if isinstance(update.id, bpy.types.Object):
@@ -327,30 +476,13 @@ class BlenderDataNode(USDNode):
                 if obj.type == 'CAMERA' and obj.name == USD_CAMERA:
                     continue
 
-                obj_data = ObjectData.from_object(obj)
-                # checking if object has to be updated
-                if self.data == 'COLLECTION':
-                    if not self.collection or \
-                            obj.name not in self.collection.objects:
-                        continue
-
-                elif self.data == 'OBJECT':
-                    if not self.object or \
-                            ObjectData.from_object(self.object).sdf_name != obj_data.sdf_name:
-                        continue
-
-                # we need this "if" to prevent emergence of instancer object when we edit parent object
-                if not obj.parent:
-                    object.sync_update(root_prim, obj_data,
-                                       update.is_updated_geometry, update.is_updated_transform,
-                                       **kwargs)
-
-                for inst_obj_data in ObjectData.depsgraph_objects_inst(depsgraph):
-                    if obj_data.sdf_name == sdf_name(inst_obj_data.object):
-                        object.sync_update(root_prim, inst_obj_data, update.is_updated_geometry, update.is_updated_transform
-                                           , **kwargs)
+                uid = obj.original.session_uid
+                updates[uid] = update
+
+                # renamed object
+                if uid in index and index[uid][0] != sdf_name(obj):
+                    is_objects_set_changed = True
 
-                is_updated = True
                 continue
 
             if isinstance(update.id, bpy.types.World):
@@ -364,57 +496,23 @@ class BlenderDataNode(USDNode):
                 continue
 
             if isinstance(update.id, bpy.types.Collection):
-                coll = update.id
-
-                current_keys = set(prim.GetName() for prim in root_prim.GetAllChildren())
-                required_keys = set()
-                depsgraph_keys = set(obj_data.sdf_name for obj_data in ObjectData.depsgraph_objects(depsgraph))
-                instances_keys = set(obj_data.sdf_name for obj_data in ObjectData.depsgraph_objects_inst(depsgraph))
-
-                if self.data == 'SCENE':
-                    required_keys = depsgraph_keys
-
-                elif self.data == 'COLLECTION':
-                    if not self.collection:
-                        continue
-
-                    if coll.name != self.collection.name:
-                        continue
-
-                    required_keys = set(object.sdf_name(obj) for obj in coll.objects)
-                    required_keys.intersection_update(depsgraph_keys)
-                    required_keys = required_keys | instances_keys
-
-                elif self.data == 'OBJECT':
-                    if not self.object:
-                        continue
-
-                    if object.sdf_name(self.object) in depsgraph_keys:
-                        required_keys = {object.sdf_name(self.object)}
-
-                keys_to_remove = current_keys - required_keys
-                keys_to_add = required_keys - current_keys
-
-                if keys_to_remove:
-                    for key in keys_to_remove:
-                        if key == world.OBJ_PRIM_NAME:
-                            continue
-
-                        root_prim.GetStage().RemovePrim(root_prim.GetPath().AppendChild(key))
-                        is_updated = True
+                is_collections_changed = True
+                continue
 
-                if keys_to_add:
-                    for obj_data in ObjectData.depsgraph_objects(depsgraph):
-                        if obj_data.sdf_name not in keys_to_add:
-                            continue
+        if is_collections_changed and not is_objects_set_changed:
+            is_objects_set_changed = self._is_objects_set_changed(depsgraph)
 
-                        object.sync(root_prim, obj_data, **kwargs)
-                        is_updated = True
+        if is_objects_set_changed:
+            is_updated = self._sync_objects_set(root_prim, depsgraph, index, kwargs) or is_updated
+            _object_counts[self.index_key] = len(depsgraph.objects)
 
-                continue
+        if updates:
+            is_updated = self._sync_updated_objects(root_prim, depsgraph, index, updates, kwargs) or \
+                         is_updated
 
         if is_updated:
-            self.hdusd.usd_list.update_items()
+            stage_cache.touch_stage(stage)
+            self.hdusd.usd_list.update_view()
             self._reset_next(True)
 
     def frame_change(self, depsgraph):
@@ -461,3 +559,4 @@ class BlenderDataNode(USDNode):
     def material_update(self, mat):
         stage = self.cached_stage()
         material.sync_update_all(stage.GetPseudoRoot(), mat)
+        stage_cache.touch_stage(stage)
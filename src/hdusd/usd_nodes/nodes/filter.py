@@ -13,11 +13,35 @@
 # limitations under the License.
 # ********************************************************************
 import re
+from collections import OrderedDict
 
 import bpy
 from pxr import Usd, UsdGeom, Tf
 
 from .base_node import USDNode
+from ...utils import stage_cache
+from ...utils.path_matcher import compile_patterns
+
+
+MATCHES_CACHE_SIZE = 16
+
+# matched prims paths: {(stage version, filter_path): tuple of Sdf.Path}
+_matches_cache = OrderedDict()
+
+
+def get_matched_prims(stage, filter_path):
+    """Returns matched prims of the stage, results are cached per stage version"""
+    key = (stage_cache.get_stage_version(stage), filter_path)
+    paths = _matches_cache.get(key)
+    if paths is None:
+        paths = tuple(prim.GetPath() for prim in compile_patterns(filter_path).get_prims(stage))
+        _matches_cache[key] = paths
+        if len(_matches_cache) > MATCHES_CACHE_SIZE:
+            _matches_cache.popitem(last=False)
+    else:
+        _matches_cache.move_to_end(key)
+
+    return tuple(stage.GetPrimAtPath(path) for path in paths)
 
 
 class FilterNode(USDNode):
@@ -26,6 +50,8 @@ class FilterNode(USDNode):
     bl_label = "Filter"
     bl_icon = "FILTER"
 
+    follows_input_edits = True
+
     def update_data(self, context):
         self.reset()
 
@@ -42,6 +68,14 @@ class FilterNode(USDNode):
     def draw_buttons(self, context, layout):
         layout.prop(self, 'filter_path')
 
+    def input_stage_edited(self, is_prims_changed):
+        # added or removed prims could be matched by filter pattern
+        if is_prims_changed:
+            self.reset()
+            return
+
+        super().input_stage_edited(is_prims_changed)
+
     def compute(self, **kwargs):
         input_stage = self.get_input_link('Input', **kwargs)
         if not input_stage:
@@ -50,23 +84,7 @@ class FilterNode(USDNode):
         if not self.filter_path:
             return input_stage
 
-        filter_path = [name for name in self.filter_path.replace(" ", ",").split(",") if name]
-
-        # creating search regex pattern and getting filtered rpims
-        prog = re.compile('|'.join(filter_path).replace('*', '#')        # temporary replacing '*' to '#'
-                                               .replace('/', '\/')       # for correct regex pattern
-                                               .replace('##', '[\w\/]*') # creation
-                                               .replace('#', '\w*'))
-
-        def get_child_prims(prim):
-            if not prim.IsPseudoRoot() and prog.fullmatch(str(prim.GetPath())):
-                yield prim
-                return
-
-            for child in prim.GetAllChildren():
-                yield from get_child_prims(child)
-
-        prims = tuple(get_child_prims(input_stage.GetPseudoRoot()))
+        prims = get_matched_prims(input_stage, self.filter_path)
         if not prims:
             return None
 
@@ -90,6 +108,8 @@ class IgnoreNode(USDNode):
     bl_label = "Ignore"
     bl_icon = "FILTER"
 
+    follows_input_edits = True
+
     def update_data(self, context):
         self.reset()
 
@@ -0,0 +1,232 @@
+# **********************************************************************
+# Copyright 2020 Advanced Micro Devices, Inc
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+# ********************************************************************
+import os
+import hashlib
+from pathlib import Path
+
+import bpy
+from pxr import Sdf
+
+from .base_node import USDNode
+from ...utils import pass_node_reroute, temp_dir
+from . import log
+
+
+def get_upstream_nodes(node):
+    """Returns nodes linked to inputs of the node recursively, each node is returned once"""
+    nodes = []
+    pointers = set()
+
+    def add_inputs(n):
+        for socket_in in n.inputs:
+            if not socket_in.is_linked or not socket_in.links:
+                continue
+
+            link = pass_node_reroute(socket_in.links[0])
+            if not link or not isinstance(link.from_node, USDNode) or \
+                    link.from_node.as_pointer() in pointers:
+                continue
+
+            nodes.append(link.from_node)
+            pointers.add(link.from_node.as_pointer())
+            add_inputs(link.from_node)
+
+    add_inputs(node)
+    return nodes
+
+
+def _get_output_nodes(node):
+    """Returns nodes linked to outputs of the node, reroutes are passed"""
+    to_nodes = []
+
+    def add_outputs(n):
+        for output in n.outputs:
+            for link in output.links:
+                if not link.is_valid:
+                    continue
+
+                if isinstance(link.to_node, bpy.types.NodeReroute):
+                    add_outputs(link.to_node)
+                else:
+                    to_nodes.append(link.to_node)
+
+    add_outputs(node)
+    return to_nodes
+
+
+def get_frozen_upstream_nodes(nodetree):
+    """
+    Returns pointers of nodes which outputs are consumed only by frozen Freeze nodes.
+    It's computed once per update by single traversal upstream from frozen Freeze nodes.
+    """
+    frozen_nodes = [node for node in nodetree.nodes if isinstance(node, FreezeNode) and node.is_frozen]
+    if not frozen_nodes:
+        return frozenset()
+
+    results = {}
+
+    def is_frozen_upstream(node):
+        key = node.as_pointer()
+        res = results.get(key)
+        if res is None:
+            to_nodes = _get_output_nodes(node)
+            res = results[key] = bool(to_nodes) and all(
+                (isinstance(n, FreezeNode) and n.is_frozen) or is_frozen_upstream(n)
+                for n in to_nodes)
+
+        return res
+
+    upstream_nodes = {}
+    for freeze_node in frozen_nodes:
+        for node in get_upstream_nodes(freeze_node):
+            upstream_nodes.setdefault(node.as_pointer(), node)
+
+    return frozenset(key for key, node in upstream_nodes.items() if is_frozen_upstream(node))
+
+
+class HDUSD_USD_NODETREE_OP_freeze_refresh(bpy.types.Operator):
+    """Evaluate upstream nodes and bake cache file again"""
+    bl_idname = "hdusd.usd_nodetree_freeze_refresh"
+    bl_label = "Refresh"
+
+    def execute(self, context):
+        context.node.refresh()
+        return {'FINISHED'}
+
+
+class FreezeNode(USDNode):
+    """
+    Bakes input stage to binary .usdc file in cache directory and serves it without evaluation
+    of upstream nodes. Cache file is keyed by hash of upstream nodes properties and input files
+    modification times, so it's baked again if upstream nodes or files are changed.
+    """
+    bl_idname = 'usd.FreezeNode'
+    bl_label = "Freeze"
+    bl_icon = "FREEZE"
+
+    is_memoizable = False
+
+    @property
+    def follows_input_edits(self):
+        # not frozen node passes input stage through, frozen one is baked again
+        return not self.is_frozen
+
+    def update_frozen(self, context):
+        # upstream nodes are skipped by nodetree while they are frozen, so they are recomputed
+        self.id_data.reset()
+
+    def update_data(self, context):
+        self.reset()
+
+    is_frozen: bpy.props.BoolProperty(
+        name="Frozen",
+        description="Serve input stage from cache file without evaluation of upstream nodes",
+        default=False,
+        update=update_frozen
+    )
+    cache_dir: bpy.props.StringProperty(
+        name="Cache Dir",
+        description="Directory of cache files, relative paths are relative to .blend file",
+        subtype='DIR_PATH',
+        default="//usd_cache/",
+        update=update_data
+    )
+    cache_file: bpy.props.StringProperty(
+        name="Cache File",
+        description="Path of the last baked cache file",
+        default="",
+        options={'HIDDEN'}
+    )
+
+    def draw_buttons(self, context, layout):
+        row = layout.row(align=True)
+        row.prop(self, 'is_frozen', toggle=True, icon='FREEZE')
+        row.operator(HDUSD_USD_NODETREE_OP_freeze_refresh.bl_idname, text="", icon='FILE_REFRESH')
+        layout.prop(self, 'cache_dir')
+
+        if self.is_frozen and self.cache_file:
+            layout.label(text=Path(self.cache_file).name)
+
+    def get_cache_key(self):
+        """Returns hash of upstream nodes properties and input files modification times"""
+        data = []
+        for node in get_upstream_nodes(self):
+            files = tuple((path, os.path.getmtime(path))
+                          for path in node.get_input_files() if os.path.isfile(path))
+            data.append((node.bl_idname, node.name, node.get_memo_props(), files))
+
+        return hashlib.sha1(repr(data).encode('utf-8')).hexdigest()
+
+    def get_cache_path(self, key):
+        cache_dir = bpy.path.abspath(self.cache_dir) if self.cache_dir else ""
+        if not cache_dir or (self.cache_dir.startswith("//") and not bpy.data.filepath):
+            # unsaved .blend file, relative cache dir can't be resolved
+            cache_dir = temp_dir() / "usd_cache"
+
+        name = bpy.path.clean_name(f"{self.id_data.name}_{self.name}")
+        return Path(cache_dir) / f"{name}_{key[:16]}.usdc"
+
+    def bake(self, file_path, **kwargs):
+        input_stage = self.get_input_link('Input', **kwargs)
+        if not input_stage:
+            return False
+
+        file_path.parent.mkdir(parents=True, exist_ok=True)
+        tmp_path = file_path.with_suffix(".tmp.usdc")
+        input_stage.Flatten(False).Export(str(tmp_path))
+        os.replace(tmp_path, file_path)
+
+        # layer could be already opened with previous content of this file
+        layer = Sdf.Layer.Find(str(file_path))
+        if layer:
+            layer.Reload(True)
+
+        log.info("Baked", self, file_path)
+        return True
+
+    def compute(self, **kwargs):
+        if not self.is_frozen:
+            return self.get_input_link('Input', **kwargs)
+
+        file_path = self.get_cache_path(self.get_cache_key())
+        if not file_path.is_file():
+            if not self.bake(file_path, **kwargs):
+                return None
+
+            if self.cache_file and self.cache_file != str(file_path) and \
+                    os.path.isfile(self.cache_file):
+                os.remove(self.cache_file)
+
+        if self.cache_file != str(file_path):
+            self.id_data.no_update_call(setattr, self, 'cache_file', str(file_path))
+
+        stage = self.cached_stage.create()
+        stage.GetRootLayer().subLayerPaths.append(str(file_path))
+        return stage
+
+    def refresh(self):
+        if not self.is_frozen:
+            self.reset(True)
+            return
+
+        file_path = self.get_cache_path(self.get_cache_key())
+        if file_path.is_file():
+            os.remove(file_path)
+
+        # upstream nodes aren't computed while frozen, they are computed by bake() on demand
+        for node in get_upstream_nodes(self):
+            node.free()
+
+        self.reset(True)
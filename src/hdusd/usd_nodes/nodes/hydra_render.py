@@ -25,6 +25,7 @@ class HydraRenderNode(USDNode):
     bl_icon = "RESTRICT_RENDER_OFF"
 
     output_name = ""
+    follows_input_edits = True
 
     render_type: bpy.props.EnumProperty(
         name='Type',
@@ -12,16 +12,58 @@
 # See the License for the specific language governing permissions and
 # limitations under the License.
 # ********************************************************************
+import time
+
+import numpy as np
+
 import bpy
 from mathutils import Matrix
 
-from pxr import UsdGeom, Tf, Gf
+from pxr import UsdGeom, Tf, Gf, Vt
 
 from .base_node import USDNode
+from . import log
+from ...utils import get_data_from_collection
 from .blender_data import (
     HDUSD_USD_NODETREE_OP_blender_data_link_object, HDUSD_USD_NODETREE_OP_blender_data_unlink_object)
 
 
+def get_track_quats(normals):
+    """
+    Vectorized equivalent of mathutils Vector.to_track_quat('Z', 'Y') for array of normals.
+    Returns array of quaternions (w, x, y, z).
+    """
+    # rotation of Z axis to normal direction is computed in single precision like in Blender,
+    # it keeps signs of zeros and tiny values which define the twist for normals along Z axis
+    normals = normals.astype(np.float32)
+    length = np.linalg.norm(normals, axis=1)
+    is_valid = length > 0.0
+    dirs = np.zeros_like(normals)
+    dirs[is_valid] = normals[is_valid] / length[is_valid, None]
+
+    axis = np.stack((-normals[:, 1], normals[:, 0], np.zeros(len(normals), dtype=np.float32)), axis=1)
+    axis[np.abs(normals[:, 0]) + np.abs(normals[:, 1]) < 1e-4, 0] = 1.0
+    axis /= np.linalg.norm(axis, axis=1)[:, None]
+
+    half_angle = np.float32(0.5) * np.arccos(np.clip(dirs[:, 2], -1.0, 1.0))
+    w1 = np.cos(half_angle).astype(np.float64)
+    v1 = (axis * np.sin(half_angle)[:, None]).astype(np.float64)
+
+    # twist around normal to keep Y axis up, X and Y of rotated Z axis are computed
+    # like in Blender's quat_to_mat3()
+    rot_z_x = w1 * v1[:, 1] + v1[:, 0] * v1[:, 2]
+    rot_z_y = -w1 * v1[:, 0] + v1[:, 1] * v1[:, 2]
+    twist = -0.5 * np.arctan2(-rot_z_x, -rot_z_y)
+    w2 = np.cos(twist)
+    v2 = dirs * np.sin(twist)[:, None]
+
+    quats = np.empty((len(normals), 4))
+    quats[:, 0] = w2 * w1 - np.sum(v2 * v1, axis=1)
+    quats[:, 1:] = w2[:, None] * v1 + w1[:, None] * v2 + np.cross(v2, v1)
+    quats[~is_valid] = (1.0, 0.0, 0.0, 0.0)
+    return quats
+
+
 class HDUSD_USD_NODETREE_MT_instancing_object(bpy.types.Menu):
     bl_idname = "HDUSD_USD_NODETREE_MT_instancing_object"
     bl_label = "Object"
@@ -47,6 +89,9 @@ class InstancingNode(USDNode):
     bl_label = "Instancing"
     bl_icon = "STICKY_UVS_DISABLE"
 
+    is_memoizable = False
+    follows_input_edits = True
+
     def update_data(self, context):
         self.reset(True)
 
@@ -73,6 +118,16 @@ class InstancingNode(USDNode):
         update=update_data
     )
 
+    output_type: bpy.props.EnumProperty(
+        name="Output",
+        description="Type of created instances",
+        items=(('XFORMS', "Xforms", "Create Xform primitive with references for every instance"),
+               ('POINT_INSTANCER', "Point Instancer",
+                "Create single PointInstancer primitive with input primitives as prototype")),
+        default='XFORMS',
+        update=update_data
+    )
+
     object_transform: bpy.props.BoolProperty(
         name="Use Object Transform",
         default=True,
@@ -94,6 +149,7 @@ class InstancingNode(USDNode):
                      text=self.object.name, icon='OBJECT_DATAMODE')
             row.operator(HDUSD_USD_NODETREE_OP_blender_data_unlink_object.bl_idname, icon='X')
             layout.prop(self, 'method')
+            layout.prop(self, 'output_type')
         else:
             row.menu(HDUSD_USD_NODETREE_MT_instancing_object.bl_idname,
                      text=" ", icon='OBJECT_DATAMODE')
@@ -120,10 +176,51 @@ class InstancingNode(USDNode):
         if not distribute_items:
             return None
 
+        time_start = time.perf_counter()
+
         stage = self.cached_stage.create()
         UsdGeom.SetStageMetersPerUnit(stage, 1)
         UsdGeom.SetStageUpAxis(stage, UsdGeom.Tokens.z)
 
+        input_prims = input_stage.GetPseudoRoot().GetAllChildren()
+        if self.output_type == 'POINT_INSTANCER':
+            self._create_point_instancer(stage, input_stage, obj, distribute_items)
+            prims_count = 3 + len(input_prims)
+
+        else:
+            self._create_xforms(stage, input_stage, obj, distribute_items)
+            prims_count = len(distribute_items) * (1 + len(input_prims))
+
+        log(f"{self.name}: {len(distribute_items)} instances, {prims_count} prims created "
+            f"in {time.perf_counter() - time_start:.3f}s", self.output_type)
+
+        return stage
+
+    def _create_point_instancer(self, stage, input_stage, obj, distribute_items):
+        count = len(distribute_items)
+        positions = get_data_from_collection(distribute_items,
+                                             'co' if self.method == 'VERTICES' else 'center', (count, 3))
+        normals = get_data_from_collection(distribute_items, 'normal', (count, 3))
+        # Gf.Quath keeps imaginary part before real one
+        orientations = get_track_quats(normals)[:, (1, 2, 3, 0)].astype(np.float16)
+
+        instancer = UsdGeom.PointInstancer.Define(stage, f'/{Tf.MakeValidIdentifier(self.name)}')
+        prototype = UsdGeom.Xform.Define(stage, instancer.GetPath().AppendChild('Prototypes')
+                                                                   .AppendChild('Prototype'))
+        for prim in input_stage.GetPseudoRoot().GetAllChildren():
+            override_prim = stage.OverridePrim(prototype.GetPath().AppendChild(prim.GetName()))
+            override_prim.GetReferences().AddReference(input_stage.GetRootLayer().realPath, prim.GetPath())
+
+        instancer.CreatePrototypesRel().SetTargets([prototype.GetPath()])
+        instancer.CreateProtoIndicesAttr(Vt.IntArray.FromNumpy(np.zeros(count, dtype=np.int32)))
+        instancer.CreatePositionsAttr(Vt.Vec3fArray.FromNumpy(positions))
+        instancer.CreateOrientationsAttr(Vt.QuathArray.FromNumpy(orientations))
+        instancer.CreateScalesAttr(Vt.Vec3fArray.FromNumpy(np.ones((count, 3), dtype=np.float32)))
+
+        if self.object_transform:
+            instancer.MakeMatrixXform().Set(Gf.Matrix4d(obj.matrix_world.transposed()))
+
+    def _create_xforms(self, stage, input_stage, obj, distribute_items):
         for i, item in enumerate(distribute_items):
             root_xform = UsdGeom.Xform.Define(stage, f'/{Tf.MakeValidIdentifier(f"{self.name}_{i}")}')
             for prim in input_stage.GetPseudoRoot().GetAllChildren():
@@ -140,8 +237,6 @@ class InstancingNode(USDNode):
             UsdGeom.Xform.Get(stage, root_xform.GetPath()).MakeMatrixXform()
             root_xform.GetPrim().GetAttribute('xformOp:transform').Set(Gf.Matrix4d(transform.transposed()))
 
-        return stage
-
     def depsgraph_update(self, depsgraph):
         if not self.object:
             return
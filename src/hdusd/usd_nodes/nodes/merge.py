@@ -16,42 +16,33 @@ import bpy
 
 from pxr import Usd, UsdGeom
 
-from .base_node import USDNode
+from .base_node import USDNode, InputsNumberMixin
 
 
-MAX_INPUTS_NUMBER = 10
-
-
-class MergeNode(USDNode):
+class MergeNode(InputsNumberMixin, USDNode):
     """Merges two USD streams"""
     bl_idname = 'usd.MergeNode'
     bl_label = "Merge"
     bl_icon = "SELECT_EXTEND"
 
-    input_names = tuple(f"Input {i + 1}" for i in range(MAX_INPUTS_NUMBER))
-
-    def update_inputs_number(self, context):
-        for i in range(MAX_INPUTS_NUMBER):
-            self.inputs[i].hide = i >= self.inputs_number
+    input_names = ("Input 1", "Input 2")
+    follows_input_edits = True
 
-    def set_inputs_number(self, value):
-        max_i = max((i if input.is_linked else 0) for i, input in enumerate(self.inputs)) + 1
-        self["inputs_number"] = value if value > max_i else max_i
+    def update_data(self, context):
+        self.reset()
 
-    def get_inputs_number(self):
-        return self.get("inputs_number", 2)
-
-    inputs_number: bpy.props.IntProperty(
-        name="Inputs",
-        min=2, max=MAX_INPUTS_NUMBER, default=2,
-        update=update_inputs_number, set=set_inputs_number, get=get_inputs_number
+    merge_type: bpy.props.EnumProperty(
+        name="Type",
+        description="Composition of input stages",
+        items=(('REFERENCES', "References", "Reference every root primitive of input stages"),
+               ('SUBLAYERS', "Sublayers", "Compose input stages as ordered sublayers, "
+                                          "first input is the strongest")),
+        default='REFERENCES',
+        update=update_data
     )
 
-    def init(self, context):
-        super().init(context)
-        self.update_inputs_number(context)
-
     def draw_buttons(self, context, layout):
+        layout.prop(self, 'merge_type')
         layout.prop(self, 'inputs_number')
 
     def compute(self, **kwargs):
@@ -71,6 +62,12 @@ class MergeNode(USDNode):
         UsdGeom.SetStageMetersPerUnit(stage, 1)
         UsdGeom.SetStageUpAxis(stage, UsdGeom.Tokens.z)
 
+        if self.merge_type == 'SUBLAYERS':
+            # no composition arcs per prim are created here
+            stage.GetRootLayer().subLayerPaths = [ref_stage.GetRootLayer().identifier
+                                                  for ref_stage in ref_stages]
+            return stage
+
         root_prim = stage.GetPseudoRoot()
 
         for ref_stage in ref_stages:
@@ -20,6 +20,8 @@ class PrintFileNode(USDNode):
     bl_idname = 'usd.PrintFileNode'
     bl_label = "Print USD to stdout"
 
+    is_memoizable = False
+
     def compute(self, **kwargs):
         stage = self.get_input_link('Input', **kwargs)
         if stage:
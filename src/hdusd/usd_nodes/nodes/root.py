@@ -26,6 +26,8 @@ class RootNode(USDNode):
     bl_label = "Root"
     bl_icon = "COLLECTION_NEW"
 
+    follows_input_edits = True
+
     def update_data(self, context):
         self.reset()
 
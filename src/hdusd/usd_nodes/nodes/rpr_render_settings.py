@@ -22,6 +22,8 @@ class RprRenderSettingsNode(USDNode):
     bl_idname = 'usd.RprRenderSettingsNode'
     bl_label = "RPR Render Settings"
 
+    follows_input_edits = True
+
     render_mode: bpy.props.EnumProperty( 
         name='Render Mode',
         items=(('LOW', 'Low', "Raster only"),
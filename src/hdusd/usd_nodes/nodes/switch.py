@@ -0,0 +1,133 @@
+# **********************************************************************
+# Copyright 2020 Advanced Micro Devices, Inc
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+# ********************************************************************
+import bpy
+
+from pxr import UsdGeom, Tf
+
+from .base_node import USDNode, InputsNumberMixin
+
+
+def variant_name(index):
+    return f"input_{index + 1}"
+
+
+class SwitchNode(InputsNumberMixin, USDNode):
+    """
+    Switches between input streams. Inputs are authored as variants of single VariantSet
+    of output prim, so all inputs stay evaluated and switching is just a variant selection edit.
+    """
+    bl_idname = 'usd.SwitchNode'
+    bl_label = "Switch"
+    bl_icon = "ARROW_LEFTRIGHT"
+
+    input_names = ("Input 1", "Input 2")
+    follows_input_edits = True
+
+    def update_data(self, context):
+        self.reset()
+
+    def update_active_input(self, context):
+        if not self.set_variant_selection():
+            self.reset()
+
+    active_input: bpy.props.IntProperty(
+        name="Active Input",
+        description="Number of input which is selected in output VariantSet",
+        min=1, soft_max=32, default=1,
+        update=update_active_input
+    )
+    prim_name: bpy.props.StringProperty(
+        name="Name",
+        description="Name of USD root primitive, which holds VariantSet",
+        default="Switch",
+        update=update_data
+    )
+    variant_set: bpy.props.StringProperty(
+        name="VariantSet",
+        description="Name of VariantSet of inputs",
+        default="switch",
+        update=update_data
+    )
+
+    def draw_buttons(self, context, layout):
+        layout.prop(self, 'active_input')
+        layout.prop(self, 'inputs_number')
+        layout.prop(self, 'prim_name')
+        layout.prop(self, 'variant_set')
+
+    @property
+    def prim_path(self):
+        return f'/{Tf.MakeValidIdentifier(self.prim_name)}'
+
+    def get_variant_set(self, stage):
+        prim = stage.GetPrimAtPath(self.prim_path)
+        if not prim:
+            return None
+
+        return prim.GetVariantSets().GetVariantSet(Tf.MakeValidIdentifier(self.variant_set))
+
+    def set_variant_selection(self):
+        """
+        Selects variant of active input in existing output stage.
+        Returns False if node has to be recomputed.
+        """
+        stage = self.cached_stage()
+        if not stage or not self.cached_stage.is_owner:
+            return False
+
+        vset = self.get_variant_set(stage)
+        if not vset or not vset.HasAuthoredVariant(variant_name(self.active_input - 1)):
+            return False
+
+        vset.SetVariantSelection(variant_name(self.active_input - 1))
+        # prims of previous variant are removed and prims of selected one are added
+        self.stage_edited(stage, is_prims_changed=True)
+        return True
+
+    def compute(self, **kwargs):
+        # all inputs are evaluated to make switching between them instant
+        input_stages = {}
+        for i in range(self.inputs_number):
+            stage = self.get_input_link(i, **kwargs)
+            if stage:
+                input_stages[i] = stage
+
+        if not input_stages:
+            return None
+
+        stage = self.cached_stage.create()
+        UsdGeom.SetStageMetersPerUnit(stage, 1)
+        UsdGeom.SetStageUpAxis(stage, UsdGeom.Tokens.z)
+
+        root_xform = UsdGeom.Xform.Define(stage, self.prim_path)
+        root_prim = root_xform.GetPrim()
+        stage.SetDefaultPrim(root_prim)
+
+        vset = root_prim.GetVariantSets().AddVariantSet(Tf.MakeValidIdentifier(self.variant_set))
+        for i, input_stage in input_stages.items():
+            vset.AddVariant(variant_name(i))
+            vset.SetVariantSelection(variant_name(i))
+            with vset.GetVariantEditContext():
+                for prim in input_stage.GetPseudoRoot().GetAllChildren():
+                    override_prim = stage.OverridePrim(root_prim.GetPath().AppendChild(prim.GetName()))
+                    override_prim.GetReferences().AddReference(input_stage.GetRootLayer().realPath,
+                                                               prim.GetPath())
+
+        active_index = self.active_input - 1
+        if active_index not in input_stages:
+            active_index = next(iter(input_stages))
+
+        vset.SetVariantSelection(variant_name(active_index))
+        return stage
@@ -22,6 +22,29 @@ from .base_node import USDNode
 
 from ...export.object import get_transform
 
+
+def set_root_transform(node, transform):
+    """
+    Sets transform of root Xform in existing output stage of the node,
+    so Hydra gets plain transform edit without recompute of the node and next nodes.
+    Returns False if node has to be recomputed.
+    """
+    stage = node.cached_stage()
+    if not stage or not node.cached_stage.is_owner:
+        return False
+
+    prim = stage.GetPrimAtPath(f'/{Tf.MakeValidIdentifier(node.name)}')
+    if not prim:
+        return False
+
+    attr = prim.GetAttribute('xformOp:transform')
+    if not attr:
+        return False
+
+    attr.Set(Gf.Matrix4d(transform))
+    node.stage_edited(stage)
+    return True
+
 class HDUSD_USD_NODETREE_OP_transform_add_empty(bpy.types.Operator):
     """Add new Empty object"""
     bl_idname = "hdusd.usd_nodetree_transform_add_empty"
@@ -44,11 +67,16 @@ class TransformNode(USDNode):
     bl_idname = 'usd.TransformNode'
     bl_label = "Transform"
     bl_icon = "OBJECT_ORIGIN"
+    follows_input_edits = True
     bl_width_default = 250
 
     def update_data(self, context):
         self.reset()
 
+    def update_transform(self, context):
+        if not set_root_transform(self, self.get_matrix().transposed()):
+            self.reset()
+
     name: bpy.props.StringProperty(
         name="Name",
         description="Xform name for USD root primitive",
@@ -56,9 +84,9 @@ class TransformNode(USDNode):
         update=update_data
     )
 
-    translation: bpy.props.FloatVectorProperty(update=update_data, unit='LENGTH')
-    rotation: bpy.props.FloatVectorProperty(update=update_data, unit='ROTATION')
-    scale: bpy.props.FloatVectorProperty(update=update_data, unit='NONE', default=(1.0, 1.0, 1.0))
+    translation: bpy.props.FloatVectorProperty(update=update_transform, unit='LENGTH')
+    rotation: bpy.props.FloatVectorProperty(update=update_transform, unit='ROTATION')
+    scale: bpy.props.FloatVectorProperty(update=update_transform, unit='NONE', default=(1.0, 1.0, 1.0))
 
     def draw_buttons(self, context, layout):
         col = layout.column()
@@ -86,6 +114,12 @@ class TransformNode(USDNode):
             override_prim.GetReferences().AddReference(input_stage.GetRootLayer().realPath,
                                                        prim.GetPath())
 
+        UsdGeom.Xform.Get(stage, root_xform.GetPath()).AddTransformOp()
+        root_prim.GetAttribute('xformOp:transform').Set(Gf.Matrix4d(self.get_matrix().transposed()))
+
+        return stage
+
+    def get_matrix(self):
         translation = Matrix.Translation((self.translation[:3]))
 
         diagonal = Matrix.Diagonal((self.scale[:3])).to_4x4()
@@ -94,12 +128,7 @@ class TransformNode(USDNode):
         rotation_y = Matrix.Rotation(self.rotation[1], 4, 'Y')
         rotation_z = Matrix.Rotation(self.rotation[2], 4, 'Z')
 
-        transform = translation @ rotation_x @ rotation_y @ rotation_z @ diagonal
-
-        UsdGeom.Xform.Get(stage, root_xform.GetPath()).AddTransformOp()
-        root_prim.GetAttribute('xformOp:transform').Set(Gf.Matrix4d(transform.transposed()))
-
-        return stage
+        return translation @ rotation_x @ rotation_y @ rotation_z @ diagonal
 
 
 class TransformByEmptyNode(USDNode):
@@ -108,6 +137,9 @@ class TransformByEmptyNode(USDNode):
     bl_label = "Transform by Empty object"
     bl_icon = "OBJECT_ORIGIN"
 
+    is_memoizable = False
+    follows_input_edits = True
+
     def update_data(self, context):
         for sel_obj in context.selected_objects:
             sel_obj.select_set(False)
@@ -175,7 +207,13 @@ class TransformByEmptyNode(USDNode):
         if not self.object:
             return
 
-        obj = next((update.id for update in depsgraph.updates if isinstance(update.id, bpy.types.Object)
-                    and not update.id.hdusd.is_usd and update.id.name == self.object.name), None)
-        if obj:
-            self.reset()
+        update = next((update for update in depsgraph.updates if isinstance(update.id, bpy.types.Object)
+                       and not update.id.hdusd.is_usd and update.id.name == self.object.name), None)
+        if not update:
+            return
+
+        if update.is_updated_transform and not update.is_updated_geometry and \
+                set_root_transform(self, get_transform(self.object.evaluated_get(depsgraph))):
+            return
+
+        self.reset()
@@ -13,16 +13,126 @@
 # limitations under the License.
 # ********************************************************************
 import os
-import re
 
 import bpy
-from pxr import Usd, UsdGeom, Tf
+from pxr import Usd, UsdGeom, Sdf, Tf
 
 from .base_node import USDNode
 from . import log
-from ...utils.usd import set_timesamples_for_stage
+from .. import evaluator
+from ...utils import stage_cache
+from ...utils.path_matcher import compile_patterns
+from ...utils.usd import set_timesamples_for_stage, set_value_clips, get_file_info, \
+    get_layer_file_paths
 from ...viewport.usd_collection import USD_CAMERA
 from ...export.camera import CameraData
+from ... import config
+
+
+# layer metadata which is copied to the stage which uses USD file as sublayer
+LAYER_METADATA = ('startTimeCode', 'endTimeCode', 'timeCodesPerSecond', 'framesPerSecond',
+                  'upAxis', 'metersPerUnit', 'defaultPrim')
+
+
+def flatten_usd_file(file_path):
+    """Opens USD file and returns flattened layer of composed stage. Doesn't access bpy data"""
+    return Usd.Stage.Open(file_path).Flatten(False)
+
+
+def open_usd_file(file_path, filter_path, is_lazy):
+    """
+    Opens USD file for searching prims by filter_path. Doesn't access bpy data.
+    In lazy mode stage is opened with population mask derived from filter_path
+    and without loading payloads, they are loaded during search only where it's required.
+    """
+    if not is_lazy:
+        return Usd.Stage.Open(file_path)
+
+    return Usd.Stage.OpenMasked(file_path, get_population_mask(filter_path), Usd.Stage.LoadNone)
+
+
+def get_population_mask(filter_path):
+    """Returns population mask by constant prefix of filter_path, e.g. '/World/Geo*/**' -> '/World'"""
+    prefix = []
+    for name in filter_path.split('/')[1:]:
+        if not name or '*' in name:
+            break
+
+        prefix.append(name)
+
+    if not prefix:
+        return Usd.StagePopulationMask.All()
+
+    mask = Usd.StagePopulationMask()
+    mask.Add(Sdf.Path('/' + '/'.join(prefix)))
+    return mask
+
+
+def get_load_rules(prims, loaded_paths):
+    """
+    Returns load rules of stage which references prims as its root prims:
+    only payloads under the prims, which were loaded by search, are loaded
+    """
+    rules = Usd.StageLoadRules.LoadNone()
+    for prim in prims:
+        prim_path = prim.GetPath()
+        root_path = Sdf.Path.absoluteRootPath.AppendChild(prim.GetName())
+        for path in loaded_paths:
+            if path.HasPrefix(prim_path):
+                rules.AddRule(path.ReplacePrefix(prim_path, root_path), Usd.StageLoadRules.OnlyRule)
+
+    return rules
+
+
+# modification times of files watched by nodes: {(nodetree name, node name): {file path: mtime}}
+_watched_files = {}
+
+
+def get_mtime(file_path):
+    return os.path.getmtime(file_path) if os.path.isfile(file_path) else None
+
+
+def watch_files():
+    """Timer function which checks files of USD File nodes with enabled watch mode"""
+    from ..node_tree import USDTree
+
+    nodes = tuple(node for nodetree in bpy.data.node_groups if isinstance(nodetree, USDTree)
+                  for node in nodetree.nodes if isinstance(node, UsdFileNode) and node.is_watch_file)
+    if not nodes:
+        _watched_files.clear()
+        return None
+
+    for node in nodes:
+        files = _watched_files.get(node.watch_key)
+        if files is None:
+            node.update_watched_files()
+            continue
+
+        changed_paths = tuple(path for path, mtime in files.items() if get_mtime(path) != mtime)
+        if changed_paths:
+            node.reload_files(changed_paths)
+
+    return config.usd_file_watch_interval
+
+
+class HDUSD_USD_NODETREE_OP_usd_file_info(bpy.types.Operator):
+    """Show USD file info"""
+    bl_idname = "hdusd.usd_nodetree_usd_file_info"
+    bl_label = ""
+
+    file_path: bpy.props.StringProperty(default="")
+
+    @classmethod
+    def description(cls, context, properties):
+        info = get_file_info(bpy.path.abspath(properties.file_path))
+        return str(info) if info else "Couldn't read USD file info"
+
+    def execute(self, context):
+        info = get_file_info(bpy.path.abspath(self.file_path))
+        if info:
+            self.report({'INFO'}, str(info).replace('\n', ", "))
+
+        return {'FINISHED'}
 
 
 class UsdFileNode(USDNode):
@@ -51,6 +161,11 @@ class UsdFileNode(USDNode):
 
         self.update_data(context)
 
+    def update_watch_file(self, context):
+        _watched_files.pop(self.watch_key, None)
+        if self.is_watch_file:
+            self.update_watched_files()
+
     def update_filename(self, context):
         if not self.filename:
             return None
@@ -59,10 +174,12 @@ class UsdFileNode(USDNode):
         if not os.path.isfile(file_path):
             return None
 
-        input_stage = Usd.Stage.Open(file_path)
+        info = get_file_info(file_path)
+        if not info:
+            return None
 
-        self['frame_start'] = int(input_stage.GetMetadata('startTimeCode'))
-        self['frame_end'] = int(input_stage.GetMetadata('endTimeCode'))
+        self['frame_start'] = int(info.start_time_code)
+        self['frame_end'] = int(info.end_time_code)
 
         self.update_data(context)
 
@@ -79,6 +196,30 @@ class UsdFileNode(USDNode):
         default='/*',
         update=update_data
     )
+    load_mode: bpy.props.EnumProperty(
+        name="Load",
+        description="USD file loading mode",
+        items=(('FLATTEN', "Flatten", "Flatten whole USD file into memory"),
+               ('LAZY', "Lazy", "Keep composition arcs of USD file instead of flattening it into "
+                                "memory. Pattern search composes only prims under constant prefix "
+                                "of the pattern and loads only payloads required by the search")),
+        default='FLATTEN',
+        update=update_data
+    )
+    is_load_payloads: bpy.props.BoolProperty(
+        name="Load payloads",
+        description="Load payloads of output prims in lazy mode. Unloaded payloads aren't composed "
+                    "and their prims are rendered empty. Next nodes, which reference this stage, "
+                    "load payloads by their own rules",
+        default=True,
+        update=update_data
+    )
+    is_watch_file: bpy.props.BoolProperty(
+        name="Watch file",
+        description="Reload USD file and its sublayers when they are changed on disk",
+        default=False,
+        update=update_watch_file
+    )
     is_import_animation: bpy.props.BoolProperty(
         name="Import animation",
         description="Import animation",
@@ -104,10 +245,36 @@ class UsdFileNode(USDNode):
         set=set_frame_end, get=get_frame_end,
         update=update_data
     )
+    frame_offset: bpy.props.FloatProperty(
+        name="Frame offset",
+        description="Offset of imported animation in frames",
+        default=0.0,
+        update=update_data
+    )
+    retime_mode: bpy.props.EnumProperty(
+        name="Retime",
+        description="How frame offset and frames are applied to animation",
+        items=(('SAMPLES', "Time Samples", "Rewrite time samples"),
+               ('LAYER_OFFSET', "Layer Offset", "Apply frame offset as layer offset of USD file, "
+                                                "time samples aren't rewritten, frames set only time range"),
+               ('VALUE_CLIPS', "Value Clips", "Apply frame offset and frames by value clips of USD file, "
+                                              "time samples aren't rewritten")),
+        default='SAMPLES',
+        update=update_data
+    )
 
     def draw_buttons(self, context, layout):
-        layout.prop(self, 'filename')
+        row = layout.row(align=True)
+        row.prop(self, 'filename')
+        if self.filename:
+            op = row.operator(HDUSD_USD_NODETREE_OP_usd_file_info.bl_idname, icon='INFO')
+            op.file_path = self.filename
+
         layout.prop(self, 'filter_path')
+        layout.prop(self, 'load_mode')
+        if self.load_mode == 'LAZY':
+            layout.prop(self, 'is_load_payloads')
+        layout.prop(self, 'is_watch_file')
         layout.prop(self, 'is_import_animation')
 
         if self.is_import_animation:
@@ -118,44 +285,202 @@ class UsdFileNode(USDNode):
             row.prop(self, 'frame_start')
             row.prop(self, 'frame_end')
 
-    def compute(self, **kwargs):
+        if self.is_import_animation:
+            layout.prop(self, 'frame_offset')
+            layout.prop(self, 'retime_mode')
+
+    @property
+    def is_composed_retime(self):
+        """Animation is retimed by composition arcs instead of rewriting time samples"""
+        return self.is_import_animation and self.retime_mode != 'SAMPLES'
+
+    @property
+    def is_own_data(self):
+        """Root layer of full stage contains copied or retimed data of the file"""
+        if self.is_composed_retime:
+            return self.load_mode == 'FLATTEN'
+
+        return self.load_mode == 'FLATTEN' or not self.is_import_animation or \
+            self.is_restrict_frames or self.frame_offset != 0.0
+
+    @property
+    def watch_key(self):
+        return self.id_data.name, self.name
+
+    def update_watched_files(self):
+        file_path = bpy.path.abspath(self.filename)
+        _watched_files[self.watch_key] = {path: get_mtime(path)
+                                          for path in get_layer_file_paths(file_path)}
+
+        if not bpy.app.timers.is_registered(watch_files):
+            bpy.app.timers.register(watch_files, first_interval=config.usd_file_watch_interval,
+                                    persistent=True)
+
+    def reload_files(self, file_paths):
+        """
+        Reloads only changed layers and lets Hydra pick up the changes.
+        Stage is treated as edited in place, so only next nodes which copy it are reset.
+        """
+        log("Reloading changed files", file_paths, self)
+        self.update_watched_files()
+
+        stage = self.cached_stage()
+        if not stage:
+            self.reset(True)
+            return
+
+        prim_paths = set(prim.GetPath() for prim in stage.TraverseAll())
+
+        for path in file_paths:
+            layer = Sdf.Layer.Find(path)
+            if layer:
+                layer.Reload()
+
+        if self.filter_path == '/*' and self.is_own_data:
+            # root layer contains copied or overridden data of the file, so it has to be refilled
+            self._sync_full_stage(stage, bpy.path.abspath(self.filename))
+
+        is_prims_changed = set(prim.GetPath() for prim in stage.TraverseAll()) != prim_paths
+        if is_prims_changed and self.filter_path != '/*':
+            # other prims could match the pattern now
+            self.reset(True)
+            return
+
+        if is_prims_changed:
+            self.hdusd.usd_list.update_view()
+
+        # next nodes which copy the stage are reset, nodes which follow it are kept
+        self.stage_edited(stage, is_prims_changed)
+
+    def node_computed(self):
+        if self.is_watch_file:
+            self.update_watched_files()
+
+    def get_memo_props(self):
+        # file modification time is added to recompute node if file was changed
+        file_path = bpy.path.abspath(self.filename)
+        mtime = os.path.getmtime(file_path) if os.path.isfile(file_path) else None
+        return super().get_memo_props() + (('mtime', mtime),)
+
+    def get_input_files(self):
+        if not self.filename:
+            return ()
+
+        return get_layer_file_paths(bpy.path.abspath(self.filename))
+
+    def get_prefetch_task(self):
         if not self.filename:
             return None
 
         file_path = bpy.path.abspath(self.filename)
         if not os.path.isfile(file_path):
-            log.warn("Couldn't find USD file", self.filename, self)
             return None
 
-        input_stage = Usd.Stage.Open(file_path)
-        root_layer = input_stage.GetRootLayer()
-        root_layer.TransferContent(input_stage.Flatten(False))
+        key = self.get_memo_key()
+        if key and stage_cache.memo.get(key):
+            return None
 
-        if self.filter_path == '/*':
-            set_timesamples_for_stage(input_stage,
+        is_lazy = self.load_mode == 'LAZY'
+        filter_path = self.filter_path
+        if filter_path != '/*':
+            return lambda: open_usd_file(file_path, filter_path, is_lazy)
+
+        if not is_lazy:
+            return lambda: flatten_usd_file(file_path)
+
+        return None
+
+    def _sync_full_stage(self, stage, file_path, flat_layer=None):
+        """Fills root layer of the stage with whole USD file"""
+        root_layer = stage.GetRootLayer()
+
+        if self.load_mode == 'LAZY' or self.is_composed_retime:
+            # file (or its flattened layer) is used as sublayer, so all its composition arcs
+            # are kept and changes of time samples are authored over it in our root layer
+            root_layer.Clear()
+            if self.load_mode == 'LAZY':
+                # rules are set before composition, so unloaded payloads aren't composed at all
+                stage.SetLoadRules(Usd.StageLoadRules.LoadAll() if self.is_load_payloads else
+                                   Usd.StageLoadRules.LoadNone())
+
+            file_layer = Sdf.Layer.FindOrOpen(file_path) if self.load_mode == 'LAZY' else \
+                (flat_layer or flatten_usd_file(file_path))
+            for key in LAYER_METADATA:
+                if file_layer.pseudoRoot.HasInfo(key):
+                    root_layer.pseudoRoot.SetInfo(key, file_layer.pseudoRoot.GetInfo(key))
+
+            root_layer.subLayerPaths.append(file_layer.identifier)
+            if self.is_composed_retime and self.retime_mode == 'LAYER_OFFSET':
+                root_layer.subLayerOffsets[0] = Sdf.LayerOffset(self.frame_offset)
+
+        else:
+            root_layer.TransferContent(flat_layer or flatten_usd_file(file_path))
+
+        if self.is_composed_retime and self.retime_mode == 'VALUE_CLIPS':
+            # root prims with unloaded payloads are included
+            for prim in stage.GetPseudoRoot().GetFilteredChildren(
+                    Usd.PrimIsActive & Usd.PrimIsDefined & ~Usd.PrimIsAbstract):
+                self._set_value_clips(prim, file_path, prim.GetPath())
+
+        self._set_timesamples(stage)
+
+    def _set_value_clips(self, prim, file_path, clip_prim_path):
+        set_value_clips(prim, file_path, clip_prim_path,
+                        is_restrict_frames=self.is_restrict_frames,
+                        start=self.frame_start,
+                        end=self.frame_end,
+                        offset=self.frame_offset)
+
+    def _set_timesamples(self, stage):
+        if not self.is_composed_retime:
+            set_timesamples_for_stage(stage,
                                       is_use_animation=self.is_import_animation,
                                       is_restrict_frames=self.is_restrict_frames,
                                       start=self.frame_start,
-                                      end=self.frame_end)
+                                      end=self.frame_end,
+                                      offset=self.frame_offset)
+            return
 
-            self.cached_stage.insert(input_stage)
-            return input_stage
+        # time samples are retimed by composition, only time range of the stage is set
+        if self.is_restrict_frames:
+            stage.SetMetadata('startTimeCode', self.frame_start)
+            stage.SetMetadata('endTimeCode', self.frame_end)
+        else:
+            stage.SetMetadata('startTimeCode', stage.GetStartTimeCode() + self.frame_offset)
+            stage.SetMetadata('endTimeCode', stage.GetEndTimeCode() + self.frame_offset)
 
-        # creating search regex pattern and getting filtered rpims
-        prog = re.compile(self.filter_path.replace('*', '#')        # temporary replacing '*' to '#'
-                          .replace('/', '\/')       # for correct regex pattern
-                          .replace('##', '[\w\/]*') # creation
-                          .replace('#', '\w*'))
+    def compute(self, **kwargs):
+        if not self.filename:
+            return None
+
+        file_path = bpy.path.abspath(self.filename)
+        if not os.path.isfile(file_path):
+            log.warn("Couldn't find USD file", self.filename, self)
+            return None
 
-        def get_child_prims(prim):
-            if not prim.IsPseudoRoot() and prog.fullmatch(str(prim.GetPath())):
-                yield prim
-                return
+        is_lazy = self.load_mode == 'LAZY'
 
-            for child in prim.GetAllChildren():
-                yield from get_child_prims(child)
+        if self.filter_path == '/*':
+            stage = self.cached_stage.create()
+            self._sync_full_stage(stage, file_path, evaluator.pop_prefetched(self))
+            return stage
+
+        input_stage = evaluator.pop_prefetched(self) or \
+                      open_usd_file(file_path, self.filter_path, is_lazy)
+
+        matcher = compile_patterns(self.filter_path, False)
+        loaded_paths = set()
+        while True:
+            unloaded = [] if is_lazy else None
+            prims = tuple(matcher.get_prims(input_stage, unloaded))
+            paths_to_load = set(unloaded or ()) - loaded_paths
+            if not paths_to_load:
+                break
+
+            # loading payloads only where search has to go inside them
+            input_stage.LoadAndUnload(paths_to_load, set(), Usd.LoadWithoutDescendants)
+            loaded_paths |= paths_to_load
 
-        prims = tuple(get_child_prims(input_stage.GetPseudoRoot()))
         if not prims:
             return None
 
@@ -167,16 +492,24 @@ class UsdFileNode(USDNode):
         stage.SetMetadata('startTimeCode', input_stage.GetStartTimeCode())
         stage.SetMetadata('endTimeCode', input_stage.GetEndTimeCode())
 
+        layer_offset = Sdf.LayerOffset(self.frame_offset) \
+            if self.is_composed_retime and self.retime_mode == 'LAYER_OFFSET' else Sdf.LayerOffset()
+
+        if is_lazy:
+            # all payloads of matched prims are loaded or they stay unloaded like in searched stage,
+            # rules are set before references are added, so unloaded payloads aren't composed at all
+            stage.SetLoadRules(Usd.StageLoadRules.LoadAll() if self.is_load_payloads else
+                               get_load_rules(prims, loaded_paths))
+
         root_prim = stage.GetPseudoRoot()
         for i, prim in enumerate(prims, 1):
             override_prim = stage.OverridePrim(root_prim.GetPath().AppendChild(prim.GetName()))
-            override_prim.GetReferences().AddReference(input_stage.GetRootLayer().realPath, prim.GetPath())
+            override_prim.GetReferences().AddReference(input_stage.GetRootLayer().realPath, prim.GetPath(),
+                                                       layer_offset)
+            if self.is_composed_retime and self.retime_mode == 'VALUE_CLIPS':
+                self._set_value_clips(override_prim, file_path, prim.GetPath())
 
-        set_timesamples_for_stage(stage,
-                                  is_use_animation=self.is_import_animation,
-                                  is_restrict_frames=self.is_restrict_frames,
-                                  start=self.frame_start,
-                                  end=self.frame_end)
+        self._set_timesamples(stage)
 
         return stage
 
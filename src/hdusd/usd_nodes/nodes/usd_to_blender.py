@@ -12,31 +12,340 @@
 # See the License for the specific language governing permissions and
 # limitations under the License.
 # ********************************************************************
+import math
+import time
+from dataclasses import dataclass
+
+import numpy as np
+
 import bpy
+import mathutils
+from pxr import Usd, UsdGeom, Sdf
+
 from .base_node import USDNode
 from . import log
 
 
+# custom property of imported objects, keeps path of source prim
+USD_PATH_PROP = 'usd_path'
+
+UV_TYPES = (Sdf.ValueTypeNames.TexCoord2fArray, Sdf.ValueTypeNames.Float2Array)
+
+
+@dataclass(init=False)
+class MeshData:
+    """Arrays of UsdGeom.Mesh prepared for bulk creation of Blender mesh"""
+
+    points: np.ndarray
+    face_counts: np.ndarray
+    loop_starts: np.ndarray
+    vertex_indices: np.ndarray
+    normals: np.ndarray
+    uvs: dict
+
+    @staticmethod
+    def from_prim(prim, time_code):
+        usd_mesh = UsdGeom.Mesh(prim)
+
+        data = MeshData()
+        data.points = np.array(usd_mesh.GetPointsAttr().Get(time_code) or [], dtype=np.float32)
+        data.face_counts = np.array(usd_mesh.GetFaceVertexCountsAttr().Get(time_code) or [],
+                                    dtype=np.int32)
+        data.vertex_indices = np.array(usd_mesh.GetFaceVertexIndicesAttr().Get(time_code) or [],
+                                       dtype=np.int32)
+        data.loop_starts = (np.cumsum(data.face_counts) - data.face_counts).astype(np.int32)
+
+        if len(data.vertex_indices) != data.face_counts.sum() or \
+                (len(data.vertex_indices) and data.vertex_indices.max() >= len(data.points)):
+            log.warn("Invalid face vertex indices", prim)
+            data.face_counts = data.loop_starts = data.vertex_indices = np.empty(0, dtype=np.int32)
+
+        # Blender faces are always right handed, so winding order of left handed faces is reversed
+        loops_order = None
+        if usd_mesh.GetOrientationAttr().Get(time_code) == UsdGeom.Tokens.leftHanded:
+            loops_order = get_reversed_loops_order(data.face_counts, data.loop_starts)
+            data.vertex_indices = data.vertex_indices[loops_order]
+
+        primvars_api = UsdGeom.PrimvarsAPI(prim)
+
+        data.normals = None
+        normals_primvar = primvars_api.GetPrimvar('normals')
+        if normals_primvar and normals_primvar.HasValue():
+            data.normals = data.get_loop_values(normals_primvar.ComputeFlattened(time_code),
+                                                normals_primvar.GetInterpolation(), loops_order)
+        elif usd_mesh.GetNormalsAttr().HasValue():
+            data.normals = data.get_loop_values(usd_mesh.GetNormalsAttr().Get(time_code),
+                                                usd_mesh.GetNormalsInterpolation(), loops_order)
+
+        data.uvs = {}
+        for primvar in primvars_api.GetPrimvars():
+            if primvar.GetTypeName() not in UV_TYPES or not primvar.HasValue():
+                continue
+
+            uv = data.get_loop_values(primvar.ComputeFlattened(time_code),
+                                      primvar.GetInterpolation(), loops_order)
+            if uv is not None:
+                data.uvs[primvar.GetPrimvarName()] = uv
+
+        return data
+
+    def get_loop_values(self, values, interpolation, loops_order):
+        """Converts primvar values of any interpolation to per face corner values"""
+        if values is None:
+            return None
+
+        values = np.array(values, dtype=np.float32)
+        if not len(values):
+            return None
+
+        loops_count = len(self.vertex_indices)
+        if interpolation == UsdGeom.Tokens.faceVarying:
+            if len(values) != loops_count:
+                return None
+
+            return values[loops_order] if loops_order is not None else values
+
+        if interpolation in (UsdGeom.Tokens.vertex, UsdGeom.Tokens.varying):
+            if len(values) != len(self.points):
+                return None
+
+            # vertex indices are already reordered
+            return values[self.vertex_indices]
+
+        if interpolation == UsdGeom.Tokens.uniform:
+            if len(values) != len(self.face_counts):
+                return None
+
+            return np.repeat(values, self.face_counts, axis=0)
+
+        if interpolation == UsdGeom.Tokens.constant:
+            return np.tile(values[0], (loops_count, 1))
+
+        return None
+
+    @property
+    def vertices_count(self):
+        return len(self.points)
+
+    def create_mesh(self, name):
+        """Creates Blender mesh using bulk foreach_set() calls"""
+        mesh = bpy.data.meshes.new(name)
+
+        mesh.vertices.add(len(self.points))
+        mesh.vertices.foreach_set('co', self.points.ravel())
+
+        mesh.loops.add(len(self.vertex_indices))
+        mesh.loops.foreach_set('vertex_index', self.vertex_indices)
+
+        mesh.polygons.add(len(self.face_counts))
+        mesh.polygons.foreach_set('loop_start', self.loop_starts)
+        mesh.polygons.foreach_set('loop_total', self.face_counts)
+
+        for uv_name, uv in self.uvs.items():
+            uv_layer = mesh.uv_layers.new(name=uv_name)
+            uv_layer.data.foreach_set('uv', uv.ravel())
+
+        mesh.update(calc_edges=True)
+
+        # removing degenerate faces, after that custom normals can't be matched with loops
+        if mesh.validate(clean_customdata=False):
+            log.warn("Invalid geometry was removed", name)
+
+        elif self.normals is not None:
+            mesh.use_auto_smooth = True
+            mesh.normals_split_custom_set(self.normals)
+
+        return mesh
+
+
+def get_reversed_loops_order(face_counts, loop_starts):
+    """Returns permutation of face corners which reverses winding order of every face"""
+    loops = np.arange(face_counts.sum(), dtype=np.int32)
+    starts = np.repeat(loop_starts, face_counts)
+    counts = np.repeat(face_counts, face_counts)
+    return 2 * starts + counts - 1 - loops
+
+
+def get_stage_correction(stage):
+    """Returns matrix which converts stage units and up axis to Blender's"""
+    scale = UsdGeom.GetStageMetersPerUnit(stage)
+    matrix = mathutils.Matrix.Scale(scale, 4)
+    if UsdGeom.GetStageUpAxis(stage) == UsdGeom.Tokens.y:
+        matrix = mathutils.Matrix.Rotation(math.pi / 2, 4, 'X') @ matrix
+
+    return matrix
+
+
+def to_matrix(gf_matrix):
+    return mathutils.Matrix(gf_matrix).transposed()
+
+
+class StageImporter:
+    """
+    Imports meshes of USD stage to Blender objects parented to root object.
+    Meshes are read once per source prim: instance proxies are read from their prototypes,
+    PointInstancer prototypes are read once for all their instances.
+    """
+
+    def __init__(self, stage, root_obj, collection, is_share_meshes, time_code):
+        self.stage = stage
+        self.root_obj = root_obj
+        self.collection = collection
+        self.is_share_meshes = is_share_meshes
+        self.time_code = time_code
+
+        self.xform_cache = UsdGeom.XformCache(time_code)
+        self.correction = get_stage_correction(stage)
+
+        self.meshes_data = {}
+        self.meshes = {}
+        self.objects_count = 0
+        self.vertices_count = 0
+
+    def get_mesh(self, prim):
+        source_prim = prim.GetPrimInPrototype() if prim.IsInstanceProxy() else prim
+        key = source_prim.GetPath()
+
+        mesh = self.meshes.get(key)
+        if mesh:
+            return mesh if self.is_share_meshes else mesh.copy()
+
+        data = self.meshes_data.get(key)
+        if not data:
+            data = self.meshes_data[key] = MeshData.from_prim(source_prim, self.time_code)
+            self.vertices_count += data.vertices_count
+
+        mesh = self.meshes[key] = data.create_mesh(source_prim.GetName())
+        return mesh
+
+    def add_object(self, prim, gf_matrix):
+        obj = bpy.data.objects.new(prim.GetName(), self.get_mesh(prim))
+        obj[USD_PATH_PROP] = str(prim.GetPath())
+        self.collection.objects.link(obj)
+
+        obj.parent = self.root_obj
+        obj.matrix_basis = self.correction @ to_matrix(gf_matrix)
+
+        self.objects_count += 1
+
+    def import_point_instancer(self, prim):
+        instancer = UsdGeom.PointInstancer(prim)
+        proto_paths = instancer.GetPrototypesRel().GetTargets()
+        proto_indices = instancer.GetProtoIndicesAttr().Get(self.time_code)
+        if not proto_paths or not proto_indices:
+            return
+
+        transforms = instancer.ComputeInstanceTransformsAtTime(self.time_code, self.time_code)
+        instancer_matrix = self.xform_cache.GetLocalToWorldTransform(prim)
+
+        # meshes of each prototype with their transforms relative to prototype root
+        protos = []
+        for proto_path in proto_paths:
+            proto_prim = self.stage.GetPrimAtPath(proto_path)
+            protos.append(tuple(
+                (mesh_prim, self.xform_cache.ComputeRelativeTransform(mesh_prim, proto_prim)[0])
+                for mesh_prim in Usd.PrimRange(proto_prim, Usd.TraverseInstanceProxies())
+                if mesh_prim.IsA(UsdGeom.Mesh)))
+
+        for proto_index, transform in zip(proto_indices, transforms):
+            if proto_index >= len(protos):
+                continue
+
+            for mesh_prim, matrix in protos[proto_index]:
+                self.add_object(mesh_prim, matrix * transform * instancer_matrix)
+
+    def import_stage(self):
+        prims = iter(Usd.PrimRange(self.stage.GetPseudoRoot(), Usd.TraverseInstanceProxies()))
+        for prim in prims:
+            if prim.IsA(UsdGeom.PointInstancer):
+                self.import_point_instancer(prim)
+                prims.PruneChildren()
+                continue
+
+            if prim.IsA(UsdGeom.Mesh):
+                self.add_object(prim, self.xform_cache.GetLocalToWorldTransform(prim))
+
+
+def remove_imported_objects(root_obj):
+    meshes = set()
+    for obj in root_obj.children_recursive if hasattr(root_obj, 'children_recursive') \
+            else root_obj.children:
+        if USD_PATH_PROP not in obj:
+            continue
+
+        if obj.type == 'MESH':
+            meshes.add(obj.data)
+
+        bpy.data.objects.remove(obj)
+
+    for mesh in meshes:
+        if not mesh.users:
+            bpy.data.meshes.remove(mesh)
+
+
+class HDUSD_USD_NODETREE_OP_usd_to_blender_import(bpy.types.Operator):
+    """Import meshes of input USD stage to Blender objects"""
+    bl_idname = "hdusd.usd_nodetree_usd_to_blender_import"
+    bl_label = "Import"
+
+    def execute(self, context):
+        node = context.node
+        stage = node.cached_stage()
+        if not stage:
+            log.warn("Nothing to import", node)
+            return {'CANCELLED'}
+
+        node.import_stage(stage, context.scene)
+        return {'FINISHED'}
+
+
 class USDToBlenderNode(USDNode):
     """Import USD to blender"""
-    
+
     bl_idname = 'usd.USDToBlenderNode'
     bl_label = "Insert USD to Blender"
 
     output_name = ""
+    is_memoizable = False
+    follows_input_edits = True
 
-    write_type: bpy.props.EnumProperty( 
+    write_type: bpy.props.EnumProperty(
         name='Type',
-        items=(('REFERENCE', 'Reference', "Load Data as Reference"),
-               ('COPY', 'Copy', "Copy data into Blender")), 
+        items=(('REFERENCE', 'Reference', "Load Data as Reference, instanced prims share mesh data"),
+               ('COPY', 'Copy', "Copy data into Blender, every object gets its own mesh data")),
         default='REFERENCE')
-    object_pointer: bpy.props.PointerProperty(name='Object', type=bpy.types.Object)
+    object_pointer: bpy.props.PointerProperty(
+        name='Object', type=bpy.types.Object,
+        description="Root object of imported objects, it is created if not set. "
+                    "Objects imported previously are replaced")
 
     def draw_buttons(self, context, layout):
         layout.prop(self, 'write_type')
         layout.prop(self, 'object_pointer')
+        layout.operator(HDUSD_USD_NODETREE_OP_usd_to_blender_import.bl_idname, icon='IMPORT')
 
     def compute(self, **kwargs):
-        log("Reading Blend Data")
-        # TODO: Implement
-        return None
+        return self.get_input_link('Input', **kwargs)
+
+    def import_stage(self, stage, scene):
+        root_obj = self.object_pointer
+        if root_obj:
+            remove_imported_objects(root_obj)
+        else:
+            root_obj = bpy.data.objects.new(self.name, None)
+            scene.collection.objects.link(root_obj)
+            self.object_pointer = root_obj
+
+        collection = root_obj.users_collection[0] if root_obj.users_collection else \
+            scene.collection
+
+        start_time = time.perf_counter()
+
+        importer = StageImporter(stage, root_obj, collection, self.write_type == 'REFERENCE',
+                                 scene.frame_current)
+        importer.import_stage()
+
+        import_time = time.perf_counter() - start_time
+        log.info(f"Imported {importer.objects_count} objects, {len(importer.meshes)} meshes, "
+                 f"{importer.vertices_count} vertices in {import_time:.3f}s "
+                 f"({importer.vertices_count / max(import_time, 1e-6):.0f} vertices/sec)")
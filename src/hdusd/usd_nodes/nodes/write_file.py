@@ -12,10 +12,158 @@
 # See the License for the specific language governing permissions and
 # limitations under the License.
 # ********************************************************************
+import os
+import time
+import hashlib
+import threading
+
 import bpy
 
 from .base_node import USDNode
+from . import log
 from ...utils.usd import set_timesamples_for_stage
+from ... import config
+
+
+# interval of polling of file writers on main thread
+WRITERS_POLL_INTERVAL = 0.1
+
+
+class FileWriter:
+    """
+    Writes snapshot layer to file in background thread. Writes are debounced on main thread,
+    skipped if content wasn't changed since last write and done atomically via temp file.
+    """
+
+    def __init__(self):
+        self.lock = threading.Lock()    # guards status
+        self.stage = None               # stage waiting to be written
+        self.file_path = None
+        self.write_time = 0.0
+        self.thread = None
+        self.content_hash = None
+        self.written_path = None
+        self._status = ""
+        self.is_status_changed = False
+
+    @property
+    def status(self):
+        with self.lock:
+            return self._status
+
+    @status.setter
+    def status(self, value):
+        with self.lock:
+            self._status = value
+            self.is_status_changed = True
+
+    def write(self, stage, file_path):
+        """Schedules write of the stage, is called on main thread"""
+        self.stage = stage
+        self.file_path = file_path
+        self.write_time = time.monotonic() + config.usd_write_file_delay
+        self.status = "Pending"
+
+        if not bpy.app.timers.is_registered(_update_writers):
+            bpy.app.timers.register(_update_writers, first_interval=0.0, persistent=True)
+
+    def update(self):
+        """
+        Starts write of pending stage when delay is passed and previous write is finished,
+        is called on main thread. Returns (is busy, is status changed since last call).
+        """
+        is_writing = self.thread is not None and self.thread.is_alive()
+        if self.stage and not is_writing and time.monotonic() >= self.write_time:
+            # stage is flattened on main thread, background thread gets its own layer
+            layer = self.stage.Flatten(False)
+            self.thread = threading.Thread(target=self._write, args=(layer, self.file_path),
+                                           daemon=True)
+            self.stage = None
+            self.thread.start()
+            is_writing = True
+
+        is_busy = is_writing or self.stage is not None
+        with self.lock:
+            is_status_changed = self.is_status_changed
+            self.is_status_changed = False
+
+        return is_busy, is_status_changed
+
+    def _write(self, layer, file_path):
+        self.status = "Writing"
+
+        time_start = time.perf_counter()
+        try:
+            # temp file keeps extension, because file format is chosen by it
+            root, ext = os.path.splitext(file_path)
+            temp_path = f"{root}.tmp{ext}"
+
+            if ext.lower() == '.usda':
+                data = layer.ExportToString().encode()
+                content_hash = hashlib.sha1(data).hexdigest()
+                if self._is_written(content_hash, file_path):
+                    return
+
+                with open(temp_path, 'wb') as f:
+                    f.write(data)
+
+            else:
+                # binary formats are serialized by their file format plugins
+                if not layer.Export(temp_path):
+                    raise RuntimeError(f"Couldn't export layer to {temp_path}")
+
+                with open(temp_path, 'rb') as f:
+                    content_hash = hashlib.sha1(f.read()).hexdigest()
+
+                if self._is_written(content_hash, file_path):
+                    os.remove(temp_path)
+                    return
+
+            os.replace(temp_path, file_path)
+
+            self.content_hash = content_hash
+            self.written_path = file_path
+            self.status = f"Written in {time.perf_counter() - time_start:.2f}s"
+            log("File written", file_path, self.status)
+
+        except Exception as e:
+            log.error("Couldn't write file", file_path, e)
+            self.status = f"Error: {e}"
+
+    def _is_written(self, content_hash, file_path):
+        if content_hash == self.content_hash and file_path == self.written_path and \
+                os.path.isfile(file_path):
+            self.status = "Not changed"
+            return True
+
+        return False
+
+
+# file writers of nodes: {(nodetree name, node name): FileWriter}
+_writers = {}
+
+
+def _update_writers():
+    """Timer on main thread: starts pending writes and redraws node editors to show status"""
+    is_busy = False
+    is_redraw = False
+    for writer in tuple(_writers.values()):
+        writer_busy, is_status_changed = writer.update()
+        is_busy |= writer_busy
+        is_redraw |= is_status_changed
+
+    if is_redraw:
+        for window in bpy.context.window_manager.windows:
+            for area in window.screen.areas:
+                if area.type == 'NODE_EDITOR':
+                    area.tag_redraw()
+
+    return WRITERS_POLL_INTERVAL if is_busy else None
+
+
+def unregister():
+    if bpy.app.timers.is_registered(_update_writers):
+        bpy.app.timers.unregister(_update_writers)
 
 
 class WriteFileNode(USDNode):
@@ -24,6 +172,8 @@ class WriteFileNode(USDNode):
     bl_label = "Write USD File"
     bl_icon = "FILE_TICK"
 
+    is_memoizable = False
+
     def set_frame_end(self, value):
         self['frame_end'] = self.frame_start if value < self.frame_start else value
 
@@ -71,6 +221,14 @@ class WriteFileNode(USDNode):
             row.prop(self, 'frame_start')
             row.prop(self, 'frame_end')
 
+        writer = _writers.get(self.writer_key)
+        if writer and writer.status:
+            layout.label(text=writer.status, icon='ERROR' if writer.status.startswith("Error") else 'INFO')
+
+    @property
+    def writer_key(self):
+        return self.id_data.name, self.name
+
     def compute(self, **kwargs):
         input_stage = self.get_input_link('Input', **kwargs)
 
@@ -93,6 +251,8 @@ class WriteFileNode(USDNode):
                                   start=self.frame_start,
                                   end=self.frame_end)
 
-        stage.Export(file_path)
+        # flattened snapshot of current state is written in background after delay
+        writer = _writers.setdefault(self.writer_key, FileWriter())
+        writer.write(stage, file_path)
 
         return stage
@@ -0,0 +1,158 @@
+# **********************************************************************
+# Copyright 2020 Advanced Micro Devices, Inc
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+# ********************************************************************
+"""
+Opt-in per-node profiler of USD nodetrees.
+
+USDNode.final_compute() measures its compute through profiler.measure(). Computes of input nodes
+are called inside of compute() of output node, therefore profiler keeps stack of running measures
+and subtracts time of nested computes to get self time of each node.
+"""
+import json
+import time
+from dataclasses import dataclass, asdict
+
+from pxr import Usd
+
+from .. import config
+from ..utils import stage_cache
+from . import log
+
+
+is_enabled = config.usd_nodes_profiling
+
+# {(nodetree name, node name): NodeStats}
+_stats = {}
+
+# total time of nested computes of currently running measures
+_nested_times = []
+
+
+@dataclass
+class NodeStats:
+    tree: str
+    node: str
+    calls: int = 0
+    memo_hits: int = 0
+    time: float = 0.0           # self time of node computes in seconds
+    total_time: float = 0.0     # time of node computes including computes of input nodes
+    last_time: float = 0.0
+    prims: int = 0
+    layers: int = 0
+    layer_size: int = 0         # size of output root layer in bytes
+
+
+class _Measure:
+    def __init__(self, node):
+        self.node = node
+
+    def __enter__(self):
+        _nested_times.append(0.0)
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        total_time = time.perf_counter() - self.start
+        self_time = total_time - _nested_times.pop()
+        if _nested_times:
+            _nested_times[-1] += total_time
+
+        stats = get_stats(self.node)
+        stats.calls += 1
+        stats.time += self_time
+        stats.total_time += total_time
+        stats.last_time = self_time
+
+
+class _NoMeasure:
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        pass
+
+
+def collect_stage_stats(node, stage):
+    """
+    Collects stats of computed output stage of the node. It's called after measure of the node,
+    time of collection is excluded from self time of running output node measure.
+    """
+    if not is_enabled or not stage:
+        return
+
+    start = time.perf_counter()
+
+    stats = get_stats(node)
+    stats.prims = sum(1 for _ in Usd.PrimRange.Stage(stage, Usd.PrimAllPrimsPredicate)) - 1
+    stats.layers = len(stage.GetUsedLayers())
+    size = stage_cache.memo.get_stage_size(stage)
+    stats.layer_size = size if size is not None else \
+        stage_cache.get_layer_size(stage.GetRootLayer())
+
+    if _nested_times:
+        _nested_times[-1] += time.perf_counter() - start
+
+
+def get_stats(node):
+    key = (node.id_data.name, node.name)
+    stats = _stats.get(key)
+    if not stats:
+        stats = _stats[key] = NodeStats(*key)
+
+    return stats
+
+
+def measure(node):
+    """Returns context manager which measures compute of the node if profiling is enabled"""
+    return _Measure(node) if is_enabled else _NoMeasure()
+
+
+def memo_hit(node):
+    if is_enabled:
+        get_stats(node).memo_hits += 1
+
+
+def enable(value):
+    global is_enabled
+
+    is_enabled = value
+    log("Profiling", "enabled" if value else "disabled")
+
+
+def clear(tree_name=None):
+    if tree_name is None:
+        _stats.clear()
+        return
+
+    for key in tuple(_stats):
+        if key[0] == tree_name:
+            del _stats[key]
+
+
+def tree_stats(tree_name):
+    """Returns stats of nodes of the nodetree sorted by cost"""
+    return sorted((stats for stats in _stats.values() if stats.tree == tree_name),
+                  key=lambda stats: stats.time, reverse=True)
+
+
+def export_json(file_path, tree_name=None):
+    if tree_name is None:
+        stats = sorted(_stats.values(), key=lambda stats: stats.time, reverse=True)
+    else:
+        stats = tree_stats(tree_name)
+
+    with open(file_path, 'w') as f:
+        json.dump([asdict(s) for s in stats], f, indent=2)
+
+    log.info(f"Profiling results of {len(stats)} nodes exported to {file_path}")
@@ -12,13 +12,30 @@
 # See the License for the specific language governing permissions and
 # limitations under the License.
 #********************************************************************
+import os
+import re
+import hashlib
+import shutil
+import threading
+import tempfile
+import functools
+import subprocess
 from pathlib import Path
+from concurrent import futures
+
+import numpy as np
 
 import bpy
 
 from . import get_temp_file
+from .. import config
 from . import log
 
+try:
+    import OpenImageIO as oiio
+except ImportError:
+    oiio = None
+
 
 SUPPORTED_FORMATS = {".png", ".jpeg", ".jpg", ".hdr", ".tga", ".bmp"}
 DEFAULT_FORMAT = ".hdr"
@@ -26,27 +43,226 @@ BLENDER_DEFAULT_FORMAT = "HDR"
 BLENDER_DEFAULT_COLOR_MODE = "RGB"
 READONLY_IMAGE_FORMATS = {".dds"}  # blender can read these formats, but can't write
 
+# colorspaces of image pixels which can be converted without Blender color management
+SRGB_COLORSPACES = {'sRGB'}
+LINEAR_COLORSPACES = {'Linear', 'Non-Color', 'Raw'}
 
-def cache_image_file(image: bpy.types.Image, cache_check=True):
-    image_path = Path(image.filepath_from_user())
-    if not image.packed_file and image.source != 'GENERATED':
-        if not image_path.is_file():
-            log.warn("Image is missing", image, image_path)
+TILED_FORMAT = ".tx"
+TILE_SIZE = 64
+HASH_CHUNK_SIZE = 1 << 22
+# images converted to image cache dir have content hash at the end of their names
+HASH_NAME_RE = re.compile(r'_([0-9a-f]{32})$')
+
+_executor = None
+# limits number of pixel arrays which are read for conversion, every conversion holds one slot
+_conversion_slots = None
+# tiled textures are made in separate pool, their tasks wait for conversions of source images
+_tiled_executor = None
+_lock = threading.Lock()
+# {converted file path: future} of conversions which are running in background
+_conversions = {}
+# {(file path, size, mtime): content hash}
+_file_hashes = {}
+# {image name_full: (image state, converted file path)}, pixels of image are read and hashed
+# again only if its state is changed
+_image_files = {}
+
+
+def image_cache_dir():
+    """
+    Returns dir of converted images. It is outside of temp dir, which is cleared on file load,
+    so converted images are reused between sessions.
+    """
+    d = Path(config.image_cache_dir) if config.image_cache_dir else \
+        Path(tempfile.gettempdir()) / "hdusd_image_cache"
+    d.mkdir(parents=True, exist_ok=True)
+    return d
+
+
+def _read_pixels(image):
+    """Returns image pixels as (height, width, channels) float32 array"""
+    width, height = image.size
+    channels = image.channels
+    if width == 0 or height == 0 or channels not in (1, 3, 4):
+        return None
+
+    pixels = np.empty(width * height * channels, dtype=np.float32)
+    image.pixels.foreach_get(pixels)
+    return pixels.reshape(height, width, channels)
+
+
+def _srgb_to_linear(rgb):
+    return np.where(rgb <= 0.04045, rgb / 12.92, ((rgb + 0.055) / 1.055) ** 2.4)
+
+
+def _write_hdr(file_path, rgb):
+    """Writes (height, width, 3) float array to Radiance .hdr file with flat RGBE scanlines"""
+    height, width = rgb.shape[:2]
+    max_val = rgb.max(axis=2)
+    mantissa, exponent = np.frexp(max_val)
+    scale = np.divide(mantissa * 256.0, max_val, out=np.zeros_like(max_val), where=max_val > 1e-32)
+
+    rgbe = np.empty((height, width, 4), dtype=np.uint8)
+    rgbe[..., :3] = np.clip(rgb * scale[..., None], 0, 255)
+    rgbe[..., 3] = np.where(max_val > 1e-32, exponent + 128, 0)
+
+    with open(file_path, 'wb') as f:
+        f.write(b"#?RADIANCE\nFORMAT=32-bit_rle_rgbe\n\n")
+        f.write(f"-Y {height} +X {width}\n".encode('ascii'))
+        f.write(rgbe.tobytes())
+
+
+def _convert_pixels(file_path, pixels, is_srgb):
+    """Worker of conversion pool, doesn't touch Blender data"""
+    rgb = pixels[..., :3] if pixels.shape[2] >= 3 else np.repeat(pixels[..., :1], 3, axis=2)
+    rgb = np.maximum(np.nan_to_num(rgb, nan=0.0, posinf=65504.0), 0.0)
+    if is_srgb:
+        rgb = _srgb_to_linear(rgb)
+
+    # Blender stores rows bottom to top
+    rgb = np.ascontiguousarray(rgb[::-1], dtype=np.float32)
+
+    tmp_path = file_path.with_name(f"{file_path.stem}_{threading.get_ident()}.tmp{file_path.suffix}")
+    if oiio:
+        out = oiio.ImageOutput.create(str(tmp_path))
+        out.open(str(tmp_path), oiio.ImageSpec(rgb.shape[1], rgb.shape[0], 3, oiio.FLOAT))
+        out.write_image(rgb)
+        out.close()
+    else:
+        _write_hdr(tmp_path, rgb)
+
+    os.replace(tmp_path, file_path)
+    return file_path
+
+
+def _convert_pixels_in_slot(file_path, pixels, is_srgb):
+    try:
+        return _convert_pixels(file_path, pixels, is_srgb)
+    finally:
+        _conversion_slots.release()
+
+
+def _get_executor():
+    global _executor, _conversion_slots
+    if _executor is None:
+        max_workers = config.image_conversion_threads or os.cpu_count()
+        _executor = futures.ThreadPoolExecutor(max_workers=max_workers,
+                                               thread_name_prefix="hdusd_image")
+        _conversion_slots = threading.BoundedSemaphore(max_workers)
+
+    return _executor
+
+
+def _get_tiled_executor():
+    global _tiled_executor
+    if _tiled_executor is None:
+        _tiled_executor = futures.ThreadPoolExecutor(
+            max_workers=config.image_conversion_threads or os.cpu_count(),
+            thread_name_prefix="hdusd_tiled_image")
+
+    return _tiled_executor
+
+
+def _get_image_state(image):
+    """Returns values which are changed when image pixels are changed, None if image is edited"""
+    if image.is_dirty:
+        return None
+
+    file_stat = None
+    if not image.packed_file and image.source == 'FILE':
+        stat = os.stat(image.filepath_from_user())
+        file_stat = (stat.st_size, stat.st_mtime_ns)
+
+    return (image.filepath_raw, image.source, tuple(image.size), image.colorspace_settings.name,
+            image.is_float, image.packed_file.size if image.packed_file else None, file_stat,
+            image.generated_type, tuple(image.generated_color))
+
+
+def _convert_in_background(image, cache_check, file_path=None):
+    """
+    Reads image pixels and submits their conversion to worker pool. If file_path isn't provided
+    converted file is named by hash of pixels and colorspace, so unchanged images aren't
+    converted again. Pixels are read again only if image is changed since last call.
+    Returns path of converted file or None if image can't be converted without Blender.
+    """
+    colorspace = image.colorspace_settings.name
+    is_srgb = not image.is_float and colorspace in SRGB_COLORSPACES
+    if not is_srgb and not image.is_float and colorspace not in LINEAR_COLORSPACES:
+        return None
+
+    state = None
+    if file_path is None:
+        state = _get_image_state(image)
+        cached = _image_files.get(image.name_full)
+        if state is not None and cached and cached[0] == state:
+            file_path = cached[1]
+
+    if file_path:
+        with _lock:
+            if file_path in _conversions or (cache_check and file_path.is_file()):
+                return file_path
+
+    # pixels are read only when a worker is free, so only one image per worker is kept in memory
+    executor = _get_executor()
+    _conversion_slots.acquire()
+    is_submitted = False
+    try:
+        pixels = _read_pixels(image)
+        if pixels is None:
             return None
 
-        image_suffix = image_path.suffix.lower()
+        if file_path is None:
+            h = hashlib.blake2b(digest_size=16)
+            h.update(repr((pixels.shape, colorspace, image.is_float)).encode('utf-8'))
+            h.update(pixels.data)
 
-        if image_suffix in SUPPORTED_FORMATS and\
-                f".{image.file_format.lower()}" in SUPPORTED_FORMATS and not image.is_dirty:
-            return image_path
+            name = bpy.path.clean_name(Path(image.name).stem)
+            file_path = image_cache_dir() / f"{name}_{h.hexdigest()}{DEFAULT_FORMAT}"
+            if state is not None:
+                _image_files[image.name_full] = (state, file_path)
 
-        if image_suffix in READONLY_IMAGE_FORMATS:
-            return image_path
+        with _lock:
+            if file_path in _conversions or (cache_check and file_path.is_file()):
+                return file_path
 
-    temp_path = get_temp_file(DEFAULT_FORMAT, image_path.stem)
-    if cache_check and image.source != 'GENERATED' and temp_path.is_file():
-        return temp_path
+            _conversions[file_path] = executor.submit(_convert_pixels_in_slot,
+                                                      file_path, pixels, is_srgb)
+            is_submitted = True
+
+    finally:
+        if not is_submitted:
+            _conversion_slots.release()
+
+    log(f"Converting {image} to {file_path} in background")
+    return file_path
 
+
+def depsgraph_update(depsgraph):
+    """Forgets converted files of updated images, e.g. reloaded ones"""
+    for update in depsgraph.updates:
+        if isinstance(update.id, bpy.types.Image):
+            _image_files.pop(update.id.name_full, None)
+
+
+def clear_image_files():
+    """Forgets converted files of images, is called when blend file is loaded"""
+    _image_files.clear()
+
+
+def wait_conversions():
+    """Waits for background image conversions, has to be called before files are used"""
+    with _lock:
+        conversions = dict(_conversions)
+        _conversions.clear()
+
+    for file_path, future in conversions.items():
+        try:
+            future.result()
+        except Exception as e:
+            log.error("Image conversion failed", file_path, e)
+
+
+def _save_render(image, temp_path):
     scene = bpy.context.scene
     user_format = scene.render.image_settings.file_format
     user_color_mode = scene.render.image_settings.color_mode
@@ -65,6 +281,33 @@ def cache_image_file(image: bpy.types.Image, cache_check=True):
         scene.render.image_settings.file_format = user_format
         scene.render.image_settings.color_mode = user_color_mode
 
+
+def cache_image_file(image: bpy.types.Image, cache_check=True):
+    image_path = Path(image.filepath_from_user())
+    if not image.packed_file and image.source != 'GENERATED':
+        if not image_path.is_file():
+            log.warn("Image is missing", image, image_path)
+            return None
+
+        image_suffix = image_path.suffix.lower()
+
+        if image_suffix in SUPPORTED_FORMATS and\
+                f".{image.file_format.lower()}" in SUPPORTED_FORMATS and not image.is_dirty:
+            return image_path
+
+        if image_suffix in READONLY_IMAGE_FORMATS:
+            return image_path
+
+    file_path = _convert_in_background(image, cache_check)
+    if file_path:
+        return file_path
+
+    # colorspace requires Blender color management, image is saved synchronously by Blender
+    temp_path = get_temp_file(DEFAULT_FORMAT, image_path.stem)
+    if cache_check and image.source != 'GENERATED' and temp_path.is_file():
+        return temp_path
+
+    _save_render(image, temp_path)
     return temp_path
 
 
@@ -72,14 +315,112 @@ def cache_image_file_path(image_path, cache_check=True):
     if image_path.suffix.lower() in SUPPORTED_FORMATS:
         return image_path
 
+    # converted file is named by hash of source file, so it's found without loading of the image
+    file_path = image_cache_dir() / \
+        f"{bpy.path.clean_name(image_path.stem)}_{_get_content_hash(image_path)}{DEFAULT_FORMAT}"
     if cache_check:
-        temp_path = get_temp_file(DEFAULT_FORMAT, image_path.name)
-        if temp_path.is_file():
-            return temp_path
+        with _lock:
+            if file_path in _conversions or file_path.is_file():
+                return file_path
 
     image = bpy.data.images.load(str(image_path))
     try:
-        return cache_image_file(image, cache_check)
+        if not _convert_in_background(image, cache_check, file_path):
+            _save_render(image, file_path)
+
+        return file_path
 
     finally:
         bpy.data.images.remove(image)
+
+
+def _make_texture_oiio(src_path, dst_path):
+    spec = oiio.ImageSpec()
+    spec.tile_width = spec.tile_height = TILE_SIZE
+    spec.attribute('maketx:filtername', 'lanczos3')
+    if not oiio.ImageBufAlgo.make_texture(oiio.MakeTxTexture, str(src_path), str(dst_path), spec):
+        raise RuntimeError(oiio.geterror())
+
+
+def _make_texture_maketx(maketx, src_path, dst_path):
+    subprocess.run([maketx, str(src_path), '-o', str(dst_path),
+                    '--tile', str(TILE_SIZE), str(TILE_SIZE), '--filter', 'lanczos3'],
+                   check=True, capture_output=True)
+
+
+@functools.lru_cache(maxsize=1)
+def _get_make_texture():
+    """Returns function which makes tiled mipmapped texture, None if no tool is available"""
+    if oiio:
+        return _make_texture_oiio
+
+    maketx = shutil.which('maketx')
+    if maketx:
+        return functools.partial(_make_texture_maketx, maketx)
+
+    log.warn("Tiled textures require OpenImageIO python module or maketx tool")
+    return None
+
+
+def _make_tiled_texture(make_texture, src_path, dst_path, src_future):
+    if src_future:
+        # source image is converted in background
+        src_future.result()
+
+    tmp_path = dst_path.with_name(f"{dst_path.stem}_{threading.get_ident()}.tmp{dst_path.suffix}")
+    make_texture(src_path, tmp_path)
+    os.replace(tmp_path, dst_path)
+    return dst_path
+
+
+def _get_content_hash(file_path):
+    m = HASH_NAME_RE.search(file_path.stem)
+    if m and file_path.parent == image_cache_dir():
+        return m[1]
+
+    stat = file_path.stat()
+    key = (str(file_path), stat.st_size, stat.st_mtime_ns)
+    content_hash = _file_hashes.get(key)
+    if content_hash is None:
+        h = hashlib.blake2b(digest_size=16)
+        with open(file_path, 'rb') as f:
+            for chunk in iter(lambda: f.read(HASH_CHUNK_SIZE), b''):
+                h.update(chunk)
+
+        content_hash = _file_hashes[key] = h.hexdigest()
+
+    return content_hash
+
+
+def get_tiled_texture(file_path):
+    """
+    Returns path of tiled mipmapped texture made from file_path, texture is made in background
+    and cached by content hash of source file. Returns file_path if tiled textures are disabled
+    or texture can't be made.
+    """
+    file_path = Path(file_path)
+    if not config.image_tiled_textures or file_path.suffix.lower() == TILED_FORMAT:
+        return file_path
+
+    make_texture = _get_make_texture()
+    if not make_texture:
+        return file_path
+
+    with _lock:
+        src_future = _conversions.get(file_path)
+
+    if not src_future and not file_path.is_file():
+        return file_path
+
+    name = HASH_NAME_RE.sub('', file_path.stem)
+    tiled_path = image_cache_dir() / f"{name}_{_get_content_hash(file_path)}{TILED_FORMAT}"
+
+    with _lock:
+        if tiled_path in _conversions or tiled_path.is_file():
+            return tiled_path
+
+        _conversions[tiled_path] = _get_tiled_executor().submit(
+            _make_tiled_texture, make_texture, file_path, tiled_path, src_future)
+
+    log(f"Making tiled texture {tiled_path} from {file_path} in background")
+    return tiled_path
@@ -20,7 +20,7 @@ import shutil
 from pathlib import Path
 
 from . import LIBS_DIR, title_str, code_str
-from .image import cache_image_file
+from .image import cache_image_file, wait_conversions, get_tiled_texture
 
 from . import logging
 log = logging.Log('utils.mx')
@@ -31,6 +31,72 @@ MX_LIBS_DIR = LIBS_DIR / MX_LIBS_FOLDER
 os.environ['MATERIALX_SEARCH_PATH'] = str(MX_LIBS_DIR)
 
 
+class MxLibrary:
+    """Parsed MaterialX library file with nodedefs indexed by name"""
+
+    def __init__(self, file_path, mtime):
+        self.file_path = file_path
+        self.mtime = mtime
+
+        self.doc = mx.createDocument()
+        search_path = mx.FileSearchPath(str(MX_LIBS_DIR))
+        mx.readFromXmlFile(self.doc, str(file_path), searchPath=search_path)
+        self.nodedefs = {nd.getName(): nd for nd in self.doc.getNodeDefs()}
+
+
+# process-wide cache of parsed library files {file path: MxLibrary}
+_libraries = {}
+# number of parses of library files, it is used to check cache efficiency
+library_parses = 0
+# it is changed when libraries are reloaded, so nodedefs cached by MxNode classes are resolved again
+library_generation = 0
+
+
+def get_library(file_path):
+    """Returns parsed library, file is parsed once per session or after reload_libraries()"""
+    global library_parses
+
+    file_path = str(file_path)
+    library = _libraries.get(file_path)
+    if library is None:
+        library = _libraries[file_path] = MxLibrary(file_path, os.path.getmtime(file_path))
+        library_parses += 1
+        log(f"Library parsed: {file_path}, {len(library.nodedefs)} nodedefs, "
+            f"total parses: {library_parses}")
+
+    return library
+
+
+def get_library_nodedef(file_path, nd_name):
+    return get_library(file_path).nodedefs.get(nd_name)
+
+
+def reload_libraries():
+    """Forgets parsed libraries which files were changed, they are parsed again on next request"""
+    global library_generation
+
+    for file_path, library in tuple(_libraries.items()):
+        if not os.path.isfile(file_path) or os.path.getmtime(file_path) != library.mtime:
+            del _libraries[file_path]
+            library_generation += 1
+            log("Library changed", file_path)
+
+
+def set_tiled_textures(doc):
+    """Rewrites file paths of textures in document to tiled mipmapped textures"""
+    for elem in doc.traverseTree():
+        if not isinstance(elem, mx.Input) or elem.getType() != 'filename':
+            continue
+
+        file_path = Path(elem.getValueString())
+        if not file_path.is_absolute():
+            continue
+
+        tiled_path = get_tiled_texture(file_path)
+        if tiled_path != file_path:
+            elem.setValueString(str(tiled_path))
+
+
 def set_param_value(mx_param, val, nd_type, nd_output=None):
     if isinstance(val, mx.Node):
         param_nodegraph = mx_param.getParent().getParent()
@@ -221,6 +287,9 @@ def get_socket_color(mx_type):
 def export_mx_to_file(doc, filepath, *, mx_node_tree=None, is_export_deps=False,
                       is_export_textures=False, texture_dir_name='textures',
                       is_clean_texture_folder=True, is_clean_deps_folders=True):
+    # textures of the document could be still converted in background
+    wait_conversions()
+
     root_dir = Path(filepath).parent
 
     if not os.path.isdir(root_dir):
@@ -0,0 +1,409 @@
+#**********************************************************************
+# Copyright 2020 Advanced Micro Devices, Inc
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+#********************************************************************
+"""
+Optimizer of MaterialX documents which are exported from materials for render delegates.
+
+Passes are repeated until document is stable:
+  - constant folding: math nodes with constant inputs become 'constant' nodes;
+  - collapsing of redundant converts: same type converts and round trip convert chains;
+  - inlining of constant nodes into inputs of their consumers;
+  - common subexpression elimination: equal nodes in nodegraph are merged;
+  - dead node elimination: nodes unreachable from material nodes are removed.
+Nodegraphs which implement nodedefs are not touched.
+"""
+import math
+import time
+import operator
+from collections import defaultdict
+
+import MaterialX as mx
+
+from . import logging
+log = logging.Log('utils.mx_optimize')
+
+
+MAX_PASSES = 16
+
+TYPE_SIZES = {
+    'float': 1,
+    'vector2': 2,
+    'color3': 3,
+    'vector3': 3,
+    'color4': 4,
+    'vector4': 4,
+}
+
+# attributes of ports which connect them to other elements
+CONNECTION_ATTRS = ('nodename', 'nodegraph', 'output', 'interfacename')
+
+
+def _divide(a, b):
+    return a / b if not math.isclose(b, 0.0) else 0.0
+
+
+def _modulo(a, b):
+    return a % b if not math.isclose(b, 0.0) else 0.0
+
+
+def _sign(a):
+    return math.copysign(1.0, a) if a != 0.0 else 0.0
+
+
+# {node category: (input names, function of single component)}
+FOLD_OPS = {
+    'add': (('in1', 'in2'), operator.add),
+    'subtract': (('in1', 'in2'), operator.sub),
+    'multiply': (('in1', 'in2'), operator.mul),
+    'divide': (('in1', 'in2'), _divide),
+    'modulo': (('in1', 'in2'), _modulo),
+    'power': (('in1', 'in2'), math.pow),
+    'min': (('in1', 'in2'), min),
+    'max': (('in1', 'in2'), max),
+    'absval': (('in',), abs),
+    'floor': (('in',), lambda a: float(math.floor(a))),
+    'ceil': (('in',), lambda a: float(math.ceil(a))),
+    'sign': (('in',), _sign),
+    'sqrt': (('in',), math.sqrt),
+    'exp': (('in',), math.exp),
+    'ln': (('in',), math.log),
+    'sin': (('in',), math.sin),
+    'cos': (('in',), math.cos),
+    'tan': (('in',), math.tan),
+    'asin': (('in',), math.asin),
+    'acos': (('in',), math.acos),
+    'clamp': (('in', 'low', 'high'), lambda a, low, high: min(max(a, low), high)),
+    'invert': (('in', 'amount'), lambda a, amount: amount - a),
+    'mix': (('fg', 'bg', 'mix'), lambda fg, bg, mix: fg * mix + bg * (1.0 - mix)),
+    'convert': (('in',), lambda a: a),
+}
+
+
+def _graphs(elem):
+    """Yields element and nested nodegraphs, nodegraphs which implement nodedefs are skipped"""
+    yield elem
+    for child in elem.getChildren():
+        if isinstance(child, mx.NodeGraph) and not child.hasAttribute('nodedef'):
+            yield from _graphs(child)
+
+
+def _is_connected(port):
+    return any(port.hasAttribute(attr) for attr in CONNECTION_ATTRS)
+
+
+def _get_consumers(graph):
+    """Returns {node name: [ports]}, ports are node inputs and nodegraph outputs of the graph"""
+    consumers = defaultdict(list)
+    for node in graph.getNodes():
+        for mx_input in node.getInputs():
+            if mx_input.getNodeName():
+                consumers[mx_input.getNodeName()].append(mx_input)
+
+    for mx_output in graph.getOutputs():
+        if mx_output.getNodeName():
+            consumers[mx_output.getNodeName()].append(mx_output)
+
+    return consumers
+
+
+def _redirect(ports, node_name, output_name):
+    for port in ports:
+        port.setNodeName(node_name)
+        if output_name:
+            port.setAttribute('output', output_name)
+        else:
+            port.removeAttribute('output')
+
+    return bool(ports)
+
+
+def _parse_floats(value_str, mx_type):
+    if mx_type not in TYPE_SIZES:
+        return None
+
+    try:
+        values = tuple(float(v) for v in value_str.split(','))
+    except ValueError:
+        return None
+
+    return values if len(values) == TYPE_SIZES[mx_type] else None
+
+
+def _make_constant(node, value_str):
+    for mx_input in node.getInputs():
+        node.removeInput(mx_input.getName())
+
+    node.removeAttribute('nodedef')
+    node.setCategory('constant')
+    node.addInput('value', node.getType()).setValueString(value_str)
+
+
+def _get_nodedef(node):
+    from ..mx_nodes.nodes import get_mx_node_cls
+
+    try:
+        MxNode_cls, data_type = get_mx_node_cls(node)
+    except (KeyError, TypeError):
+        return None
+
+    return MxNode_cls.get_nodedef(data_type)
+
+
+def _fold_node(node):
+    """Returns value string of node output if it can be computed, else None"""
+    input_names, func = FOLD_OPS[node.getCategory()]
+    size = TYPE_SIZES.get(node.getType())
+    if not size:
+        return None
+
+    nodedef = None
+    args = []
+    for name in input_names:
+        mx_input = node.getInput(name)
+        if mx_input:
+            if _is_connected(mx_input) or mx_input.hasAttribute('colorspace'):
+                return None
+
+        else:
+            # input isn't set, its default value is taken from nodedef
+            if nodedef is None:
+                nodedef = _get_nodedef(node)
+                if nodedef is None:
+                    return None
+
+            mx_input = nodedef.getInput(name)
+            if not mx_input:
+                return None
+
+        values = _parse_floats(mx_input.getValueString(), mx_input.getType())
+        if not values or len(values) not in (1, size):
+            return None
+
+        args.append(values if len(values) == size else values * size)
+
+    try:
+        res = tuple(float(func(*components)) for components in zip(*args))
+    except (ArithmeticError, ValueError):
+        return None
+
+    if not all(math.isfinite(v) for v in res):
+        return None
+
+    return ', '.join(repr(v) for v in res)
+
+
+def _fold_constants(graph):
+    changed = False
+    for node in graph.getNodes():
+        if node.getCategory() not in FOLD_OPS:
+            continue
+
+        value_str = _fold_node(node)
+        if value_str is None:
+            continue
+
+        _make_constant(node, value_str)
+        changed = True
+
+    return changed
+
+
+def _collapse_converts(graph):
+    changed = False
+    consumers = _get_consumers(graph)
+    for node in graph.getNodes():
+        if node.getCategory() != 'convert':
+            continue
+
+        mx_input = node.getInput('in')
+        if not mx_input or not mx_input.getNodeName() or mx_input.hasAttribute('nodegraph'):
+            continue
+
+        src_node = graph.getNode(mx_input.getNodeName())
+        if not src_node:
+            continue
+
+        if mx_input.getType() == node.getType():
+            changed |= _redirect(consumers[node.getName()], src_node.getName(),
+                                 mx_input.getAttribute('output'))
+            continue
+
+        # T0 -> T1 -> T0 round trip is removed if T1 isn't narrower than T0
+        src_input = src_node.getInput('in')
+        if src_node.getCategory() != 'convert' or not src_input or \
+                src_input.getType() != node.getType() or \
+                TYPE_SIZES.get(src_node.getType(), 0) < TYPE_SIZES.get(src_input.getType(), 5):
+            continue
+
+        if src_input.getNodeName() and not src_input.hasAttribute('nodegraph'):
+            changed |= _redirect(consumers[node.getName()], src_input.getNodeName(),
+                                 src_input.getAttribute('output'))
+
+        elif not _is_connected(src_input) and src_input.hasAttribute('value'):
+            _make_constant(node, src_input.getValueString())
+            changed = True
+
+    return changed
+
+
+def _get_source_node(graph, mx_input):
+    """Returns node which is connected to input directly or through nodegraph output"""
+    if mx_input.hasAttribute('nodegraph'):
+        nodegraph = graph.getChild(mx_input.getAttribute('nodegraph'))
+        if not isinstance(nodegraph, mx.NodeGraph) or nodegraph.hasAttribute('nodedef'):
+            return None
+
+        mx_output = nodegraph.getOutput(mx_input.getAttribute('output'))
+        if not mx_output or mx_output.hasAttribute('output'):
+            return None
+
+        return nodegraph.getNode(mx_output.getNodeName())
+
+    if mx_input.getNodeName() and not mx_input.hasAttribute('output'):
+        return graph.getNode(mx_input.getNodeName())
+
+    return None
+
+
+def _inline_constants(graph):
+    changed = False
+    for node in graph.getNodes():
+        for mx_input in node.getInputs():
+            src_node = _get_source_node(graph, mx_input)
+            if not src_node or src_node.getCategory() != 'constant' or \
+                    src_node.getType() != mx_input.getType():
+                continue
+
+            value = src_node.getInput('value')
+            if not value or _is_connected(value) or value.hasAttribute('colorspace'):
+                continue
+
+            for attr in CONNECTION_ATTRS:
+                mx_input.removeAttribute(attr)
+            mx_input.setValueString(value.getValueString())
+            changed = True
+
+    return changed
+
+
+def _node_key(node):
+    def attrs(elem):
+        return tuple(sorted((name, elem.getAttribute(name)) for name in elem.getAttributeNames()
+                            if name != 'name'))
+
+    return node.getCategory(), attrs(node), \
+        tuple(sorted((mx_input.getName(), attrs(mx_input)) for mx_input in node.getInputs()))
+
+
+def _eliminate_common_subexpressions(graph):
+    changed = False
+    consumers = _get_consumers(graph)
+    nodes = {}
+    for node in graph.getNodes():
+        if len(node.getChildren()) != len(node.getInputs()):
+            continue
+
+        key = _node_key(node)
+        same_node = nodes.get(key)
+        if same_node is None:
+            nodes[key] = node
+            continue
+
+        # 'output' attributes of consumers of multioutput node are kept
+        for port in consumers[node.getName()]:
+            port.setNodeName(same_node.getName())
+            changed = True
+
+    return changed
+
+
+def _eliminate_dead_nodes(doc):
+    roots = [node for node in doc.getNodes() if node.getType() == 'material']
+    if not roots:
+        return
+
+    alive = set()
+    elements = list(roots)
+    while elements:
+        elem = elements.pop()
+        path = elem.getNamePath()
+        if path in alive:
+            continue
+
+        alive.add(path)
+        graph = elem.getParent()
+        ports = elem.getInputs() if isinstance(elem, mx.Node) else (elem,)
+        for port in ports:
+            if port.hasAttribute('nodegraph'):
+                nodegraph = graph.getChild(port.getAttribute('nodegraph'))
+                if not isinstance(nodegraph, mx.NodeGraph):
+                    continue
+
+                alive.add(nodegraph.getNamePath())
+                if port.hasAttribute('output'):
+                    mx_output = nodegraph.getOutput(port.getAttribute('output'))
+                    if mx_output:
+                        elements.append(mx_output)
+                else:
+                    elements.extend(nodegraph.getOutputs())
+
+            elif port.getNodeName():
+                node = graph.getNode(port.getNodeName())
+                if node:
+                    elements.append(node)
+
+    # nested nodegraphs are processed before their parents
+    for graph in reversed(list(_graphs(doc))):
+        for node in graph.getNodes():
+            if node.getNamePath() not in alive:
+                graph.removeNode(node.getName())
+
+        if graph is doc:
+            continue
+
+        for mx_output in graph.getOutputs():
+            if mx_output.getNamePath() not in alive:
+                graph.removeOutput(mx_output.getName())
+
+        if graph.getNamePath() not in alive and not graph.getChildren():
+            graph.getParent().removeChild(graph.getName())
+
+
+def _count_nodes(doc):
+    return sum(len(graph.getNodes()) for graph in _graphs(doc))
+
+
+def optimize(doc: mx.Document):
+    """Optimizes document in place, returns numbers of nodes before and after optimization"""
+    start_time = time.perf_counter()
+    nodes_before = _count_nodes(doc)
+
+    for _ in range(MAX_PASSES):
+        changed = False
+        for graph in list(_graphs(doc)):
+            changed |= _fold_constants(graph)
+            changed |= _collapse_converts(graph)
+            changed |= _inline_constants(graph)
+            if graph is not doc:
+                changed |= _eliminate_common_subexpressions(graph)
+
+        _eliminate_dead_nodes(doc)
+        if not changed:
+            break
+
+    nodes_after = _count_nodes(doc)
+    log(f"Document optimized: {nodes_before} -> {nodes_after} nodes "
+        f"in {(time.perf_counter() - start_time) * 1000:.1f}ms")
+
+    return nodes_before, nodes_after
@@ -0,0 +1,137 @@
+# **********************************************************************
+# Copyright 2020 Advanced Micro Devices, Inc
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+# ********************************************************************
+import re
+from functools import lru_cache
+
+from pxr import Usd
+
+
+class _TrieNode:
+    """Node of patterns prefix trie, corresponds to one component of USD path"""
+
+    def __init__(self):
+        self.children = {}      # literal components: {name: _TrieNode}
+        self.globs = []         # components with '*': [(compiled regex, _TrieNode)]
+        self.tails = []         # remainders of patterns starting with '**' component: [compiled regex]
+        self.is_end = False
+
+    def add(self, names):
+        if not names:
+            self.is_end = True
+            return
+
+        name = names[0]
+        if '**' in name:
+            self.tails.append(re.compile(_pattern_to_regex('/'.join(names))))
+            return
+
+        if '*' in name:
+            regex = re.compile(_pattern_to_regex(name))
+            node = next((node for r, node in self.globs if r.pattern == regex.pattern), None)
+            if not node:
+                node = _TrieNode()
+                self.globs.append((regex, node))
+        else:
+            node = self.children.setdefault(name, _TrieNode())
+
+        node.add(names[1:])
+
+
+def _pattern_to_regex(pattern):
+    return '\\/'.join(
+        '[\\w\\/]*'.join('\\w*'.join(re.escape(part) for part in subpart.split('*'))
+                         for subpart in name.split('**'))
+        for name in pattern.split('/'))
+
+
+class PathMatcher:
+    """
+    Matches USD paths by patterns, where '*' means any word or subword
+    and '**' means several words separated by '/' or subword.
+    Patterns are compiled into prefix trie of path components, so during traversal
+    subtrees which can't contain matching prims are pruned.
+    """
+
+    def __init__(self, patterns):
+        self.root = _TrieNode()
+        self.tails = []     # patterns which are matched against whole path
+
+        for pattern in patterns:
+            if pattern.startswith('/'):
+                self.root.add(pattern.split('/')[1:])
+            else:
+                self.tails.append(re.compile(_pattern_to_regex(pattern)))
+
+    @staticmethod
+    def _advance(state, name, offset):
+        """Returns state of the child with name, which starts at offset in path string"""
+        nodes, tails = state
+        new_nodes = []
+        new_tails = list(tails)
+        for node in nodes:
+            child = node.children.get(name)
+            if child:
+                new_nodes.append(child)
+
+            new_nodes.extend(child for regex, child in node.globs if regex.fullmatch(name))
+
+            # patterns remainders which begin with '**' component are matched against rest of path
+            new_tails.extend((regex, offset) for regex in node.tails)
+
+        return new_nodes, new_tails
+
+    def get_prims(self, stage, unloaded=None):
+        """
+        Yields top most prims of the stage which paths match patterns, their children are skipped.
+        If unloaded list is provided, paths of not loaded prims with payloads, which could contain
+        matching prims, are added to it.
+        """
+        states = {}
+        prim_range = iter(Usd.PrimRange.AllPrims(stage.GetPseudoRoot()))
+        for prim in prim_range:
+            if prim.IsPseudoRoot():
+                states[prim.GetPath()] = ([self.root], [(regex, 0) for regex in self.tails])
+                continue
+
+            path = prim.GetPath()
+            path_str = str(path)
+            nodes, tails = self._advance(states[path.GetParentPath()], path.name,
+                                         len(path_str) - len(path.name))
+
+            if any(node.is_end for node in nodes) or \
+                    any(regex.fullmatch(path_str, pos) for regex, pos in tails):
+                yield prim
+                prim_range.PruneChildren()
+                continue
+
+            if not tails and not any(node.children or node.globs or node.tails for node in nodes):
+                prim_range.PruneChildren()
+                continue
+
+            states[path] = (nodes, tails)
+
+            if unloaded is not None and not prim.IsLoaded() and prim.HasAuthoredPayloads():
+                unloaded.append(path)
+
+
+@lru_cache(maxsize=64)
+def compile_patterns(filter_path, is_split=True):
+    """
+    Returns PathMatcher for filter_path. If is_split is True filter_path is split
+    by delimiter ',' or whitespace into several patterns
+    """
+    patterns = [name for name in filter_path.replace(" ", ",").split(",") if name] if is_split else \
+               [filter_path]
+    return PathMatcher(patterns)
@@ -0,0 +1,310 @@
+# **********************************************************************
+# Copyright 2020 Advanced Micro Devices, Inc
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+# ********************************************************************
+"""
+Search index of stage prims for USD list browser.
+
+Index is built once per stage version by timer in short steps, so drawing of UI isn't blocked
+by big stages. Tree view of USD list shows window of index rows. Prim names and paths are joined into single lowercase
+strings, so substring search is done by str.find() over whole stage, found offsets are mapped
+to rows by binary search in rows offsets. Type names and kinds are stored as NumPy arrays
+of codes, so type search is a vectorized mask.
+"""
+import time
+from collections import OrderedDict
+
+import numpy as np
+
+import bpy
+from pxr import Usd
+
+from . import stage_cache
+from .. import config
+
+from . import logging
+log = logging.Log('prim_index')
+
+
+INDEX_CACHE_SIZE = 4
+SEARCH_CACHE_SIZE = 16
+# number of found substring positions which are mapped to rows at once
+FIND_CHUNK_SIZE = 4096
+# time of one build step of index in seconds and interval between steps
+BUILD_STEP_TIME = 0.02
+BUILD_STEP_INTERVAL = 0.01
+# number of added rows between checks of build step time
+BUILD_CHECK_ROWS = 256
+
+# {stage version: PrimIndex}
+_indices = OrderedDict()
+# {(stage version, text, type_text): found rows}
+_searches = OrderedDict()
+# index which is being built, only index of the latest requested stage is built
+_building = None
+
+
+def _put(cache, key, value, size):
+    cache[key] = value
+    if len(cache) > size:
+        cache.popitem(last=False)
+
+
+class _Text:
+    """Strings joined by '\\n' with offsets of rows"""
+
+    def __init__(self, strings):
+        self.text = '\n'.join(strings).lower()
+        lengths = np.fromiter(map(len, strings), dtype=np.int64, count=len(strings)) + 1
+        self.starts = np.cumsum(lengths) - lengths
+
+    def find(self, sub, mask, limit):
+        """Returns sorted rows which contain substring and are allowed by mask"""
+        found = []
+        count = 0
+        find = self.text.find
+
+        pos = find(sub)
+        while pos >= 0 and count < limit:
+            positions = []
+            while pos >= 0 and len(positions) < FIND_CHUNK_SIZE:
+                positions.append(pos)
+                pos = find(sub, pos + len(sub))
+
+            rows = np.unique(np.searchsorted(self.starts, positions, side='right') - 1)
+            if mask is not None:
+                rows = rows[mask[rows]]
+
+            found.append(rows)
+            count += len(rows)
+
+        if not found:
+            return np.empty(0, dtype=np.int64)
+
+        return np.unique(np.concatenate(found))[:limit]
+
+
+class PrimIndex:
+    """
+    Index of all stage prims in traversal order. It's built by timer in short steps, so UI isn't
+    frozen by big stages. Besides search data it keeps tree structure: depths and parents of rows
+    and ends of their subtrees.
+    """
+
+    def __init__(self, stage):
+        self.version = stage_cache.get_stage_version(stage)
+        self.is_built = False
+
+        self.paths = []
+        self.rows = {}      # {prim path: row}
+
+        self._stage = stage
+        self._prims = iter(stage.TraverseAll())
+        self._build_time = 0.0
+        self._names = []
+        self._type_codes = {}
+        self._kind_codes = {}
+        self._type_ids = []
+        self._kind_ids = []
+        self._parents = []
+        self._ends = []
+        self._stack = []    # rows of current prim and its ancestors
+        self._visible = None
+
+    def __len__(self):
+        return len(self.paths)
+
+    def build_step(self, end_time):
+        """Adds prims to index until end_time, returns True when index is built"""
+        start_time = time.perf_counter()
+        stack = self._stack
+        ends = self._ends
+
+        for row, prim in enumerate(self._prims, len(self.paths)):
+            path = prim.GetPath()
+
+            # prims are traversed depth first, so depth of current prim equals stack length
+            depth = path.pathElementCount
+            while len(stack) >= depth:
+                ends[stack.pop()] = row
+
+            self._parents.append(stack[-1] if stack else -1)
+            stack.append(row)
+            ends.append(0)
+
+            path_str = str(path)
+            self.paths.append(path_str)
+            self.rows[path_str] = row
+            self._names.append(prim.GetName())
+            self._type_ids.append(self._type_codes.setdefault(prim.GetTypeName(), len(self._type_codes)))
+            self._kind_ids.append(self._kind_codes.setdefault(Usd.ModelAPI(prim).GetKind(),
+                                                              len(self._kind_codes)))
+
+            if row % BUILD_CHECK_ROWS == 0 and time.perf_counter() >= end_time:
+                self._build_time += time.perf_counter() - start_time
+                return False
+
+        self._finish()
+        self._build_time += time.perf_counter() - start_time
+        log(f"Index of {len(self.paths)} prims built in {self._build_time:.3f}s")
+        return True
+
+    def _finish(self):
+        while self._stack:
+            self._ends[self._stack.pop()] = len(self.paths)
+
+        self.names = _Text(self._names)
+        self.path_text = _Text(self.paths)
+        self.type_names = tuple(self._type_codes)
+        self.kinds = tuple(self._kind_codes)
+        self.type_ids = np.array(self._type_ids, dtype=np.int32)
+        self.kind_ids = np.array(self._kind_ids, dtype=np.int32)
+        self.parents = np.array(self._parents, dtype=np.int64)
+        self.ends = np.array(self._ends, dtype=np.int64)
+
+        self._stage = None
+        self._prims = None
+        self._names = self._type_ids = self._kind_ids = self._parents = self._ends = None
+        self.is_built = True
+
+    def type_name(self, row):
+        return self.type_names[self.type_ids[row]]
+
+    def kind(self, row):
+        return self.kinds[self.kind_ids[row]]
+
+    def has_children(self, row):
+        return self.ends[row] > row + 1
+
+    def depth(self, row):
+        return self.paths[row].count('/')
+
+    def get_visible_rows(self, expanded_paths):
+        """Returns rows of tree view: root prims and children of expanded prims"""
+        if self._visible and self._visible[0] == expanded_paths:
+            return self._visible[1]
+
+        count = len(self.paths)
+        is_expanded = np.zeros(count, dtype=bool)
+        for path in expanded_paths:
+            row = self.rows.get(path)
+            if row is not None:
+                is_expanded[row] = True
+
+        # collapsed row hides rows of its subtree [row + 1, end), row is visible
+        # if it isn't covered by any hidden range
+        collapsed = np.flatnonzero(~is_expanded & (self.ends > np.arange(count) + 1))
+        hidden = np.bincount(collapsed + 1, minlength=count + 1) - \
+            np.bincount(self.ends[collapsed], minlength=count + 1)
+        rows = np.flatnonzero(np.cumsum(hidden[:count]) == 0)
+        self._visible = (expanded_paths, rows)
+        return rows
+
+    def get_type_mask(self, type_text):
+        """Returns mask of rows which type name or kind contains type_text"""
+        type_text = type_text.lower()
+        type_codes = [i for i, name in enumerate(self.type_names) if type_text in name.lower()]
+        kind_codes = [i for i, kind in enumerate(self.kinds) if type_text in kind.lower()]
+        return np.isin(self.type_ids, type_codes) | np.isin(self.kind_ids, kind_codes)
+
+    def search(self, text, type_text, limit):
+        """
+        Returns rows of prims which name contains text (or path if text contains '/')
+        and type name or kind contains type_text
+        """
+        mask = self.get_type_mask(type_text) if type_text else None
+        if not text:
+            rows = np.flatnonzero(mask) if mask is not None else np.arange(len(self.paths))
+            return rows[:limit]
+
+        search_text = self.path_text if '/' in text else self.names
+        return search_text.find(text.lower(), mask, limit)
+
+def _build_index():
+    """Timer which builds requested index step by step"""
+    global _building
+
+    index = _building
+    if index is None:
+        return None
+
+    if stage_cache.get_stage_version(index._stage) != index.version:
+        # stage was changed during build, index of new version is requested by next draw
+        _building = None
+        return None
+
+    try:
+        is_built = index.build_step(time.perf_counter() + BUILD_STEP_TIME)
+    except Exception as e:
+        log.error("Couldn't build index of prims", e)
+        _building = None
+        return None
+
+    if is_built:
+        _put(_indices, index.version, index, INDEX_CACHE_SIZE)
+        _building = None
+
+    # progress or result of the build is shown by USD list panel
+    for window in bpy.context.window_manager.windows:
+        for area in window.screen.areas:
+            if area.type == 'NODE_EDITOR':
+                area.tag_redraw()
+
+    return None if is_built else BUILD_STEP_INTERVAL
+
+
+def get_index(stage):
+    """Returns built index of the stage or None, index which isn't built yet is built by timer"""
+    global _building
+
+    version = stage_cache.get_stage_version(stage)
+    index = _indices.get(version)
+    if index:
+        _indices.move_to_end(version)
+        return index
+
+    if _building is None or _building.version != version:
+        _building = PrimIndex(stage)
+
+    if not bpy.app.timers.is_registered(_build_index):
+        bpy.app.timers.register(_build_index, first_interval=0.0)
+
+    return None
+
+
+def get_build_progress():
+    """Returns number of prims in index which is being built"""
+    return len(_building) if _building else 0
+
+
+def search(stage, text, type_text):
+    """
+    Returns index of the stage and found rows, results are cached per stage version.
+    Returns (None, None) if index isn't built yet.
+    """
+    index = get_index(stage)
+    if not index:
+        return None, None
+
+    key = (index.version, text, type_text)
+    rows = _searches.get(key)
+    if rows is None:
+        start_time = time.perf_counter()
+        rows = index.search(text, type_text, config.usd_list_search_limit)
+        _put(_searches, key, rows, SEARCH_CACHE_SIZE)
+        log(f"Found {len(rows)} prims by '{text}', '{type_text}' "
+            f"in {(time.perf_counter() - start_time) * 1000:.1f}ms")
+    else:
+        _searches.move_to_end(key)
+
+    return index, rows
@@ -12,15 +12,31 @@
 # See the License for the specific language governing permissions and
 # limitations under the License.
 # ********************************************************************
-from pxr import Usd
+import os
+import itertools
+from collections import OrderedDict
+
+from pxr import Usd, Sdf
 
 from . import get_temp_file
+from .. import config
+
+from . import logging
+log = logging.Log('stage_cache')
 
 
 ID_NO_STAGE = -1
 
+# approximate sizes in bytes of layer spec and of array item, are used to estimate layer size
+SPEC_SIZE = 256
+ARRAY_ITEM_SIZE = 16
+
 _stage_cache = Usd.StageCache()
 
+# version tokens of stages, keyed by identifier of stage root layer
+_stage_versions = {}
+_version_counter = itertools.count()
+
 
 class CachedStage:
     id = ID_NO_STAGE
@@ -39,6 +55,13 @@ class CachedStage:
         self.is_owner = True
         return stage
 
+    def restore(self, stage):
+        """Puts back a stage which was kept outside of the stage cache, e.g. in StageMemo"""
+        if _stage_cache.Contains(stage):
+            return self.assign(stage)
+
+        return self.insert(stage)
+
     def assign(self, stage):
         if self.id == _stage_cache.GetId(stage).ToLongInt():
             return
@@ -66,3 +89,133 @@ class CachedStage:
 
     def __del__(self):
         self.clear()
+
+
+def get_stage_version(stage):
+    """Returns version token of the stage, which changes every time stage content is changed"""
+    if not stage:
+        return None
+
+    identifier = stage.GetRootLayer().identifier
+    version = _stage_versions.get(identifier)
+    if version is None:
+        version = _stage_versions[identifier] = next(_version_counter)
+
+    return version
+
+
+def set_stage_version(stage, version):
+    _stage_versions[stage.GetRootLayer().identifier] = version
+
+
+def touch_stage(stage):
+    """Marks stage as changed in place, so dependent data should be recomputed"""
+    if stage:
+        set_stage_version(stage, next(_version_counter))
+
+
+def get_layer_size(layer):
+    """
+    Returns approximate size of layer in bytes. Layers which weren't changed after loading
+    take size of their file, size of other layers is estimated by numbers of specs and
+    array items without serialization of the layer.
+    """
+    if not layer.dirty and os.path.isfile(layer.realPath):
+        return os.path.getsize(layer.realPath)
+
+    size = 0
+
+    def add_spec(path):
+        nonlocal size
+        size += SPEC_SIZE
+        if not path.IsPropertyPath():
+            return
+
+        attr_spec = layer.GetAttributeAtPath(path)
+        if not attr_spec:
+            return
+
+        value = attr_spec.default
+        items = len(value) if hasattr(value, '__len__') else 1
+        size += items * ARRAY_ITEM_SIZE * (1 + layer.GetNumTimeSamplesForPath(path))
+
+    layer.Traverse(Sdf.Path.absoluteRootPath, add_spec)
+    return size
+
+
+class StageMemo:
+    """
+    LRU cache of computed stages keyed by node parameters and input stages versions.
+    Size of the cache is limited by number of stages and by memory budget.
+    Only root layer of each stage is counted, because other used layers are owned by input stages.
+    """
+
+    def __init__(self, max_size, max_memory):
+        self.max_size = max_size
+        self.max_memory = max_memory
+
+        self._stages = OrderedDict()
+        self._memory = 0
+
+    def get(self, key):
+        item = self._stages.get(key)
+        if not item:
+            return None
+
+        self._stages.move_to_end(key)
+        return item[0]
+
+    def put(self, key, stage, size=None):
+        """Memoizes stage, size of its root layer is estimated if it isn't passed"""
+        self.pop(key)
+        if not stage:
+            return
+
+        if size is None:
+            size = get_layer_size(stage.GetRootLayer())
+
+        if size > self.max_memory:
+            log("Stage is too big to be memoized", stage, size)
+            return
+
+        self._stages[key] = (stage, size)
+        self._memory += size
+
+        while len(self._stages) > self.max_size or self._memory > self.max_memory:
+            _, (_, size) = self._stages.popitem(last=False)
+            self._memory -= size
+
+    def discard_stage(self, stage):
+        """
+        Removes all entries of the stage, is used when stage was changed in place.
+        Returns size of the stage if it was memoized, otherwise None.
+        """
+        size = None
+        for key in tuple(key for key, (s, _) in self._stages.items() if s == stage):
+            size = self._stages[key][1]
+            self.pop(key)
+
+        return size
+
+    def get_stage_size(self, stage):
+        """Returns size of the stage if it is memoized, otherwise None"""
+        return next((size for s, size in self._stages.values() if s == stage), None)
+
+    def pop(self, key):
+        item = self._stages.pop(key, None)
+        if item:
+            self._memory -= item[1]
+
+    def clear(self):
+        self._stages.clear()
+        self._memory = 0
+
+    def __len__(self):
+        return len(self._stages)
+
+    @property
+    def memory(self):
+        return self._memory
+
+
+memo = StageMemo(config.usd_nodes_memo_size, config.usd_nodes_memo_memory * 1024 * 1024)
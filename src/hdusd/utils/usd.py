@@ -12,12 +12,14 @@
 # See the License for the specific language governing permissions and
 # limitations under the License.
 #********************************************************************
+import os
 import math
+from dataclasses import dataclass
 
 import mathutils
 import bpy
 
-from pxr import UsdShade, Gf
+from pxr import Usd, UsdShade, Sdf, Gf, Vt
 from ..utils import log
 
 def get_xform_transform(xform):
@@ -61,6 +63,12 @@ def get_renderer_percent_done(renderer):
     return percent
 
 
+def get_renderer_memory_stats(renderer):
+    """Returns render stats of delegate related to memory usage, like texture memory"""
+    return {key: val for key, val in renderer.GetRenderStats().items()
+            if 'memory' in key.lower() or 'texture' in key.lower()}
+
+
 def traverse_stage(stage, *, ignore=None):
     def traverse(prim):
         for child in prim.GetAllChildren():
@@ -81,72 +89,265 @@ def bind_material(mesh_prim, usd_mat):
         bindings.Bind(usd_mat)
 
 
-def set_timesamples_for_prim(prim, start, end):
+# python values of attributes of these types are ambiguous, they are wrapped when written to Sdf
+# to keep exact value type, e.g. python float would be written as double to float attribute
+_VT_WRAPPERS = {
+    Sdf.ValueTypeNames.Float: Vt.Float,
+    Sdf.ValueTypeNames.Half: Vt.Half,
+    Sdf.ValueTypeNames.Int: Vt.Int,
+    Sdf.ValueTypeNames.UInt: Vt.UInt,
+    Sdf.ValueTypeNames.UChar: Vt.UChar,
+    Sdf.ValueTypeNames.Token: Vt.Token,
+}
+_PY_TYPE_NAMES = (Sdf.ValueTypeNames.Double, Sdf.ValueTypeNames.Bool, Sdf.ValueTypeNames.String)
+
+
+def _retime_attribute(attr, start, end, offset):
+    """
+    Keeps time samples of attribute in interval [start, end] moved by offset or sets value
+    as default if single frame is required. Works through Usd API with composed attribute values.
+    Returns nearest samples to start and end moved by offset.
+    """
+    time_samples = attr.GetTimeSamplesInInterval(Gf.Interval(start, end))
+    if not time_samples:
+        value = attr.Get(0)
+        attr.Clear()
+        if value is not None:
+            attr.Set(value)
+
+        return None, None
+
+    nearest_min_sample = min(time_samples, key=lambda x: abs(x - start))
+    nearest_max_sample = min(time_samples, key=lambda x: abs(x - end))
+
+    if end > start:
+        value = {sample: attr.Get(sample) for sample in time_samples}
+        attr.Clear()
+        for sample, val in value.items():
+            attr.Set(val, sample + offset)
+
+    else:
+        value = attr.Get(nearest_min_sample)
+        attr.Clear()
+        attr.Set(value)
+
+    return nearest_min_sample + offset, nearest_max_sample + offset
+
+
+def _remap_time_samples(spec, start, end, offset):
+    """
+    Returns time samples of attribute spec in interval [start, end] moved by offset
+    or None if they can't be written back through Sdf without changing value type.
+    """
+    samples = spec.GetInfo('timeSamples')
+    remapped = {time + offset: value for time, value in samples.items() if start <= time <= end}
+    if len(remapped) < 2:
+        # default value has to be computed through Usd
+        return None
+
+    value = next(iter(remapped.values()))
+    if not isinstance(value, (bool, int, float, str)) or spec.typeName in _PY_TYPE_NAMES:
+        return remapped
+
+    wrapper = _VT_WRAPPERS.get(spec.typeName)
+    if not wrapper:
+        return None
+
+    return {time: wrapper(value) for time, value in remapped.items()}
+
+
+def retime_stage(stage, start, end, offset=0.0):
+    """
+    Keeps time samples of all attributes of the stage in interval [start, end] and moves them
+    by offset. Time samples authored in root layer are remapped at Sdf level: whole time samples
+    dictionary of attribute is read and written back in one Sdf.ChangeBlock, only attributes
+    with samples in other layers (sublayers, references) are remapped through Usd API.
+    Returns min and max of nearest samples to start and end moved by offset.
+    """
+    root_layer = stage.GetRootLayer()
+    attrs_to_remap = []
+    attrs = []
+
+    def add_spec(path):
+        attr_spec = root_layer.GetAttributeAtPath(path) if path.IsPropertyPath() else None
+        if attr_spec and attr_spec.HasInfo('timeSamples'):
+            attrs_to_remap.append(attr_spec)
+
+    is_single_layer = all(layer in (root_layer, stage.GetSessionLayer())
+                          for layer in stage.GetUsedLayers())
+    if is_single_layer:
+        root_layer.Traverse(Sdf.Path.absoluteRootPath, add_spec)
+
+    else:
+        for prim in stage.TraverseAll():
+            for attr in prim.GetAuthoredAttributes():
+                if not attr.GetNumTimeSamples():
+                    continue
+
+                attr_spec = root_layer.GetAttributeAtPath(attr.GetPath())
+                if attr_spec and attr_spec.HasInfo('timeSamples'):
+                    attrs_to_remap.append(attr_spec)
+                else:
+                    attrs.append(attr)
+
     min_sample = None
     max_sample = None
 
-    for attr in prim.GetAuthoredAttributes():
-        time_samples = attr.GetTimeSamplesInInterval(Gf.Interval(start, end))
-        if len(time_samples) > 0:
-            nearest_min_sample = min(time_samples, key=lambda x: abs(x - start))
-            nearest_max_sample = min(time_samples, key=lambda x: abs(x - end))
-
-            if end > start:
-                value = {sample: attr.Get(sample) for sample in time_samples}
-            else:
-                value = attr.Get(nearest_min_sample)
-
-            attr.Clear()
-
-            if isinstance(value, dict):
-                for sample, val in value.items():
-                    attr.Set(val, sample)
-            else:
-                attr.Set(value)
-
-            if not min_sample:
-                min_sample = nearest_min_sample
-            else:
-                if nearest_min_sample < min_sample:
-                    min_sample = nearest_min_sample
-
-            if not max_sample:
-                max_sample = nearest_max_sample
-            else:
-                if nearest_max_sample > max_sample:
-                    max_sample = nearest_max_sample
-        else:
-            if value := attr.Get(0):
-                attr.Clear()
-                attr.Set(value)
+    def add_samples(nearest_min_sample, nearest_max_sample):
+        nonlocal min_sample, max_sample
+        if nearest_min_sample is not None and (min_sample is None or nearest_min_sample < min_sample):
+            min_sample = nearest_min_sample
+        if nearest_max_sample is not None and (max_sample is None or nearest_max_sample > max_sample):
+            max_sample = nearest_max_sample
+
+    remapped_samples = []
+    for attr_spec in attrs_to_remap:
+        remapped = _remap_time_samples(attr_spec, start, end, offset)
+        if remapped is None:
+            attrs.append(stage.GetAttributeAtPath(attr_spec.path))
+            continue
+
+        remapped_samples.append((attr_spec, remapped))
+        add_samples(min(remapped), max(remapped))
+
+    with Sdf.ChangeBlock():
+        for attr_spec, remapped in remapped_samples:
+            attr_spec.SetInfo('timeSamples', remapped)
+
+    for attr in attrs:
+        add_samples(*_retime_attribute(attr, start, end, offset))
 
     return min_sample, max_sample
 
 
-def set_timesamples_for_stage(stage, *, is_use_animation, is_restrict_frames, start, end):
-    if is_use_animation:
-        start_time_code = stage.GetStartTimeCode()
-        end_time_code = stage.GetEndTimeCode()
+def set_timesamples_for_stage(stage, *, is_use_animation, is_restrict_frames, start, end, offset=0.0):
+    if not is_use_animation:
+        stage.ClearMetadata('startTimeCode')
+        stage.ClearMetadata('endTimeCode')
 
-        if is_restrict_frames:
-            for prim in stage.TraverseAll():
-                min_sample, max_sample = set_timesamples_for_prim(prim, start, end)
+        retime_stage(stage, 0, 0)
+        return
 
-                if start == end:
-                    stage.ClearMetadata('startTimeCode')
-                    stage.ClearMetadata('endTimeCode')
-                else:
-                    if min_sample and min_sample > start_time_code:
-                        start_time_code = min_sample
-                        stage.SetMetadata('startTimeCode', min_sample)
+    if not is_restrict_frames:
+        if offset:
+            start_time_code = stage.GetStartTimeCode()
+            end_time_code = stage.GetEndTimeCode()
+            retime_stage(stage, -math.inf, math.inf, offset)
 
-                    if max_sample and max_sample < end_time_code:
-                        end_time_code = max_sample
-                        stage.SetMetadata('endTimeCode', max_sample)
+            stage.SetMetadata('startTimeCode', start_time_code + offset)
+            stage.SetMetadata('endTimeCode', end_time_code + offset)
 
-    else:
+        return
+
+    start_time_code = stage.GetStartTimeCode() + offset
+    end_time_code = stage.GetEndTimeCode() + offset
+
+    # frames are set in stage time, samples are taken from source time
+    min_sample, max_sample = retime_stage(stage, start - offset, end - offset, offset)
+
+    if start == end:
         stage.ClearMetadata('startTimeCode')
         stage.ClearMetadata('endTimeCode')
-
-        for prim in stage.TraverseAll():
-            set_timesamples_for_prim(prim, 0, 0)
+        return
+
+    if min_sample is not None and min_sample > start_time_code:
+        start_time_code = min_sample
+
+    if max_sample is not None and max_sample < end_time_code:
+        end_time_code = max_sample
+
+    stage.SetMetadata('startTimeCode', start_time_code)
+    stage.SetMetadata('endTimeCode', end_time_code)
+
+
+def set_value_clips(prim, clip_file_path, clip_prim_path, *, is_restrict_frames, start, end, offset):
+    """
+    Retimes prim by value clips instead of rewriting time samples: clip file is used as single
+    clip with times mapping moved by offset. Out of [start, end] values of clip are held.
+    """
+    clips = Usd.ClipsAPI(prim)
+    clips.SetClipAssetPaths([Sdf.AssetPath(clip_file_path)])
+    clips.SetClipPrimPath(str(clip_prim_path))
+
+    if not is_restrict_frames:
+        clip_layer = Sdf.Layer.FindOrOpen(clip_file_path)
+        start = clip_layer.startTimeCode + offset
+        end = clip_layer.endTimeCode + offset
+
+    clips.SetClipActive([(start, 0)])
+    clips.SetClipTimes([(start, start - offset), (end, end - offset)])
+
+
+@dataclass(frozen=True)
+class UsdFileInfo:
+    """ Metadata of USD file read from its root layer header """
+    start_time_code: float
+    end_time_code: float
+    up_axis: str
+    meters_per_unit: float
+    default_prim: str
+    file_size: int
+
+    def __str__(self):
+        return f"Frames: {self.start_time_code:g} - {self.end_time_code:g}\n" \
+               f"Up axis: {self.up_axis or 'default'}\n" \
+               f"Meters per unit: {self.meters_per_unit if self.meters_per_unit else 'default'}\n" \
+               f"Default prim: {self.default_prim or 'none'}\n" \
+               f"File size: {self.file_size / (1024 * 1024):.2f} MB"
+
+
+_file_info_cache = {}
+
+
+def get_file_info(file_path):
+    """
+    Reads metadata of USD file. Only root layer header is read without composition
+    and payloads loading. Results are cached by file path, modification time and size.
+    """
+    if not os.path.isfile(file_path):
+        return None
+
+    stat = os.stat(file_path)
+    key = (file_path, stat.st_mtime, stat.st_size)
+    info = _file_info_cache.get(key)
+    if info:
+        return info
+
+    layer = Sdf.Layer.OpenAsAnonymous(file_path, True)
+    if not layer:
+        log.warn("Couldn't read USD file metadata", file_path)
+        return None
+
+    def get_info(name, default):
+        return layer.pseudoRoot.GetInfo(name) if layer.pseudoRoot.HasInfo(name) else default
+
+    info = UsdFileInfo(
+        start_time_code=layer.startTimeCode if layer.HasStartTimeCode() else 0.0,
+        end_time_code=layer.endTimeCode if layer.HasEndTimeCode() else 0.0,
+        up_axis=str(get_info('upAxis', "")),
+        meters_per_unit=get_info('metersPerUnit', 0.0),
+        default_prim=layer.defaultPrim,
+        file_size=stat.st_size,
+    )
+    _file_info_cache[key] = info
+    return info
+
+
+def get_layer_file_paths(file_path):
+    """Returns paths of USD file and all its sublayers files. Only layers headers are read"""
+    file_paths = []
+
+    def add_layer(path):
+        if path in file_paths or not os.path.isfile(path):
+            return
+
+        file_paths.append(path)
+        layer = Sdf.Layer.OpenAsAnonymous(path, True)
+        if not layer:
+            return
+
+        for sublayer_path in layer.subLayerPaths:
+            add_layer(os.path.normpath(os.path.join(os.path.dirname(path), sublayer_path)))
+
+    add_layer(os.path.normpath(file_path))
+    return file_paths
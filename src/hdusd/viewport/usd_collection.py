@@ -17,7 +17,6 @@ import bpy
 from pxr import Sdf
 
 from ..engine import handlers
-from ..utils import usd as usd_utils
 from ..properties.object import GEOM_TYPES
 
 from ..utils import logging
@@ -36,9 +35,48 @@ def ignore_prim(prim):
     return not (prim_type in GEOM_TYPES or prim_type in ('Mesh', 'Camera') or prim_type.endswith('Light'))
 
 
+def get_prims(stage, depth, expanded_paths):
+    """
+    Yields prims which are mirrored by objects with flag if prim is proxy of its subtree.
+    Children of prims are mirrored down to depth (0 means whole hierarchy) or if prim is expanded.
+    """
+    def traverse(prim, level):
+        for child in prim.GetAllChildren():
+            if ignore_prim(child):
+                continue
+
+            is_children_shown = not depth or level < depth or str(child.GetPath()) in expanded_paths
+            if is_children_shown:
+                yield child, False
+                yield from traverse(child, level + 1)
+            else:
+                is_proxy = any(not ignore_prim(c) for c in child.GetAllChildren())
+                yield child, is_proxy
+
+    yield from traverse(stage.GetPseudoRoot(), 1)
+
+
+def expand(context, path):
+    settings = context.scene.hdusd.viewport
+    paths = settings.get_expanded_paths()
+    paths.add(path)
+    settings.set_expanded_paths(paths)
+    update(context)
+
+
+def collapse(context, path):
+    """Collapses prim and all its expanded descendants"""
+    settings = context.scene.hdusd.viewport
+    sdf_path = Sdf.Path(path)
+    paths = set(p for p in settings.get_expanded_paths() if not Sdf.Path(p).HasPrefix(sdf_path))
+    settings.set_expanded_paths(paths)
+    update(context)
+
+
 def update(context):
     def update_():
-        usd_tree_name = context.scene.hdusd.viewport.data_source
+        settings = context.scene.hdusd.viewport
+        usd_tree_name = settings.data_source
         if not usd_tree_name:
             clear(context)
             return
@@ -71,8 +109,13 @@ def update(context):
         obj_paths = set(objects.keys())
 
         prim_paths = set()
-        for prim in usd_utils.traverse_stage(stage, ignore=ignore_prim):
-            prim_paths.add(str(prim.GetPath()))
+        proxy_paths = set()
+        for prim, is_proxy in get_prims(stage, settings.hierarchy_depth,
+                                        settings.get_expanded_paths()):
+            path = str(prim.GetPath())
+            prim_paths.add(path)
+            if is_proxy:
+                proxy_paths.add(path)
 
         paths_to_remove = obj_paths - prim_paths
         paths_to_add = prim_paths - obj_paths
@@ -89,6 +132,10 @@ def update(context):
             if prim.GetTypeName() in GEOM_TYPES:
                 objects[path].hdusd.sync_transform_from_prim(prim)
 
+            is_proxy = path in proxy_paths
+            if objects[path].hdusd.is_proxy != is_proxy:
+                objects[path].hdusd.is_proxy = is_proxy
+
         log(f"Adding {len(paths_to_add)} objects")
         for path in sorted(paths_to_add):
             parent_path = str(Sdf.Path(path).GetParentPath())
@@ -97,6 +144,7 @@ def update(context):
             prim = stage.GetPrimAtPath(path)
             obj = bpy.data.objects.new('/', None)
             obj.hdusd.sync_from_prim(parent_obj, prim)
+            obj.hdusd.is_proxy = path in proxy_paths
             collection.objects.link(obj)
 
             objects[path] = obj
@@ -0,0 +1,46 @@
+#**********************************************************************
+# Copyright 2020 Advanced Micro Devices, Inc
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+#********************************************************************
+import numpy as np
+import pytest
+
+mathutils = pytest.importorskip('mathutils')
+instancing = pytest.importorskip('hdusd.usd_nodes.nodes.instancing')
+
+
+def assert_track_quats(normals):
+    normals = np.array(normals, dtype=np.float32)
+    quats = instancing.get_track_quats(normals)
+
+    for normal, quat in zip(normals, quats):
+        # quaternions q and -q are the same rotation, therefore matrices are compared
+        expected = np.array(mathutils.Vector(normal).to_track_quat('Z', 'Y').to_matrix())
+        actual = np.array(mathutils.Quaternion(quat).to_matrix())
+        np.testing.assert_allclose(actual, expected, atol=1e-5, err_msg=f"normal {normal}")
+
+
+def test_track_quats_random():
+    rng = np.random.default_rng(0)
+    assert_track_quats(rng.normal(size=(2000, 3)))
+
+
+def test_track_quats_z_axis():
+    assert_track_quats([(0.0, 0.0, 1.0), (0.0, 0.0, -1.0), (0.0, 0.0, 2.5), (0.0, 0.0, -0.5),
+                        (-0.0, -0.0, 1.0), (-0.0, -0.0, -1.0),
+                        (1e-6, 0.0, 1.0), (0.0, -1e-6, -1.0), (3e-5, 2e-5, 1.0)])
+
+
+def test_track_quats_zero():
+    assert_track_quats([(0.0, 0.0, 0.0)])
+    np.testing.assert_array_equal(instancing.get_track_quats(np.zeros((1, 3))), [(1.0, 0.0, 0.0, 0.0)])
@@ -0,0 +1,142 @@
+#**********************************************************************
+# Copyright 2020 Advanced Micro Devices, Inc
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+#********************************************************************
+import time
+
+import pytest
+
+bpy = pytest.importorskip('bpy')
+hdusd = pytest.importorskip('hdusd')
+
+from pxr import Usd, UsdGeom, Gf, Tf
+
+from hdusd import config
+from hdusd.usd_nodes.nodes import write_file
+
+
+@pytest.fixture(scope='module')
+def addon():
+    hdusd.register()
+    yield
+    hdusd.unregister()
+
+
+@pytest.fixture
+def nodetree(addon, monkeypatch):
+    monkeypatch.setattr(config, 'usd_write_file_delay', 0.0)
+
+    tree = bpy.data.node_groups.new("USD", 'hdusd.USDTree')
+    yield tree
+    bpy.data.node_groups.remove(tree)
+
+
+@pytest.fixture
+def usd_file(tmp_path):
+    file_path = tmp_path / "cube.usda"
+    stage = Usd.Stage.CreateNew(str(file_path))
+    UsdGeom.Cube.Define(stage, '/Cube')
+    stage.GetRootLayer().Save()
+    return file_path
+
+
+def wait_written(node, timeout=10.0):
+    writer = write_file._writers[node.writer_key]
+    end_time = time.monotonic() + timeout
+    while not writer.status.startswith(("Written", "Not changed", "Error")):
+        assert time.monotonic() < end_time, f"File isn't written, status: {writer.status}"
+        # timers aren't run in background mode
+        write_file._update_writers()
+        time.sleep(0.01)
+
+    assert not writer.status.startswith("Error"), writer.status
+
+
+def get_written_transform(file_path):
+    stage = Usd.Stage.Open(str(file_path))
+    return stage.GetPrimAtPath('/Transform').GetAttribute('xformOp:transform').Get()
+
+
+def test_transform_edit_reaches_write_file(nodetree, usd_file, tmp_path):
+    out_path = tmp_path / "out.usda"
+
+    def create_nodes():
+        file_node = nodetree.nodes.new('usd.UsdFileNode')
+        file_node.filename = str(usd_file)
+        transform_node = nodetree.nodes.new('usd.TransformNode')
+        write_node = nodetree.nodes.new('usd.WriteFileNode')
+        write_node.file_path = str(out_path)
+        render_node = nodetree.nodes.new('usd.HydraRenderNode')
+        nodetree.links.new(file_node.outputs[0], transform_node.inputs[0])
+        nodetree.links.new(transform_node.outputs[0], write_node.inputs[0])
+        nodetree.links.new(transform_node.outputs[0], render_node.inputs[0])
+        return transform_node, write_node, render_node
+
+    transform_node, write_node, render_node = nodetree.no_update_call(create_nodes)
+    nodetree.reset()
+    wait_written(write_node)
+    assert get_written_transform(out_path) == Gf.Matrix4d(1.0)
+
+    transform_stage = transform_node.cached_stage()
+    render_stage = render_node.cached_stage()
+    assert render_stage == transform_stage
+    prim_paths = {prim.GetPath() for prim in transform_stage.TraverseAll()}
+
+    resynced_paths = []
+
+    def on_objects_changed(notice, stage):
+        resynced_paths.extend(notice.GetResyncedPaths())
+
+    listener = Tf.Notice.Register(Usd.Notice.ObjectsChanged, on_objects_changed, transform_stage)
+    try:
+        write_file._writers[write_node.writer_key].status = ""
+        transform_node.translation = (1.0, 2.0, 3.0)
+    finally:
+        listener.Revoke()
+
+    # transform is edited in place: no prims are created or deleted, pass-through
+    # Hydra Render node keeps the same stage, Write File node writes edited stage
+    assert transform_node.cached_stage() == transform_stage
+    assert render_node.cached_stage() == render_stage
+    assert not resynced_paths
+    assert {prim.GetPath() for prim in transform_stage.TraverseAll()} == prim_paths
+    wait_written(write_node)
+    assert get_written_transform(out_path).ExtractTranslation() == Gf.Vec3d(1.0, 2.0, 3.0)
+
+
+def test_duplicated_transform_nodes_own_their_stages(nodetree, usd_file):
+    def create_nodes():
+        file_node = nodetree.nodes.new('usd.UsdFileNode')
+        file_node.filename = str(usd_file)
+        transform_nodes = []
+        for _ in range(2):
+            transform_node = nodetree.nodes.new('usd.TransformNode')
+            nodetree.links.new(file_node.outputs[0], transform_node.inputs[0])
+            transform_nodes.append(transform_node)
+
+        return transform_nodes
+
+    transform_node1, transform_node2 = nodetree.no_update_call(create_nodes)
+    nodetree.reset()
+
+    # both nodes have same properties and input, but memoized stage isn't shared
+    stage1 = transform_node1.cached_stage()
+    stage2 = transform_node2.cached_stage()
+    assert stage1 != stage2
+
+    transform_node1.translation = (1.0, 2.0, 3.0)
+
+    assert transform_node1.cached_stage() == stage1
+    assert transform_node2.cached_stage() == stage2
+    transform = stage2.GetPrimAtPath('/Transform').GetAttribute('xformOp:transform').Get()
+    assert transform == Gf.Matrix4d(1.0)
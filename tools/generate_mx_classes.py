@@ -14,6 +14,7 @@
 #********************************************************************
 import re
 import sys
+import json
 from pathlib import Path
 from collections import defaultdict
 
@@ -282,7 +283,31 @@ class {class_name}(MxNode):
     return '\n'.join(code_strings)
 
 
-def generate_classes_code(file_path, prefix, category):
+def generate_manifest_entry(nodedefs, prefix, category, module_name):
+    """Entry of compact manifest, which is used for lazy registration of MxNode classes"""
+    nodedef = nodedefs[0]
+    if not category:
+        category = get_attr(nodedef, 'nodegroup', prefix)
+
+    class_name = get_mx_node_class_name(nodedef, prefix)
+    return {
+        'module': module_name,
+        'class': class_name,
+        'bl_idname': f'hdusd.{class_name}',
+        'bl_label': get_attr(nodedef, 'uiname', title_str(nodedef.getNodeString())),
+        'category': category,
+        'nodedefs': [{
+            'name': nd.getName(),
+            'node': nd.getNodeString(),
+            'data_type': nodedef_data_type(nd),
+            'output_type': 'multioutput' if len(nd.getOutputs()) > 1 else
+                           nd.getOutputs()[0].getType(),
+            'inputs': [f"in_{p.getName()}:{p.getType()}" for p in nd.getInputs()],
+        } for nd in nodedefs],
+    }
+
+
+def generate_classes_code(file_path, prefix, category, module_name, manifest):
     IGNORE_NODEDEF_DATA_TYPE = ('matrix33', 'matrix44', 'matrix33FA', 'matrix44FA')
 
     code_strings = []
@@ -340,6 +365,7 @@ FILE_PATH = r"{file_path.relative_to(libs_dir)}"
     for nodedefs_by_node in node_def_classes_by_node.values():
         code_strings.append(generate_mx_node_class_code(nodedefs_by_node, prefix, category))
         mx_node_class_names.append(get_mx_node_class_name(nodedefs_by_node[0], prefix))
+        manifest.append(generate_manifest_entry(nodedefs_by_node, prefix, category, module_name))
 
     code_strings.append(f"""
 mx_node_classes = [{', '.join(mx_node_class_names)}]
@@ -354,6 +380,9 @@ def main():
     for f in gen_code_dir.glob("gen_*.py"):
         f.unlink()
 
+    manifest_file = gen_code_dir / "gen_manifest.json"
+    manifest = []
+
     files = [
         ('PBR', "PBR", mx_libs_dir / "bxdf/standard_surface.mtlx"),
         ('USD', "USD", mx_libs_dir / "bxdf/usd_preview_surface.mtlx"),
@@ -368,9 +397,15 @@ def main():
         module_file = gen_code_dir / f"{module_name}.py"
 
         print(f"Generating {module_file} from {file_path}")
-        module_code = generate_classes_code(file_path, prefix, category)
+        module_code = generate_classes_code(file_path, prefix, category, module_name, manifest)
         module_file.write_text(module_code)
 
+    # sorting by category and label the same way as registered classes are sorted
+    manifest.sort(key=lambda entry: (entry['category'].lower(), entry['bl_label'].lower()))
+
+    print(f"Generating {manifest_file}")
+    manifest_file.write_text(json.dumps(manifest, indent=1))
+
 
 if __name__ == "__main__":
     main()